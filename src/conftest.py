@@ -1,3 +1,4 @@
+import hashlib
 import sys
 from functools import wraps
 
@@ -40,3 +41,47 @@ def load_component_html_fn():
             return html
 
     return loader
+
+
+@pytest.fixture
+def docs_site_fn():
+    @wraps(docs_site_fn)
+    def loader(apps: list[str], components: list[str], copies: int = 0) -> dict[str, str]:
+        """
+        mock the documentation site with the test HTML, the pages is the mapping of the link to the HTML
+        and can be changed by the caller. The page answers 304 when the If-None-Match matches.
+
+        the copies serves each method page again under the numbered /api/copyN/ prefix, to scale up the site.
+        """
+        baseurl = "https://docs.joinmastodon.org"
+        pages = {}
+
+        index = [f'<a href="/methods/{app}/">{app}</a>' for app in apps]
+        index += [f'<a href="/entities/{component}/">{component}</a>' for component in components]
+
+        for app in apps:
+            with open(f"src/tests/html/api_{app}.html") as f:
+                pages[f"{baseurl}/methods/{app}/"] = f.read()
+        for copy in range(1, copies + 1):
+            for app in apps:
+                html = pages[f"{baseurl}/methods/{app}/"].replace("/api/", f"/api/copy{copy}/")
+                pages[f"{baseurl}/methods/{app}_{copy}/"] = html
+                index.append(f'<a href="/methods/{app}_{copy}/">{app}</a>')
+        for component in components:
+            with open(f"src/tests/html/component_{component.lower()}.html") as f:
+                pages[f"{baseurl}/entities/{component}/"] = f.read()
+        pages[baseurl] = "\n".join(index)
+
+        def callback(request):
+            link = request.url.rstrip("/") if request.url.rstrip("/") == baseurl else request.url
+            etag = f'"{hashlib.sha256(pages[link].encode()).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, ""
+            return 200, {"ETag": etag}, pages[link]
+
+        for link in pages:
+            responses.add_callback(responses.GET, link, callback=callback)
+
+        return pages
+
+    return loader
@@ -1,41 +1,80 @@
-import requests
-import yaml
-from loguru import logger
+"""
+The generator of the Mastodon OpenAPI spec.
 
-from src.openapi_spec import Info
-from src.openapi_spec import License
-from src.openapi_spec import OpenAPI
+the submodules depend on the crawler stack (requests, bs4, yaml and loguru), so they are imported
+on the first access of the exported names instead of importing the package.
+"""
 
-from .components import handle_components
-from .paths import handle_paths
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-description = """
-The official Mastodon API documentation is available at https://docs.joinmastodon.org/api/ but
-it does not provide an OpenAPI specification. This script generates an OpenAPI specification
-from the website.
-"""
+if TYPE_CHECKING:
+    from src.openapi_spec import OpenAPI
+
+    from .artifacts import write_artifacts
+    from .batch import Version
+    from .batch import batch
+    from .fetch import Fetcher
+    from .generator import Generator
+    from .generator import to_openapi_spec_text
+    from .markdown import MarkdownFetcher
+    from .stream import stream_spec
+    from .watch import watch
+
+_LAZY_IMPORTS = {
+    "write_artifacts": ".artifacts",
+    "Version": ".batch",
+    "batch": ".batch",
+    "Fetcher": ".fetch",
+    "Generator": ".generator",
+    "to_openapi_spec_text": ".generator",
+    "MarkdownFetcher": ".markdown",
+    "stream_spec": ".stream",
+    "watch": ".watch",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
 
 
 def run(link: str) -> str:
-    info = Info(
-        title="Mastodon OpenAPI API",
-        version="0.1.0",
-        summary="The self-hosted Mastodon OpenAPI specifcation",
-        description=description,
-        license=License(name="MIT", identifier="MIT"),
-    )
+    from .generator import to_openapi_spec_text
+
+    return to_openapi_spec_text(build_spec(link))
 
-    logger.info(f"starting to generate OpenAPI spec from {link=}")
 
-    response = requests.get(link)
-    response.raise_for_status()
+def build_spec(
+    link: str,
+    only_tags: set[str] | None = None,
+    only_entities: set[str] | None = None,
+    docs_repo: str | None = None,
+) -> "OpenAPI":
+    """build the spec from the docs site, or from the Markdown of the local docs repository checkout"""
+    from .fetch import Fetcher
+    from .generator import Generator
+    from .markdown import MarkdownFetcher
 
-    spec = OpenAPI(info=info)
-    spec.paths = handle_paths(link, response.text)
-    spec.components = handle_components(link, response.text)
-    return to_openapi_spec_text(spec)
+    fetcher = MarkdownFetcher(docs_repo, link) if docs_repo else Fetcher(cache=False)
+    generator = Generator(link, fetcher, only_tags=only_tags, only_entities=only_entities)
+    return generator.generate()
 
 
-def to_openapi_spec_text(spec: OpenAPI) -> str:
-    spec_dict = spec.model_dump(exclude_none=True, by_alias=True)
-    return yaml.dump(spec_dict, default_flow_style=False, sort_keys=True)
+__all__ = [
+    "run",
+    "build_spec",
+    "write_artifacts",
+    "Version",
+    "batch",
+    "Fetcher",
+    "Generator",
+    "to_openapi_spec_text",
+    "MarkdownFetcher",
+    "stream_spec",
+    "watch",
+]
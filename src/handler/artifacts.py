@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+from loguru import logger
+
+from src.openapi_spec import OpenAPI
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is an optional dependency
+    brotli = None
+
+
+def strip_descriptions(node, context: str | None = None):
+    """
+    Remove the description from the dumped OpenAPI spec.
+
+    the description of the Response Object is required so it is kept as the empty string, and
+    the keys under `properties` are the attribute names (e.g. Status.description) and never
+    stripped.
+    """
+    match node:
+        case dict():
+            spec = {}
+            for key, value in node.items():
+                if key == "description" and context != "properties":
+                    if context == "response":
+                        spec[key] = ""
+                    continue
+
+                match context:
+                    case "properties":
+                        child = None
+                    case "responses":
+                        child = "response"
+                    case _:
+                        child = key
+
+                spec[key] = strip_descriptions(value, child)
+            return spec
+        case list():
+            return [strip_descriptions(value, context) for value in node]
+        case _:
+            return node
+
+
+def to_minified_json(spec: OpenAPI, without_description: bool = False) -> bytes:
+    """dump the OpenAPI spec as the compact JSON, with the stable key order"""
+    spec_dict = spec.model_dump(exclude_none=True, by_alias=True)
+    if without_description:
+        spec_dict = strip_descriptions(spec_dict)
+
+    text = json.dumps(spec_dict, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+    return text.encode("utf-8")
+
+
+def write_artifacts(spec: OpenAPI, output: str, without_description: bool = False) -> dict:
+    """
+    Write the minified JSON spec and the precompressed siblings next to the output file.
+
+    the mastodon-openapi.yaml produces
+
+        - mastodon-openapi.min.json       the compact JSON
+        - mastodon-openapi.min.json.gz    the gzip-ed compact JSON
+        - mastodon-openapi.min.json.br    the brotli-ed compact JSON (when brotli installed)
+        - mastodon-openapi.manifest.json  the content hash, ETag and size of each file
+
+    and return the manifest.
+    """
+    output = Path(output)
+    data = to_minified_json(spec, without_description)
+    digest = hashlib.sha256(data).hexdigest()
+
+    minified = output.with_suffix(".min.json")
+    encodings = {"identity": (minified, data)}
+    encodings["gzip"] = (minified.with_name(f"{minified.name}.gz"), gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli:
+        encodings["br"] = (minified.with_name(f"{minified.name}.br"), brotli.compress(data, quality=11))
+    else:
+        logger.warning("brotli not installed (the artifacts extra), skip the .br artifact")
+
+    manifest = {
+        "file": minified.name,
+        "hash": digest,
+        "etag": f'"{digest[:32]}"',
+        "version": digest[:8],
+        "encodings": {},
+    }
+    for encoding, (path, content) in encodings.items():
+        logger.info(f"write the {encoding} artifact {path} ({len(content)} bytes)")
+        path.write_bytes(content)
+        manifest["encodings"][encoding] = {"file": path.name, "size": len(content)}
+
+    manifest_path = output.with_suffix(".manifest.json")
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return manifest
@@ -0,0 +1,126 @@
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import SchemaObject
+
+from .fetch import BundleFetcher
+from .fetch import Fetcher
+from .generator import FragmentCache
+from .generator import Generator
+from .generator import to_openapi_spec_text
+from .markdown import MarkdownFetcher
+
+BASEURL = "https://docs.joinmastodon.org"
+
+
+@dataclass
+class Version:
+    """The documentation of one Mastodon version, from the base URL, the snapshot bundle or the docs repository"""
+
+    label: str
+    source: str
+
+    @classmethod
+    def parse(cls, text: str) -> "Version":
+        """parse the `label=source` or the bare source, the label defaults to the name of the source"""
+        if matched := re.match(r"^([\w.-]+)=(.+)$", text):
+            label, source = matched.groups()
+            return cls(label=label, source=source)
+
+        parsed = urlparse(text)
+        label = f"{parsed.netloc}{parsed.path}" if parsed.scheme else Path(text).name
+        return cls(label=re.sub(r"[^\w.-]+", "_", label).strip("_"), source=text)
+
+    @property
+    def is_bundle(self) -> bool:
+        return not urlparse(self.source).scheme
+
+    @property
+    def is_docs_repo(self) -> bool:
+        """the local checkout of the docs repository, which holds the Markdown in content/en"""
+        return self.is_bundle and (Path(self.source) / "content" / "en").is_dir()
+
+
+def diff_specs(old: OpenAPI, new: OpenAPI) -> dict[str, list[str]]:
+    """the added and removed operations, schemas and schema properties between two specs"""
+    operations = [
+        {f"{method.upper()} {path}" for path, item in spec.paths.root.items() for method in item.root}
+        for spec in (old, new)
+    ]
+
+    schemas = [(spec.components.schemas or {}) if spec.components else {} for spec in (old, new)]
+    properties = [
+        {
+            f"{name}.{prop}"
+            for name, schema in spec_schemas.items()
+            if isinstance(schema, SchemaObject)
+            for prop in schema.properties or {}
+        }
+        for spec_schemas in schemas
+    ]
+
+    return {
+        "added operations": sorted(operations[1] - operations[0]),
+        "removed operations": sorted(operations[0] - operations[1]),
+        "added schemas": sorted(schemas[1].keys() - schemas[0].keys()),
+        "removed schemas": sorted(schemas[0].keys() - schemas[1].keys()),
+        "added properties": sorted(properties[1] - properties[0]),
+        "removed properties": sorted(properties[0] - properties[1]),
+    }
+
+
+def format_changes(changes: list[tuple[str, str, dict[str, list[str]]]]) -> str:
+    """the Markdown summary of the changes between the consecutive versions"""
+    lines = ["# Changes between versions", ""]
+    for old, new, diff in changes:
+        lines += [f"## {old} -> {new}", ""]
+        if not any(diff.values()):
+            lines += ["No changes.", ""]
+            continue
+
+        for kind, items in diff.items():
+            if items:
+                lines += [f"### {kind.capitalize()}", "", *[f"- `{item}`" for item in items], ""]
+
+    return "\n".join(lines)
+
+
+def batch(
+    versions: list[Version], output: str, baseurl: str = BASEURL, cache: FragmentCache | None = None
+) -> dict[str, OpenAPI]:
+    """
+    Generate the OpenAPI spec per version in one process and write the cross-version change summary.
+
+    the fetcher and the parsed fragments are shared, so the page with the same content is parsed once
+    across the versions.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    fetcher = Fetcher(cache=False)
+    cache = cache or FragmentCache()
+    specs = {}
+
+    for version in versions:
+        logger.info(f"generate the OpenAPI spec of {version=}")
+        if version.is_docs_repo:
+            generator = Generator(baseurl, MarkdownFetcher(version.source, baseurl), cache)
+        elif version.is_bundle:
+            generator = Generator(baseurl, BundleFetcher(version.source, baseurl), cache)
+        else:
+            generator = Generator(version.source, fetcher, cache)
+
+        spec = specs[version.label] = generator.generate()
+        path = output / f"mastodon-openapi-{version.label}.yaml"
+        path.write_text(to_openapi_spec_text(spec))
+        logger.info(f"write {path} with {generator.changed} pages parsed ({cache.hits} cache hits so far)")
+
+    labels = list(specs)
+    changes = [(old, new, diff_specs(specs[old], specs[new])) for old, new in zip(labels, labels[1:], strict=False)]
+    (output / "CHANGES.md").write_text(format_changes(changes))
+    return specs
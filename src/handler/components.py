@@ -2,12 +2,21 @@ import re
 
 import requests
 from bs4 import BeautifulSoup
-from bs4.element import NavigableString
 from bs4.element import Tag
 from loguru import logger
 
+from src.handler.transform import HoistSchemas
+from src.handler.transform import Overrides
+from src.handler.transform import Transformer
+from src.handler.typeexpr import compile_type
+from src.handler.utils import REQUIRED_LABELS
+from src.handler.utils import Inline
 from src.handler.utils import canonicalize
-from src.openapi_spec import BuildInType
+from src.handler.utils import inline_text
+from src.handler.utils import inlines_of
+from src.handler.utils import parse_version_history
+from src.handler.utils import release_soup
+from src.handler.utils import version_metadata
 from src.openapi_spec import Component
 from src.openapi_spec import MediaTypeObject
 from src.openapi_spec import ReferenceObject
@@ -29,7 +38,27 @@ def handle_components(link: str, html: str) -> Component:
     """
     Handle the base URL of the Mastodon API documentation and return the OpenAPI Components object.
     """
-    spec = {
+    spec = default_components()
+    for _, entity_link in entity_links(link, html):
+        spec.update(handle_component(entity_link))
+
+    component = Component(responses=spec, securitySchemes=default_security_scheme())
+    return post_handle_components(component)
+
+
+def entity_links(link: str, html: str) -> list[tuple[str, str]]:
+    """list the (name, link) of the entity pages from the documentation page"""
+    soup = BeautifulSoup(html, "html.parser")
+    entities = soup.find_all("a", href=lambda href: href and href.startswith("/entities/"))
+    links = [(entity.text, f"{link}{entity['href']}") for entity in entities]
+
+    release_soup(soup)
+    return links
+
+
+def default_components() -> dict[str, ResponseObject | ReferenceObject]:
+    """the built-in components which are not listed as the entity in the documentation"""
+    return {
         "Empty": ResponseObject(
             description="Empty content",
             content={
@@ -92,15 +121,6 @@ def handle_components(link: str, html: str) -> Component:
             },
         ),
     }
-    soup = BeautifulSoup(html, "html.parser")
-
-    entities = soup.find_all("a", href=lambda href: href and href.startswith("/entities/"))
-    for entity in entities:
-        entity_link = f"{link}{entity['href']}"
-        spec.update(handle_component(entity_link))
-
-    component = Component(responses=spec, securitySchemes=default_security_scheme())
-    return post_handle_components(component)
 
 
 def handle_component(link: str) -> dict[str, ResponseObject | ReferenceObject]:
@@ -112,8 +132,15 @@ def handle_component(link: str) -> dict[str, ResponseObject | ReferenceObject]:
     response = requests.get(link)
     response.raise_for_status()
 
+    return parse_component(link, response.text)
+
+
+def parse_component(link: str, html: str) -> dict[str, ResponseObject | ReferenceObject]:
+    """
+    Parse the fetched Mastodon entity page and return the OpenAPI SchemaObject.
+    """
     spec = {}
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     content = soup.find("div", class_="e-content")
     parts = list(content.children)
@@ -127,7 +154,7 @@ def handle_component(link: str) -> dict[str, ResponseObject | ReferenceObject]:
             continue
 
         logger.info(f"processing component {name=}")
-        schema_object = SchemaObject(type="object", properties={})
+        schema_object = SchemaObject(type="object", properties={}, required=[])
         for column in columns:
             if not isinstance(column, Tag) or not column.find("span", class_="heading__text"):
                 continue
@@ -135,6 +162,10 @@ def handle_component(link: str) -> dict[str, ResponseObject | ReferenceObject]:
             attr_name = column.find("code").text
             prop = handle_parameter(attr_name, column.find_next("p"))
             schema_object.properties[attr_name] = prop
+            if not column.find("span", class_="api-method-parameter-required", string="optional"):
+                schema_object.required.append(attr_name)
+
+        schema_object.required = schema_object.required or None
 
         match name:
             case "Attributes":
@@ -156,126 +187,107 @@ def handle_component(link: str) -> dict[str, ResponseObject | ReferenceObject]:
             content={"application/json": MediaTypeObject.model_validate({"schema": schema_object})},
         )
 
+    # release the parsed tree once the fragments are extracted
+    release_soup(soup)
     return spec
 
 
 def post_handle_components(component: Component) -> Component:
     """copy the response object to the schema object and setup the reference object"""
-    component.schemas = {}
-    for key, resp in component.responses.items():
-        for mime in resp.content or []:
-            schema = resp.content[mime].schema_object
-            component.schemas[key] = schema
-
-            resp.content[mime].schema_object = ReferenceObject.model_validate(
-                {"$ref": f"#/components/schemas/{canonicalize(key)}"}
-            )
-
-    # Case 1: convert the Array of Hash to History
-    for schema in {"AdminEmailDomainBlock", "Tag", "TrendsLink"}:
-        history_item = component.schemas[schema].properties["history"].items
-        history_item.ref = "#/components/schemas/History"
-
-    # Case 2: convert the Array of Hash in AdminDimension
-    component.schemas["AdminDimension"].properties["data"].items = SchemaObject(
-        type="object",
-        properties={
-            "key": SchemaObject(type="string"),
-            "human_key": SchemaObject(type="string"),
-            "value": SchemaObject(type="string"),
-        },
-    )
+    transformer = Transformer([HoistSchemas(), Overrides()])
+    transformer.visit_component(component)
+    transformer.end()
+    return component
 
-    # Case 3: convert the Array of Hash in AdminMeasure
-    component.schemas["AdminMeasure"].properties["data"].items = SchemaObject(
-        type="object",
-        properties={
-            "date": SchemaObject(type="string"),
-            "value": SchemaObject(type="string"),
-        },
-    )
 
-    return component
+# the format of the string by the detail of the type, e.g. String (Datetime), the first match wins
+TYPE_FORMATS = (
+    ("cast from an integer", "int64"),
+    ("Datetime", "date-time"),
+    ("Date", "date"),
+    ("URL", "uri"),
+    ("HTML", "html"),
+    ("ISO 639", "iso-639-1"),
+    ("Email", "email"),
+)
 
 
 def handle_parameter(name, tag: Tag) -> SchemaObject | ReferenceObject:
-    desc, nullable, typ, items, version = "", False, "", None, ""
-    for strong in tag.find_all(["strong", "em"]):
-        match text := strong.text:
+    return attribute_schema(name, inlines_of(tag.children))
+
+
+def attribute_schema(name: str, inlines: list[Inline]) -> SchemaObject | ReferenceObject:
+    """
+    the schema of the entity attribute by its paragraph, e.g. `**Description:** ...\\ **Type:** String`,
+    the labels are the strong (or the em) nodes and the fields follow them.
+    """
+    text = inline_text(inlines)
+    desc, nullable, typ, items, history = "", False, "", None, []
+    detail, enum = "", None
+    for index, node in enumerate(inlines):
+        if node.kind not in ("strong", "em"):
+            continue
+
+        following = inlines[index + 1 :]
+        match node.text:
             case "Description:":
-                desc = re.search(r"Description:([\s\S]*?)Type: ", tag.text).group(1)
+                desc = re.search(r"Description:([\s\S]*?)Type: ", text).group(1)
                 desc = desc.strip()
             case "Type:":
-                candidate = strong.next_sibling.strip()
-                candidate = strong.next_sibling
-                while True:
-                    if isinstance(candidate, NavigableString):
-                        text = candidate.strip()
-                        if text:
-                            typ = text
-                            if typ == "Array of":
-                                items = candidate.next_sibling.text
-
-                            break
-                    elif isinstance(candidate, Tag):
-                        if candidate.name == "a":
-                            typ = candidate.text
-                            break
-                        elif candidate.name == "span" and candidate["class"] == ["api-method-parameter-required"]:
-                            nullable = True
-
-                    candidate = candidate.next_sibling
+                detail = re.search(r"Type:([\s\S]*?)(?:Version history:|$)", text).group(1).strip()
+                enum = handle_enum(following) if "Enumerable" in detail else None
+                typ, items, nullable = handle_type(following)
             case "Version history:":
-                version = strong.next_sibling.next_sibling.text.strip()
+                history = parse_version_history(following)
             case _:
-                raise ValueError(f"unknown tag {text=}")
-
-    typ, items = handle_type_str(typ, items)
-    logger.info(f"handle parameter {name}: {nullable=} {typ=} {version=}")
-    return handle_schema(typ, desc, nullable, items)
+                raise ValueError(f"unknown tag {node.text=}")
 
+    expr = compile_type(typ, items)
+    fmt = handle_type_format(detail) if expr.type == "string" else None
+    added_in, changed_in = version_metadata(history)
+    logger.info(f"handle parameter {name}: {nullable=} {typ=} {fmt=} {added_in=} {changed_in=}")
 
-def handle_schema(
-    typ: str, desc: str, nullable: bool = False, items: str | None = None
-) -> ReferenceObject | SchemaObject:
-    if typ.lower() in BuildInType:
-        schema = SchemaObject(
-            type=[typ.lower(), "null"] if nullable else typ.lower(),
-            description=desc.strip(),
-        )
-
-        if typ.lower() == "array":
-            schema.items = handle_schema(items, "")
-
-        return schema
-    elif typ.lower() == "null":
-        return SchemaObject(type="null", description=desc.strip())
-    elif typ.lower().endswith("or null"):
-        typ = typ[: -len(" or null")]
-        return handle_schema(typ, desc, True, items)
-    else:
-        return ReferenceObject.model_validate(
-            {
-                "$ref": f"#/components/schemas/{canonicalize(typ)}",
-                "description": desc.strip(),
-            }
-        )
+    schema = expr.schema(desc.strip(), nullable, fmt, enum)
+    schema.added_in, schema.changed_in = added_in, changed_in
+    return schema
 
 
-def handle_type_str(text: str, item: str | None = None) -> tuple[str, str | None]:
-    if text == "Array of":
-        return "array", item
-    if text == "Array of Strings":
-        return "array", "String"
-    elif text.startswith("String"):
-        return "String", None
-    elif text.startswith("Integer"):
-        return "Integer", None
-    elif text.startswith("Number"):
-        return "Number", None
-    elif text.startswith("Array of"):
-        items = text.split()[2]
-        text = "array"
-        return "array", handle_type_str(items)[0]
-
-    return text, item
+def handle_type(inlines: list[Inline]) -> tuple[str, str | None, bool]:
+    """
+    the (type, items, nullable) after the `Type:` label, the type is the first text or the linked
+    entity, the items is the linked type after the bare `Array of`, and any label before it is nullable.
+    """
+    nullable = False
+    for index, node in enumerate(inlines):
+        match node.kind:
+            case "text" if typ := node.text.strip():
+                items = inlines[index + 1].text if typ == "Array of" and index + 1 < len(inlines) else None
+                return typ, items, nullable
+            case "link":
+                return node.text, None, nullable
+            case "label" if node.text in REQUIRED_LABELS:
+                nullable = True
+
+    return "", None, nullable
+
+
+def handle_type_format(detail: str) -> str | None:
+    """the format of the string type from the parenthesized detail, e.g. String (Datetime) is date-time"""
+    if not (matched := re.match(r"[^(]*\(([^)]*)\)", detail)):
+        return None
+
+    return next((fmt for keyword, fmt in TYPE_FORMATS if keyword in matched.group(1)), None)
+
+
+def handle_enum(inlines: list[Inline]) -> list[str] | None:
+    """the enumerable values listed after the type, e.g. <code>public</code> = Public post"""
+    values = []
+    for index, node in enumerate(inlines):
+        if node.kind == "strong":
+            break
+        if node.kind == "code" and index + 1 < len(inlines):
+            following = inlines[index + 1]
+            if following.kind == "text" and following.text.strip().startswith("="):
+                values.append(node.text.strip())
+
+    return values or None
@@ -0,0 +1,143 @@
+import hashlib
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from urllib.parse import urldefrag
+
+import requests
+from loguru import logger
+
+
+@dataclass
+class Page:
+    """The fetched documentation page with the validators of the conditional request"""
+
+    link: str
+    text: str
+    etag: str | None = None
+    last_modified: str | None = None
+    # the lastmod of the page in the sitemap when it was fetched
+    lastmod: str | None = None
+    # the Markdown source of the docs repository instead of the HTML of the docs site
+    markdown: bool = False
+
+    @cached_property
+    def digest(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+
+class Fetcher:
+    """
+    Fetch the documentation page and keep the last response, so the next fetch of the same page
+    is the conditional request (If-None-Match / If-Modified-Since) and 304 reuses the cached page.
+
+    the one-shot generation can disable the cache so the fetched page is released once parsed.
+
+    the lastmod of the sitemap skips the request of the cached page entirely, the page is reused
+    while its lastmod is the same as when it was fetched, and every cached page is reused when the
+    sitemap itself is not changed.
+    """
+
+    def __init__(self, session: requests.Session | None = None, cache: bool = True):
+        self.session = session or requests.Session()
+        self.pages: dict[str, Page] = {}
+        self.requests = 0
+        self.cache = cache
+
+        self.lastmods: dict[str, str] = {}
+        self.sitemap: str | None = None
+        self.sitemap_unchanged = False
+
+    def load_sitemap(self, link: str) -> bool:
+        """load the lastmod of the pages from the sitemap, return True when the sitemap is changed"""
+        self.sitemap_unchanged = False
+        try:
+            page = self.get(link)
+            root = ET.fromstring(page.text)
+        except (requests.RequestException, OSError, ET.ParseError) as err:
+            logger.warning(f"failed to load the sitemap {link=}: {err}")
+            self.lastmods, self.sitemap = {}, None
+            return True
+
+        if page.digest == self.sitemap:
+            self.sitemap_unchanged = True
+            return False
+
+        self.lastmods = {}
+        for url in root.iter():
+            if not url.tag.endswith("}url"):
+                continue
+
+            loc = next((child.text for child in url if child.tag.endswith("}loc")), None)
+            lastmod = next((child.text for child in url if child.tag.endswith("}lastmod")), None)
+            if loc and lastmod:
+                self.lastmods[sitemap_key(loc)] = lastmod.strip()
+
+        logger.info(f"load the sitemap with {len(self.lastmods)} pages {link=}")
+        self.sitemap = page.digest
+        return True
+
+    def get(self, link: str) -> Page:
+        key, _ = urldefrag(link)
+        cached = self.pages.get(key)
+
+        # only the page listed in the sitemap is trusted by it, the others fall back to the conditional request
+        lastmod = self.lastmods.get(sitemap_key(key))
+        if cached and lastmod and (self.sitemap_unchanged or cached.lastmod == lastmod):
+            logger.debug(f"page not modified by the sitemap {link=}")
+            return cached
+
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        self.requests += 1
+        response = self.session.get(key, headers=headers)
+        if response.status_code == 304 and cached:
+            logger.debug(f"page not modified {link=}")
+            cached.lastmod = lastmod
+            return cached
+
+        response.raise_for_status()
+        page = Page(
+            link=key,
+            text=response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            lastmod=lastmod,
+        )
+        if self.cache:
+            self.pages[key] = page
+        return page
+
+
+def sitemap_key(link: str) -> str:
+    """the link in the sitemap and in the docs may differ by the trailing slash"""
+    return link.rstrip("/")
+
+
+class BundleFetcher(Fetcher):
+    """
+    Fetch the documentation page from the snapshot bundle, the local mirror of the documentation site
+    (e.g. `wget --mirror`) which holds the page of /methods/accounts/ as methods/accounts/index.html.
+    """
+
+    def __init__(self, root: str | Path, baseurl: str):
+        super().__init__(cache=False)
+        self.root = Path(root)
+        self.baseurl = baseurl.rstrip("/")
+
+    def get(self, link: str) -> Page:
+        key, _ = urldefrag(link)
+        if not key.startswith(self.baseurl):
+            raise ValueError(f"{link=} is not in the bundle of {self.baseurl}")
+
+        path = self.root / key.removeprefix(self.baseurl).strip("/")
+        if path.is_dir():
+            path = path / "index.html"
+
+        self.requests += 1
+        return Page(link=key, text=path.read_text())
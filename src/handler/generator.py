@@ -0,0 +1,237 @@
+from dataclasses import dataclass
+from dataclasses import replace
+from urllib.parse import urljoin
+
+import yaml
+from loguru import logger
+
+from src.openapi_spec import Component
+from src.openapi_spec import Info
+from src.openapi_spec import License
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import PathItem
+from src.openapi_spec import Paths
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import ResponseObject
+
+from . import markdown
+from .components import default_components
+from .components import default_security_scheme
+from .components import entity_links
+from .components import parse_component
+from .fetch import Fetcher
+from .fetch import Page
+from .paths import method_links
+from .paths import parse_path_item
+from .select import entity_index
+from .select import prune_components
+from .select import ref_names
+from .select import resolve_entity
+from .transform import Transformer
+from .transform import default_passes
+from .transform import log_profile
+
+description = """
+The official Mastodon API documentation is available at https://docs.joinmastodon.org/api/ but
+it does not provide an OpenAPI specification. This script generates an OpenAPI specification
+from the website.
+"""
+
+
+def default_info() -> Info:
+    return Info(
+        title="Mastodon OpenAPI API",
+        version="0.1.0",
+        summary="The self-hosted Mastodon OpenAPI specifcation",
+        description=description,
+        license=License(name="MIT", identifier="MIT"),
+    )
+
+
+def page_path_items(tag: str, link: str, page: Page) -> dict[str, PathItem]:
+    """parse the API method page, the Markdown source of the docs repository is read from its AST"""
+    parse = markdown.parse_path_item if page.markdown else parse_path_item
+    return parse(tag, link, page.text)
+
+
+def page_component(link: str, page: Page) -> dict[str, ResponseObject | ReferenceObject]:
+    """parse the entity page, the Markdown source of the docs repository is read from its AST"""
+    parse = markdown.parse_component if page.markdown else parse_component
+    return parse(link, page.text)
+
+
+@dataclass
+class Fragment[T]:
+    """The parsed result of the documentation page, and the link of the page it parsed from"""
+
+    link: str
+    value: T
+
+
+class FragmentCache:
+    """
+    The parsed fragments keyed by the content digest of the page, the same page is parsed once even
+    it is fetched from the different link (e.g. the docs of the different Mastodon versions).
+    """
+
+    def __init__(self):
+        self.paths: dict[tuple[str, str], Fragment[dict[str, PathItem]]] = {}
+        self.components: dict[str, Fragment[dict[str, ResponseObject | ReferenceObject]]] = {}
+        self.used: set = set()
+        self.hits = 0
+        self.misses = 0
+
+    def path_items(self, tag: str, page: Page) -> dict[str, PathItem]:
+        key = (tag, page.digest)
+        self.used.add(key)
+
+        if fragment := self.paths.get(key):
+            self.hits += 1
+        else:
+            logger.info(f"handle API method {tag=} link={page.link}")
+            fragment = self.paths[key] = Fragment(page.link, page_path_items(tag, page.link, page))
+            self.misses += 1
+
+        spec = {}
+        for path, path_item in fragment.value.items():
+            spec[path] = path_item.model_copy(deep=True)
+            if fragment.link != page.link:
+                # the operation links to the section of the page it parsed from
+                for operation in spec[path].root.values():
+                    operation.description = operation.description.replace(fragment.link, page.link)
+        return spec
+
+    def component(self, page: Page) -> dict[str, ResponseObject | ReferenceObject]:
+        key = page.digest
+        self.used.add(key)
+
+        if fragment := self.components.get(key):
+            self.hits += 1
+        else:
+            logger.info(f"handle entity link={page.link}")
+            fragment = self.components[key] = Fragment(page.link, page_component(page.link, page))
+            self.misses += 1
+
+        return {name: response.model_copy(deep=True) for name, response in fragment.value.items()}
+
+    def prune(self):
+        """drop the fragments which are not used since the last prune"""
+        self.paths = {key: value for key, value in self.paths.items() if key in self.used}
+        self.components = {key: value for key, value in self.components.items() if key in self.used}
+        self.used = set()
+
+
+class Generator:
+    """
+    Generate the OpenAPI spec from the Mastodon API documentation.
+
+    the parsed fragment of each page is kept, so the next generation only re-parses the pages
+    which changed since the last generation. The cache can be shared by the generators, otherwise
+    the fragments of the outdated pages are dropped after each generation.
+
+    the generation can be restricted to the tags and the entities, which only crawls the pages of
+    the tags and the entities they reference, and emits the partial spec with the reachable
+    components only.
+
+    the sitemap of the docs can be loaded before each generation, so the unchanged pages are
+    reused by their lastmod without any request.
+    """
+
+    def __init__(
+        self,
+        link: str,
+        fetcher: Fetcher | None = None,
+        cache: FragmentCache | None = None,
+        only_tags: set[str] | None = None,
+        only_entities: set[str] | None = None,
+        sitemap: bool = False,
+    ):
+        self.link = link
+        self.fetcher = fetcher or Fetcher()
+        self.cache = cache or FragmentCache()
+        self.shared = cache is not None
+        self.only_tags = only_tags
+        self.only_entities = only_entities
+        self.sitemap = sitemap
+
+        self.changed = 0
+        self.profile: dict = {}
+
+    @property
+    def selective(self) -> bool:
+        return self.only_tags is not None or self.only_entities is not None
+
+    def generate(self) -> OpenAPI:
+        logger.info(f"starting to generate OpenAPI spec from link={self.link}")
+        misses = self.cache.misses
+
+        if self.sitemap:
+            self.fetcher.load_sitemap(urljoin(f"{self.link.rstrip('/')}/", "sitemap.xml"))
+        index = self.fetcher.get(self.link)
+
+        spec = OpenAPI(info=default_info())
+        spec.paths = self.generate_paths(index.text)
+        spec.components = self.generate_components(index.text, ref_names(spec.paths) if self.selective else None)
+
+        transformer = Transformer(default_passes())
+        transformer.transform(spec)
+        log_profile(transformer)
+
+        if self.selective:
+            prune_components(spec, self.only_entities or set())
+
+        self.profile = transformer.profile()
+        self.changed = self.cache.misses - misses
+        if not self.shared:
+            self.cache.prune()
+        return spec
+
+    def generate_paths(self, html: str) -> Paths:
+        spec = {}
+        for tag, link in method_links(self.link, html):
+            if self.selective and tag not in (self.only_tags or set()):
+                continue
+
+            page = self.fetcher.get(link)
+            # keep the section (e.g. #v2) of the link in the operation link
+            page = replace(page, link=link) if page.link != link else page
+            spec.update(self.cache.path_items(tag, page))
+
+        return Paths(spec)
+
+    def generate_components(self, html: str, needed: set[str] | None = None) -> Component:
+        """generate the components, or only the needed components and the components they reference"""
+        spec = default_components()
+        links = entity_links(self.link, html)
+
+        if needed is None:
+            for _, link in links:
+                spec.update(self.cache.component(self.fetcher.get(link)))
+            return Component(responses=spec, securitySchemes=default_security_scheme())
+
+        entities = entity_index(links)
+        needed = needed | (self.only_entities or set())
+        fetched = set()
+        while unresolved := {name for name in needed if name not in spec} - fetched:
+            name = unresolved.pop()
+            fetched.add(name)
+
+            if not (link := resolve_entity(name, entities)):
+                logger.warning(f"no entity page defines {name=}")
+                continue
+
+            page = self.fetcher.get(link)
+            if page.link in fetched:
+                continue
+
+            fetched.add(page.link)
+            responses = self.cache.component(page)
+            spec.update(responses)
+            needed |= ref_names(responses)
+
+        return Component(responses=spec, securitySchemes=default_security_scheme())
+
+
+def to_openapi_spec_text(spec: OpenAPI) -> str:
+    spec_dict = spec.model_dump(exclude_none=True, by_alias=True)
+    return yaml.dump(spec_dict, default_flow_style=False, sort_keys=True)
@@ -0,0 +1,548 @@
+import html
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urldefrag
+
+import yaml
+from loguru import logger
+
+from src.openapi_spec import MediaTypeObject
+from src.openapi_spec import OneOfObject
+from src.openapi_spec import Operation
+from src.openapi_spec import ParameterIn
+from src.openapi_spec import ParameterObject
+from src.openapi_spec import PathItem
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import ResponseObject
+from src.openapi_spec import Responses
+from src.openapi_spec import SchemaObject
+
+from .components import attribute_schema
+from .fetch import Fetcher
+from .fetch import Page
+from .paths import canonicalize_path
+from .paths import handle_description
+from .paths import handle_version_history
+from .paths import parameter_object
+from .paths import parse_response_object
+from .paths import pop_security
+from .paths import status_response
+from .paths import streaming_events
+from .paths import streaming_responses
+from .utils import Inline
+from .utils import canonicalize
+from .utils import inline_text
+from .utils import merge_text
+from .utils import parse_version_history
+
+# the Hugo shortcode, e.g. {{<required>}}, {{%optional%}} and {{< relref "entities/Status" >}}
+SHORTCODE = re.compile(r"\{\{[<%]\s*(/?[\w-]+)\s*([^>%]*?)\s*[>%]\}\}")
+
+# the shortcodes of the parameter labels, as the label spans of the docs theme
+LABELS = ("required", "optional", "nullable", "deprecated", "removed")
+
+# the inline Markdown, the code span, the shortcode, the link (whose target may be the relref shortcode),
+# the strong and the emphasis, the first alternative which matches at the position wins
+INLINE = re.compile(
+    r"(?P<fence>`+)(?P<code>.+?)(?P=fence)"
+    r"|(?P<shortcode>\{\{[<%]\s*/?[\w-]+\s*[^>%]*?\s*[>%]\}\})"
+    r"|\[(?P<link>[^\]]*)\]\((?P<href>(?:\{\{[<%].*?[>%]\}\}|[^)\s])*)(?:\s+\"[^\"]*\")?\)"
+    r"|\*\*(?P<strong>.+?)\*\*"
+    r"|(?<![\w*])\*(?P<em>\S(?:.*?\S)?)\*(?![\w*])"
+    r"|(?<!\w)_(?P<underscore>\S(?:.*?\S)?)_(?!\w)"
+)
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)(?:\s*\{#([\w-]+)\})?\s*$")
+FENCE = re.compile(r"^(`{3,}|~{3,})\s*([\w+-]*)")
+TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$")
+
+
+@dataclass(frozen=True, slots=True)
+class Heading:
+    level: int
+    anchor: str
+    inlines: list[Inline]
+
+    @property
+    def text(self) -> str:
+        return inline_text(self.inlines)
+
+
+@dataclass(frozen=True, slots=True)
+class Code:
+    """The fenced code block, e.g. the ```http request line of the method"""
+
+    lang: str
+    text: str
+
+
+@dataclass(frozen=True, slots=True)
+class Paragraph:
+    """The paragraph, the soft line break is the newline text and the trailing backslash is the br"""
+
+    inlines: list[Inline]
+
+    @property
+    def text(self) -> str:
+        return inline_text(self.inlines)
+
+
+@dataclass(frozen=True, slots=True)
+class Definitions:
+    """The definition list, the (term, definitions) of the `: definition` lines, e.g. the parameters"""
+
+    items: list[tuple[list[Inline], list[list[Inline]]]]
+
+
+@dataclass(frozen=True, slots=True)
+class Table:
+    header: list[list[Inline]]
+    rows: list[list[list[Inline]]]
+
+
+@dataclass(frozen=True, slots=True)
+class BulletList:
+    items: list[list[Inline]]
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    pass
+
+
+Block = Heading | Code | Paragraph | Definitions | Table | BulletList | Rule
+
+
+def split_front_matter(text: str) -> tuple[dict, str]:
+    """the YAML front matter and the Markdown body of the page"""
+    if matched := re.match(r"^---\s*\n([\s\S]*?)\n---\s*\n", text):
+        return yaml.safe_load(matched.group(1)) or {}, text[matched.end() :]
+    return {}, text
+
+
+def relref(args: str) -> str:
+    """the link of the relref shortcode, e.g. "entities/Status#id" is /entities/Status/#id"""
+    path, _, anchor = args.strip("\"' ").partition("#")
+    path = re.sub(r"(?:/_index)?\.md$", "", path.strip("/"))
+    return f"/{path}/" + (f"#{anchor}" if anchor else "")
+
+
+def shortcode(matched: re.Match) -> Inline | None:
+    """the label or the link of the shortcode, the other shortcodes are not the content"""
+    name, args = matched.groups()
+    if name in LABELS:
+        return Inline("label", name)
+    if name in ("relref", "ref"):
+        return Inline("text", relref(args))
+    return None
+
+
+def inline_node(matched: re.Match) -> Inline | None:
+    match matched.lastgroup:
+        case "code":
+            return Inline("code", matched["code"].strip())
+        case "shortcode":
+            return shortcode(SHORTCODE.fullmatch(matched["shortcode"]))
+        case "href":
+            href = SHORTCODE.sub(lambda found: node.text if (node := shortcode(found)) else "", matched["href"])
+            return Inline("link", inline_text(parse_inlines(matched["link"])), href)
+        case "strong":
+            return Inline("strong", inline_text(parse_inlines(matched["strong"])))
+        case kind:
+            return Inline("em", inline_text(parse_inlines(matched[kind])))
+
+
+def parse_inlines(text: str) -> list[Inline]:
+    """the inline nodes of the Markdown text, the code span is kept verbatim"""
+    inlines, position = [], 0
+    for matched in INLINE.finditer(text):
+        inlines += [Inline("text", text[position : matched.start()]), inline_node(matched)]
+        position = matched.end()
+    inlines.append(Inline("text", text[position:]))
+    return merge_text(filter(None, inlines))
+
+
+def paragraph_inlines(lines: list[str]) -> list[Inline]:
+    """the inline nodes of the paragraph lines, the line ending with the backslash is the hard line break"""
+    inlines = []
+    for line in lines:
+        if line.endswith("\\"):
+            inlines += [*parse_inlines(line[:-1].rstrip()), Inline("br", "")]
+        else:
+            inlines += [*parse_inlines(line), Inline("text", "\n")]
+
+    inlines = merge_text(inlines)
+    if inlines and inlines[-1].kind == "text":
+        inlines[-1] = Inline("text", inlines[-1].text.rstrip())
+    return [node for node in inlines if node.kind != "text" or node.text]
+
+
+def slugify(text: str) -> str:
+    """the heading id as Hugo generates it, e.g. `200: OK` is 200-ok"""
+    return re.sub(r"[^\w\- ]", "", text.strip().lower()).replace(" ", "-")
+
+
+def parse_blocks(text: str) -> list[Block]:
+    """
+    Parse the Markdown of the docs into the blocks, in the subset the extraction reads: the headings
+    with the id, the fenced code, the definition lists, the tables, the lists and the paragraphs with
+    the hard line breaks.
+    """
+    lines = text.splitlines()
+    blocks: list[Block] = []
+    ids: dict[str, int] = {}
+    paragraph: list[str] = []
+
+    def flush():
+        if paragraph:
+            blocks.append(Paragraph(paragraph_inlines(paragraph)))
+            paragraph.clear()
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        stripped = line.strip()
+
+        if matched := FENCE.match(stripped):
+            flush()
+            fence, lang = matched.groups()
+            end = next(
+                (pos for pos in range(index + 1, len(lines)) if lines[pos].strip().startswith(fence)), len(lines)
+            )
+            blocks.append(Code(lang, "\n".join(lines[index + 1 : end])))
+            index = end + 1
+            continue
+
+        if not stripped:
+            flush()
+        elif matched := HEADING.match(stripped):
+            flush()
+            hashes, title, anchor = matched.groups()
+            inlines = parse_inlines(title)
+            anchor = anchor or slugify(inline_text(inlines))
+            if anchor in ids:
+                ids[anchor] += 1
+                anchor = f"{anchor}-{ids[anchor]}"
+            else:
+                ids[anchor] = 0
+            blocks.append(Heading(len(hashes), anchor, inlines))
+        elif re.fullmatch(r"(-{3,}|\*{3,})", stripped):
+            flush()
+            blocks.append(Rule())
+        elif SHORTCODE.fullmatch(stripped) or stripped.startswith(("<style", "</style")):
+            # the block shortcode (e.g. the hint) and the inline style are not the content
+            flush()
+            if stripped.startswith("<style") and "</style>" not in stripped:
+                while index + 1 < len(lines) and "</style>" not in lines[index]:
+                    index += 1
+        elif index + 1 < len(lines) and lines[index + 1].startswith(": ") and not paragraph:
+            # the definition list, the term followed by the `: definition` lines
+            items = []
+            while index + 1 < len(lines) and lines[index + 1].startswith(": "):
+                term = parse_inlines(lines[index].strip())
+                definitions = []
+                index += 1
+                while index < len(lines) and lines[index].startswith(": "):
+                    definitions.append(parse_inlines(lines[index][2:].strip()))
+                    index += 1
+                items.append((term, definitions))
+                while index < len(lines) and not lines[index].strip():
+                    index += 1
+            blocks.append(Definitions(items))
+            continue
+        elif stripped.startswith("|") and index + 1 < len(lines) and TABLE_SEPARATOR.match(lines[index + 1].strip()):
+            flush()
+            header = [parse_inlines(cell.strip()) for cell in stripped.strip("|").split("|")]
+            rows = []
+            index += 2
+            while index < len(lines) and lines[index].strip().startswith("|"):
+                rows.append([parse_inlines(cell.strip()) for cell in lines[index].strip().strip("|").split("|")])
+                index += 1
+            blocks.append(Table(header, rows))
+            continue
+        elif re.match(r"^[-*+]\s+", stripped) and not paragraph:
+            items = []
+            while index < len(lines) and re.match(r"^\s*[-*+]\s+", lines[index]):
+                items.append(parse_inlines(re.sub(r"^\s*[-*+]\s+", "", lines[index])))
+                index += 1
+            blocks.append(BulletList(items))
+            continue
+        else:
+            paragraph.append(stripped)
+
+        index += 1
+
+    flush()
+    return blocks
+
+
+def find_next[T](blocks: list[Block], start: int, kind: type[T], match=lambda _: True) -> tuple[int, T] | None:
+    """the first (position, block) of the kind from the start, as the find_next of the HTML page"""
+    for pos in range(start, len(blocks)):
+        if isinstance(blocks[pos], kind) and match(blocks[pos]):
+            return pos, blocks[pos]
+    return None
+
+
+def find_previous[T](blocks: list[Block], end: int, kind: type[T], match=lambda _: True) -> tuple[int, T] | None:
+    """the last (position, block) of the kind before the end, as the find_previous of the HTML page"""
+    for pos in range(end - 1, -1, -1):
+        if isinstance(blocks[pos], kind) and match(blocks[pos]):
+            return pos, blocks[pos]
+    return None
+
+
+def parse_path_item(tag: str, link: str, text: str) -> dict[str, PathItem]:
+    """
+    Parse the Markdown of the API method page per tag from its AST and return the OpenAPI PathItem
+    object, the same fields as the paths.parse_path_item reads from the docs site.
+    """
+    spec = {}
+    _, body = split_front_matter(text)
+    blocks = parse_blocks(body)
+    events = parse_streaming_events(blocks) if tag == "streaming" else None
+    level = 3 if tag == "filters" else 2
+
+    for index, block in enumerate(blocks):
+        if not isinstance(block, Code) or block.lang != "http":
+            continue
+
+        found = find_previous(blocks, index, Heading, lambda heading: heading.level == level)
+        matched = re.search(r"(\w+) (/\S+)(?: HTTP/1.1)?", block.text)
+        if not matched or not found:
+            logger.warning(f"no method found in {block.text=}")
+            continue
+
+        _, subject = found
+        method, endpoint = matched.groups()
+        endpoint = canonicalize_path(endpoint)
+
+        labels = {node.text for node in subject.inlines if node.kind == "label"}
+        removed, deprecated = "removed" in labels, "deprecated" in labels
+        logger.info(f"process {subject.text.strip()}: [{method}] {endpoint=} {removed=} {deprecated=}")
+        if removed:
+            continue
+
+        operation, response_object = handle_operation(blocks, index)
+        # add the method link to the operation description
+        operation.description += f"\n\n[{subject.text.strip()}]({link}#{subject.anchor})"
+        operation.tags = [tag]
+        operation.deprecated = True if deprecated else None
+
+        match tag:
+            case "streaming":
+                operation.responses = streaming_responses(events)
+            case _:
+                operation.responses = handle_response(blocks, index, response_object)
+
+        spec[endpoint] = spec[endpoint] if endpoint in spec else PathItem({})
+        spec[endpoint].root[method.lower()] = operation
+
+    return spec
+
+
+def parse_streaming_events(blocks: list[Block]) -> OneOfObject | None:
+    """the event schema of the event types table of the streaming page"""
+    for block in blocks:
+        if not isinstance(block, Table):
+            continue
+
+        headers = [inline_text(cell) for cell in block.header]
+        rows = [[(inline_text(cell), entity_link(cell)) for cell in row] for row in block.rows]
+        if events := streaming_events(headers, rows):
+            return events
+
+    logger.warning("no event types found in the streaming page")
+    return None
+
+
+def entity_link(inlines: list[Inline]) -> str | None:
+    """the name of the entity linked by the cell, e.g. the payload of the event"""
+    return next((node.text for node in inlines if node.kind == "link" and "/entities/" in (node.href or "")), None)
+
+
+def handle_operation(blocks: list[Block], index: int) -> tuple[Operation, ResponseObject | None]:
+    """the Operation of the method at the index, from the paragraphs up to the Returns one"""
+    summaries, returns = [], None
+    for position, block in enumerate(blocks[index + 1 :], index + 1):
+        if not isinstance(block, Paragraph):
+            continue
+        if block.text.startswith("Returns:"):
+            returns = position
+            break
+
+        logger.debug(f"handle summary {block.text=}")
+        summaries.append(block.text)
+
+    summary = summaries[0] if summaries else None
+    description = "\n".join(summaries) + handle_description(blocks[returns].text if returns else "")
+
+    parameters, response_object = [], None
+    if returns:
+        response_object = parse_response_object(blocks[returns].text)
+        parameters = [
+            param for param_type in ParameterIn for param in handle_parameter_by_type(blocks, returns, param_type)
+        ]
+    security = pop_security(parameters)
+
+    operation = Operation(summary=summary, description=description, parameters=parameters, security=security)
+    inlines = blocks[returns].inlines if returns else []
+    history = next((pos for pos, node in enumerate(inlines) if node == Inline("strong", "Version history:")), None)
+    if history is not None:
+        handle_version_history(operation, parse_version_history(inlines[history + 1 :]))
+    return operation, response_object
+
+
+def method_heading(blocks: list[Block], position: int, levels: tuple[int, ...]) -> int | None:
+    found = find_previous(blocks, position, Heading, lambda heading: heading.level in levels)
+    return found and found[0]
+
+
+def handle_parameter_by_type(blocks: list[Block], index: int, param_type: ParameterIn) -> list[ParameterObject]:
+    """
+    the parameters of the type in the method section of the Returns paragraph at the index, the h5 of
+    the type (e.g. Query parameters) before the next method heading, and its definition list.
+    """
+    heading = method_heading(blocks, index, (2, 3))
+    levels = (2,) if heading is None or blocks[heading].level == 2 else (2, 3)
+
+    found = find_next(blocks, index, Heading, lambda dom: dom.level == 5 and dom.anchor.startswith(param_type))
+    if not found or method_heading(blocks, found[0], levels) != heading:
+        logger.warning(f"no parameter found in {param_type=}")
+        return []
+
+    dom, _ = found
+    definitions = find_next(blocks, dom, Definitions)
+    if not definitions or method_heading(blocks, definitions[0], (5,)) != dom:
+        logger.warning(f"no parameter found in {param_type=}")
+        return []
+
+    parameters = []
+    for term, (desc, *_) in definitions[1].items:
+        name, text = inline_text(term), inline_text(desc)
+        logger.debug(f"handle parameter {name=} {param_type=} {text=}")
+        required = any(node.kind == "label" and node.text == "required" for node in desc)
+        parameters.append(parameter_object(name, param_type, text, required))
+
+    return parameters
+
+
+def handle_response(blocks: list[Block], index: int, response_object: ResponseObject | None) -> Responses:
+    """the responses of the status headings after the method, e.g. `##### 200: OK` and its paragraph"""
+    response = {}
+    for position, code in enumerate(blocks[index + 1 :], index + 1):
+        if not isinstance(code, Heading) or code.level not in (4, 5):
+            continue
+
+        logger.debug(f"handle response {code.text=}")
+        if not (matched := re.search(r"(\d+): \w+", code.text)):
+            logger.warning(f"no status code found in {code.text=}")
+            continue
+
+        status_code = int(matched.groups()[0])
+        description = found[1].text if (found := find_next(blocks, position, Paragraph)) else ""
+        response[status_code] = status_response(status_code, description, response_object)
+
+    return Responses(response)
+
+
+def parse_component(link: str, text: str) -> dict[str, ResponseObject | ReferenceObject]:
+    """
+    Parse the Markdown of the entity page from its AST and return the OpenAPI SchemaObject, the same
+    fields as the components.parse_component reads from the docs site.
+    """
+    spec = {}
+    front_matter, body = split_front_matter(text)
+    blocks = parse_blocks(body)
+
+    index = [pos for pos, block in enumerate(blocks) if isinstance(block, Heading) and block.level == 2]
+    sections = [(pos, index[idx + 1] if idx + 1 < len(index) else len(blocks)) for idx, pos in enumerate(index)]
+
+    for start, end in reversed(sections):
+        name = blocks[start].text
+        if not (name == "Attributes" or name.endswith("attributes")):
+            logger.debug(f"skip the handle component {name=}")
+            continue
+
+        logger.info(f"processing component {name=}")
+        schema_object = SchemaObject(type="object", properties={}, required=[])
+        for position in range(start + 1, end):
+            column = blocks[position]
+            if not isinstance(column, Heading):
+                continue
+            if not (code := next((node for node in column.inlines if node.kind == "code"), None)):
+                continue
+
+            attr_name = code.text
+            found = find_next(blocks, position, Paragraph)
+            schema_object.properties[attr_name] = attribute_schema(attr_name, found[1].inlines if found else [])
+            if not any(node.kind == "label" and node.text == "optional" for node in column.inlines):
+                schema_object.required.append(attr_name)
+
+        schema_object.required = schema_object.required or None
+
+        match name:
+            case "Attributes":
+                # the title and the description of the front matter lead the page of the docs site
+                found = find_next(blocks, 0, Paragraph)
+                name = str(front_matter.get("title", ""))
+                desc = str(front_matter.get("description") or (found[1].text if found else ""))
+            case _:
+                matched = re.search(r"^([\w:]+?) (?:entity )?attributes", name)
+                if not matched:
+                    raise ValueError(f"cannot find the entity name {name=}")
+
+                (name,) = matched.groups()
+                desc = ""
+
+        spec[canonicalize(name)] = ResponseObject(
+            description=desc,
+            content={"application/json": MediaTypeObject.model_validate({"schema": schema_object})},
+        )
+
+    return spec
+
+
+class MarkdownFetcher(Fetcher):
+    """
+    Fetch the documentation page from the local checkout of the docs repository, the Markdown of
+    /methods/accounts/ is content/en/methods/accounts.md, which is parsed from its AST instead of
+    the HTML of the docs site. The index page lists the method and the entity pages.
+    """
+
+    def __init__(self, root: str | Path, baseurl: str):
+        super().__init__(cache=False)
+        self.root = Path(root) / "content" / "en"
+        self.baseurl = baseurl.rstrip("/")
+
+    def get(self, link: str) -> Page:
+        key, _ = urldefrag(link)
+        if not key.startswith(self.baseurl):
+            raise ValueError(f"{link=} is not in the docs repository of {self.baseurl}")
+
+        self.requests += 1
+        if not (relative := key.removeprefix(self.baseurl).strip("/")):
+            return Page(link=key, text=self.index())
+
+        path = self.root / f"{relative}.md"
+        if not path.exists():
+            path = self.root / relative / "_index.md"
+        return Page(link=key, text=path.read_text(), markdown=True)
+
+    def index(self) -> str:
+        """the links of the method and the entity pages, named as the menu of the docs"""
+        links = []
+        for section in ("methods", "entities"):
+            for path in sorted((self.root / section).rglob("*.md")):
+                if path.name == "_index.md":
+                    continue
+
+                front_matter, _ = split_front_matter(path.read_text())
+                menu = (front_matter.get("menu") or {}).get("docs") or {}
+                name = menu.get("name") or front_matter.get("title") or path.stem
+                href = f"/{path.relative_to(self.root).with_suffix('').as_posix()}/"
+                links.append(f'<a href="{href}">{html.escape(str(name), quote=False)}</a>')
+
+        logger.info(f"list {len(links)} pages in the docs repository {self.root}")
+        return "\n".join(links)
@@ -5,8 +5,16 @@ from bs4 import BeautifulSoup
 from bs4 import Tag
 from loguru import logger
 
-from src.handler.utils import canonicalize
+from src.handler.typeexpr import compile_returns
+from src.handler.typeexpr import compile_type
+from src.handler.utils import VersionEntry
+from src.handler.utils import inlines_of
+from src.handler.utils import parse_version_history
+from src.handler.utils import release_soup
+from src.handler.utils import schema_ref
+from src.handler.utils import version_metadata
 from src.openapi_spec import BuildInType
+from src.openapi_spec import DiscriminatorObject
 from src.openapi_spec import MediaTypeObject
 from src.openapi_spec import OneOfObject
 from src.openapi_spec import Operation
@@ -20,6 +28,10 @@ from src.openapi_spec import Responses
 from src.openapi_spec import SchemaObject
 from src.openapi_spec import SecurityRequirementObject
 
+# the labels before the description of the parameter, and the type which leads the description
+PARAMETER_LABELS = re.compile(r"^\s*(?:(?:required|optional|nullable)\s+)*")
+PARAMETER_TYPE = re.compile(r"^(?:Array of \w+|String|Integer|Number|Float|Boolean)\b")
+
 
 def canonicalize_path(path: str) -> str:
     """replace /:id with /{:id}"""
@@ -32,16 +44,23 @@ def handle_paths(link: str, html: str) -> Paths:
     """
     spec = {}
 
-    soup = BeautifulSoup(html, "html.parser")
-    methods = soup.find_all("a", href=lambda href: href and href.startswith("/methods/"))
-    for method in methods:
-        method_link = f"{link}{method['href']}"
-        for path, path_item in handle_path_item(method.text, method_link).items():
+    for tag, method_link in method_links(link, html):
+        for path, path_item in handle_path_item(tag, method_link).items():
             spec[path] = path_item
 
     return Paths(spec)
 
 
+def method_links(link: str, html: str) -> list[tuple[str, str]]:
+    """list the (tag, link) of the API method pages from the documentation page"""
+    soup = BeautifulSoup(html, "html.parser")
+    methods = soup.find_all("a", href=lambda href: href and href.startswith("/methods/"))
+    links = [(method.text, f"{link}{method['href']}") for method in methods]
+
+    release_soup(soup)
+    return links
+
+
 def handle_path_item(tag: str, link: str) -> dict[str, PathItem]:
     """
     Handle the API method per tag and return the OpenAPI PathItem object.
@@ -51,91 +70,163 @@ def handle_path_item(tag: str, link: str) -> dict[str, PathItem]:
     response = requests.get(link)
     response.raise_for_status()
 
+    return parse_path_item(tag, link, response.text)
+
+
+def parse_path_item(tag: str, link: str, html: str) -> dict[str, PathItem]:
+    """
+    Parse the fetched API method page per tag and return the OpenAPI PathItem object.
+    """
     spec = {}
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
+
+    try:
+        content = soup.find("div", class_="e-content")
+        if not content:
+            logger.warning(f"no content found in {link=}")
+            return spec
+
+        methods = content.find_all("code", class_="language-http", attrs={"data-lang": "http"})
+        events = parse_streaming_events(content) if tag == "streaming" else None
+
+        for method_dom in methods:
+            subject = method_dom.find_previous("h3" if tag == "filters" else "h2", class_="heading")
+            matched = re.search(r"(\w+) (/\S+)(?: HTTP/1.1)?", method_dom.text)
+            if not matched:
+                logger.warning(f"no method found in {method_dom.text=}")
+                continue
+
+            method, endpoint = matched.groups()
+            endpoint = canonicalize_path(endpoint)
+
+            removed = subject.find("span", class_="api-method-parameter-removed", string="removed")
+            deprecated = subject.find("span", class_="api-method-parameter-deprecated", string="deprecated")
+            logger.info(f"process {subject.text.strip()}: [{method}] {endpoint=} {removed=} {deprecated=}")
+            if removed:
+                continue
+
+            operation, response_object = handle_operation(method_dom)
+            # add the method link to the operation description
+            operation.description += f"\n\n[{subject.text.strip()}]({link}#{subject['id']})"
+            operation.tags = [tag]
+            operation.deprecated = True if deprecated else None
+
+            match tag:
+                case "streaming":
+                    operation.responses = streaming_responses(events)
+                case _:
+                    operation.responses = handle_response(method_dom, response_object)
+
+            spec[endpoint] = spec[endpoint] if endpoint in spec else PathItem({})
+            spec[endpoint].root[method.lower()] = operation
+
+            # # extract the content of the method
+            # logger.info(f"removed #{index} ~ {len(content)} elements from the content")
+            # while len(content) > index + 1:
+            #     elm = content.contents[index + 1]
+            #     elm.extract()
 
-    content = soup.find("div", class_="e-content")
-    if not content:
-        logger.warning(f"no content found in {link=}")
         return spec
+    finally:
+        # release the parsed tree once the path items are built, also on the early return
+        release_soup(soup)
+
+
+def streaming_responses(events: OneOfObject | None) -> Responses:
+    """the event stream response of the streaming method, the parsed events or the generic Streaming"""
+    ref = ReferenceObject.model_validate(
+        {
+            "$ref": "#/components/schemas/Streaming",
+            "description": "The streaming response.",
+        }
+    )
+    streaming_response = ResponseObject(
+        description="The streaming response.",
+        content={
+            "text/event-stream": MediaTypeObject.model_validate(
+                {"schema": events.model_copy(deep=True) if events else ref},
+            ),
+        },
+    )
+    return Responses({200: streaming_response})
 
-    methods = content.find_all("code", class_="language-http", attrs={"data-lang": "http"})
 
-    for method_dom in methods:
-        subject = method_dom.find_previous("h3" if tag == "filters" else "h2", class_="heading")
-        matched = re.search(r"(\w+) (/\S+)(?: HTTP/1.1)?", method_dom.text)
-        if not matched:
-            logger.warning(f"no method found in {method_dom.text=}")
-            continue
+def parse_streaming_events(content: Tag) -> OneOfObject | None:
+    """
+    Parse the event types table of the streaming page into the event schema, which is discriminated
+    by the event name and maps each event to the schema of its payload.
 
-        method, endpoint = matched.groups()
-        endpoint = canonicalize_path(endpoint)
+    the event schemas are inline here and hoisted to the components by the StreamingEvents pass.
+    """
+    for table in content.find_all("table"):
+        headers = [th.text for th in table.find_all("th")]
+        rows = [[(cell.text, entity_link(cell)) for cell in row.find_all("td")] for row in table.find_all("tr")]
+        if events := streaming_events(headers, rows):
+            return events
+
+    logger.warning("no event types found in the streaming page")
+    return None
+
+
+def entity_link(cell: Tag) -> str | None:
+    """the name of the entity linked by the cell, e.g. the payload of the event"""
+    link = cell.find("a", href=lambda href: href and "/entities/" in href)
+    return link.text if link else None
+
+
+def streaming_events(headers: list[str], rows: list[list[tuple[str, str | None]]]) -> OneOfObject | None:
+    """
+    the event schema of the event types table, the cell is the (text, linked entity) and the table
+    is not the one of the event types when its first header is not the event.
+    """
+    headers = [header.strip().lower() for header in headers]
+    if not headers or headers[0] != "event":
+        return None
 
-        removed = subject.find("span", class_="api-method-parameter-removed", string="removed")
-        deprecated = subject.find("span", class_="api-method-parameter-deprecated", string="deprecated")
-        logger.info(f"process {subject.text.strip()}: [{method}] {endpoint=} {removed=} {deprecated=}")
-        if removed:
+    column = next((idx for idx, header in enumerate(headers) if "payload" in header), 2)
+    options, mapping = [], {}
+    for cells in rows:
+        if len(cells) <= column:
             continue
 
-        operation, response_object = handle_operation(method_dom)
-        # add the method link to the operation description
-        operation.description += f"\n\n[{subject.text.strip()}]({link}#{subject['id']})"
-        operation.tags = [tag]
-        operation.deprecated = True if deprecated else None
-
-        if endpoint == "/api/v1/instance/activity" and method == "GET":
-            response_object = ResponseObject(
-                description="Array of Hash",
-                content={
-                    "application/json": MediaTypeObject.model_validate(
-                        {
-                            "schema": SchemaObject(
-                                type="array",
-                                items=SchemaObject(
-                                    type="object",
-                                    properties={
-                                        "week": SchemaObject(type="string"),
-                                        "statuses": SchemaObject(type="string"),
-                                        "logins": SchemaObject(type="string"),
-                                        "registrations": SchemaObject(type="string"),
-                                    },
-                                ),
-                            )
-                        }
-                    ),
+        name = cells[0][0].strip().strip("`")
+        schema_name = "".join(part.capitalize() for part in re.split(r"[._]", name)) + "Event"
+        options.append(
+            SchemaObject(
+                type="object",
+                description=cells[1][0].strip(),
+                properties={
+                    "event": SchemaObject(type="string", description=f"The event name, always {name}"),
+                    "payload": parse_event_payload(*cells[column]),
                 },
             )
+        )
+        mapping[name] = f"#/components/schemas/{schema_name}"
 
-        match tag:
-            case "streaming":
-                ref = ReferenceObject.model_validate(
-                    {
-                        "$ref": "#/components/schemas/Streaming",
-                        "description": "The streaming response.",
-                    }
-                )
-                streaming_response = ResponseObject(
-                    description="The streaming response.",
-                    content={
-                        "text/event-stream": MediaTypeObject.model_validate(
-                            {"schema": ref},
-                        ),
-                    },
-                )
-                operation.responses = Responses({200: streaming_response})
-            case _:
-                operation.responses = handle_response(method_dom, response_object)
-
-        spec[endpoint] = spec[endpoint] if endpoint in spec else PathItem({})
-        spec[endpoint].root[method.lower()] = operation
-
-        # # extract the content of the method
-        # logger.info(f"removed #{index} ~ {len(content)} elements from the content")
-        # while len(content) > index + 1:
-        #     elm = content.contents[index + 1]
-        #     elm.extract()
-
-    return spec
+    if not options:
+        return None
+
+    logger.info(f"parse {len(options)} streaming events {list(mapping)}")
+    return OneOfObject(
+        oneOf=options,
+        discriminator=DiscriminatorObject(propertyName="event", mapping=mapping),
+    )
+
+
+def parse_event_payload(text: str, entity: str | None = None) -> SchemaObject | ReferenceObject:
+    """the schema of the event payload, by the linked entity or the description of the payload"""
+    text = text.strip()
+    if entity:
+        return schema_ref(entity)
+    if text.startswith("ID of"):
+        return SchemaObject(type="string", description=text)
+    if text.startswith("Hash"):
+        return ReferenceObject.model_validate({"$ref": "#/components/schemas/Hash"})
+    if text.lower() in ("undefined", "none"):
+        return SchemaObject(type="null", description=text)
+    if matched := re.fullmatch(r"([A-Z]\w+)(?: entity)?", text):
+        return schema_ref(matched.group(1))
+    return SchemaObject(type="null", description=text or None)
 
 
 def handle_operation(tag: Tag) -> tuple[Operation, ResponseObject | None]:
@@ -155,19 +246,53 @@ def handle_operation(tag: Tag) -> tuple[Operation, ResponseObject | None]:
     description = "\n".join(summaries) + handle_description(tag.text if tag else "")
 
     parameters, response_object = handle_parameters(tag)
-    security = None
-    if parameters:
-        for idx, param in enumerate(parameters):
-            if isinstance(param, ParameterObject) and param.name == "Authorization":
-                # remove the Authorization header from the parameters and add the security only
-                parameters.pop(idx)
-                security = [SecurityRequirementObject({"BearerAuth": []})]
-                break
+    security = pop_security(parameters)
 
     operation = Operation(summary=summary, description=description, parameters=parameters, security=security)
+    if tag and (strong := tag.find("strong", string="Version history:")):
+        handle_version_history(operation, parse_version_history(inlines_of(strong.next_siblings)))
     return operation, response_object
 
 
+def pop_security(parameters: list[ParameterObject | ReferenceObject]) -> list[SecurityRequirementObject] | None:
+    """remove the Authorization header from the parameters and return the security of it instead"""
+    for idx, param in enumerate(parameters):
+        if isinstance(param, ParameterObject) and param.name == "Authorization":
+            parameters.pop(idx)
+            security = [SecurityRequirementObject({"BearerAuth": []})]
+            if not param.required:
+                # the optional token, the empty requirement allows the anonymous request
+                security.insert(0, SecurityRequirementObject({}))
+            return security
+
+    return None
+
+
+def handle_version_history(operation: Operation, entries: list[VersionEntry]):
+    """
+    set the x-added-in/x-changed-in of the operation, and of the parameters named by the entries,
+    e.g. `2.3.0 - added <code>locked</code> parameter` adds the locked parameter in 2.3.0
+    """
+    operation.added_in, operation.changed_in = version_metadata(entries)
+
+    parameters = {param.name: param for param in operation.parameters or [] if isinstance(param, ParameterObject)}
+    for entry in entries:
+        for code in entry.codes:
+            # the grouped names, e.g. source[privacy,sensitive] is source[privacy] and source[sensitive]
+            if matched := re.fullmatch(r"(\w+)\[([\w,]+)\]", code):
+                names = [f"{matched.group(1)}[{name}]" for name in matched.group(2).split(",")]
+            else:
+                names = [code]
+
+            for name in names:
+                if not (param := parameters.get(name) or parameters.get(f"{name}[]")):
+                    continue
+                if entry.added:
+                    param.added_in = param.added_in or entry.version
+                elif entry.version not in (param.changed_in or []):
+                    param.changed_in = [*(param.changed_in or []), entry.version]
+
+
 def handle_parameters(tag: Tag) -> tuple[list[ParameterObject | ReferenceObject], ResponseObject | None]:
     """
     Handle the parameters of the API method, based on the ParameterIn enum.
@@ -177,21 +302,47 @@ def handle_parameters(tag: Tag) -> tuple[list[ParameterObject | ReferenceObject]
     if not tag:
         return [], None
 
-    response_object = parse_response_object(tag)
+    response_object = parse_response_object(tag.text)
 
     parameters = [param for param_type in ParameterIn for param in handle_parameter_by_type(tag, param_type)]
     return (parameters or []), response_object
 
 
+def parameter_schema(text: str) -> SchemaObject:
+    """
+    the schema of the parameter by the type leading its description, e.g. `required Array of String. The IDs`,
+    the type which is not the built-in one is the plain string.
+    """
+    text = PARAMETER_LABELS.sub("", text)
+    expr = compile_type(matched[0]) if (matched := PARAMETER_TYPE.match(text)) else None
+    if not expr or expr.type not in BuildInType:
+        return SchemaObject(type="string")
+
+    items = expr.items and SchemaObject(type=expr.items.type if expr.items.type in BuildInType else "string")
+    return SchemaObject(type=expr.type, items=items)
+
+
+def in_method_section(tag: Tag, dom: Tag) -> bool:
+    """
+    whether the dom is in the section of the method the tag belongs to, the section ends at the next
+    heading of the method level, e.g. the h2 of the method, or the h2/h3 on the filters page, while the
+    h3 (like Request) nested in the method does not end it.
+    """
+    heading = tag.find_previous(["h2", "h3"], class_="heading")
+    levels = ["h2"] if heading is None or heading.name == "h2" else ["h2", "h3"]
+    return dom.find_previous(levels, class_="heading") is heading
+
+
 def handle_parameter_by_type(tag: Tag, param_type: ParameterIn) -> list[ParameterObject | ReferenceObject]:
     parameters = []
     logger.debug(f"try to handle parameter by {param_type=}")
-    if not (dom := tag.find_next("h5", {"id": lambda x: x and x.startswith(param_type)})):
+    dom = tag.find_next("h5", {"id": lambda x: x and x.startswith(param_type)})
+    if not dom or not in_method_section(tag, dom):
         logger.warning(f"no parameter found in {param_type=}")
         return parameters
 
     logger.debug(f"handle parameter by type {param_type=} {dom.text=}")
-    if not (param_based_dom := dom.find_next("dl")):
+    if not (param_based_dom := dom.find_next("dl")) or param_based_dom.find_previous("h5") is not dom:
         logger.warning(f"no parameter found in {param_type=}")
         return parameters
 
@@ -200,31 +351,31 @@ def handle_parameter_by_type(tag: Tag, param_type: ParameterIn) -> list[Paramete
         desc = param_dom.find_next("dd")
 
         logger.debug(f"handle parameter {name=} {param_type=} {desc.text=}")
-        required = desc.find("span", class_="api-method-parameter-required")
-
-        match param_type:
-            case ParameterIn.header:
-                vtype = "string"
-            case _:
-                vtype = desc.find("strong")
-                vtype = canonicalize(vtype.text if vtype else "string")
-                vtype = vtype if vtype in BuildInType else "string"
-
-        param = ParameterObject.model_validate(
-            {
-                "name": name,
-                "in": param_type.value,
-                "description": desc.text if desc else None,
-                "schema": SchemaObject(type=vtype),
-                "required": True if required else None,
-            }
-        )
-
-        parameters.append(param)
+        # the optional and the nullable labels share the class of the required one
+        required = desc.find("span", class_="api-method-parameter-required", string="required")
+        parameters.append(parameter_object(name, param_type, desc.text, bool(required)))
 
     return parameters
 
 
+def parameter_object(name: str, param_type: ParameterIn, description: str, required: bool) -> ParameterObject:
+    match param_type:
+        case ParameterIn.header:
+            schema = SchemaObject(type="string")
+        case _:
+            schema = parameter_schema(description)
+
+    return ParameterObject.model_validate(
+        {
+            "name": name,
+            "in": param_type.value,
+            "description": description,
+            "schema": schema,
+            "required": True if required else None,
+        }
+    )
+
+
 def handle_description(text: str) -> str:
     """
     Handle the description of the API method.
@@ -256,95 +407,39 @@ def handle_response(tag: Tag, response_object: ResponseObject | None) -> Respons
 
         status_code = int(matched.groups()[0])
         description = code.find_next("p").text if code.find_next("p") else ""
-
-        if status_code == 200 and response_object:
-            response[status_code] = response_object
-        else:
-            ref = ReferenceObject.model_validate(
-                {
-                    "$ref": "#/components/schemas/Error",
-                    "description": description,
-                }
-            )
-            err_response_object = ResponseObject(
-                description=description,
-                content={"application/json": MediaTypeObject.model_validate({"schema": ref})},
-            )
-            response[status_code] = err_response_object
+        response[status_code] = status_response(status_code, description, response_object)
 
     return Responses(response)
 
 
-def parse_response_object(tag: Tag) -> ResponseObject | None:
-    """parse and return the API response object."""
-    matched = re.search(r"^Returns:([\s\S]+?)OAuth", tag.text)
+def status_response(status_code: int, description: str, response_object: ResponseObject | None) -> ResponseObject:
+    """the response of the status code, the 200 one is the Returns object and the others are the Error"""
+    if status_code == 200 and response_object:
+        return response_object
+
+    ref = ReferenceObject.model_validate(
+        {
+            "$ref": "#/components/schemas/Error",
+            "description": description,
+        }
+    )
+    return ResponseObject(
+        description=description,
+        content={"application/json": MediaTypeObject.model_validate({"schema": ref})},
+    )
+
+
+def parse_response_object(text: str) -> ResponseObject | None:
+    """parse and return the API response object from the Returns text of the method."""
+    matched = re.search(r"^Returns:([\s\S]+?)OAuth", text)
     if not matched:
-        logger.warning(f"no response object found {tag.text=}")
+        logger.warning(f"no response object found {text=}")
         return None
 
     (rvalue,) = matched.groups()
     rvalue = rvalue.strip()
-    schema_object = parse_schema_object(rvalue)
+    schema_object = compile_returns(rvalue).schema()
     return ResponseObject(
         description=rvalue,
         content={"application/json": MediaTypeObject.model_validate({"schema": schema_object})},
     )
-
-
-def parse_schema_object(text: str) -> SchemaObject:
-    text = text.strip()
-
-    logger.debug(f"try to parse SchemaObject: {text=}")
-    if matched := re.match(r"(?:Array|List) of ([\w:]+)", text):
-        (value,) = matched.groups()
-
-        schema_object = SchemaObject(
-            type="array",
-            description=text,
-            items=parse_schema_object(value),
-        )
-    elif "String (URL) or HTML response" == text:
-        schema_object = SchemaObject(type="string", description=text)
-    elif "Preferences by key and value" == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/JSON"})
-    elif "the user\u2019s own Account with source attribute" == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/Account"})
-    elif "MediaAttachment, but without a URL" == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/MediaAttachment"})
-    elif "Hash of timeline key and associated Marker" == text:
-        schema_object = SchemaObject(
-            description=text,
-            type="object",
-        )
-    elif "Hash with a single key of count" == text:
-        schema_object = SchemaObject(
-            description=text,
-            type="object",
-            properties={"count": SchemaObject(type="integer")},
-        )
-    elif "JSON as per the above description" == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/JSON"})
-    elif "OEmbed metadata" == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/JSON"})
-    elif "Object with source language codes as keys and arrays of target language codes as values." == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/JSON"})
-    elif "Search, but hashtags is an array of strings instead of an array of Tag." == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/Search"})
-    elif "Status. When scheduled_at is present, ScheduledStatus is returned instead." == text:
-        schema_object = OneOfObject(
-            oneOf=[
-                ReferenceObject.model_validate({"$ref": "#/components/schemas/Status"}),
-                ReferenceObject.model_validate({"$ref": "#/components/schemas/ScheduledStatus"}),
-            ]
-        )
-    elif "Status with source text and poll or media_attachments" == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/Status"})
-    elif "Health status" == text:
-        schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/Hash"})
-    elif text.lower() in BuildInType:
-        schema_object = SchemaObject(type=canonicalize(text.lower()))
-    else:
-        schema_object = ReferenceObject.model_validate({"$ref": f"#/components/schemas/{canonicalize(text)}"})
-
-    logger.info(f"parse {text=} as {schema_object}")
-    return schema_object
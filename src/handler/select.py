@@ -0,0 +1,55 @@
+from loguru import logger
+
+from src.openapi_spec import OpenAPI
+from src.openapi_spec.graph import iter_refs
+
+from .utils import canonicalize
+
+
+def ref_names(obj) -> set[str]:
+    """the names of the components referenced by the model"""
+    return {ref.rsplit("/", 1)[-1] for ref in iter_refs(obj) if ref.startswith("#/components/")}
+
+
+def resolve_entity(name: str, entities: dict[str, str]) -> str | None:
+    """
+    Find the entity page which defines the component, by the name of the entity link or the longest
+    entity name it ends with (e.g. CredentialAccount and MutedAccount are defined in the Account page)
+    """
+    if name in entities:
+        return entities[name]
+
+    candidates = [entity for entity in entities if name.endswith(entity)]
+    return entities[max(candidates, key=len)] if candidates else None
+
+
+def entity_index(links: list[tuple[str, str]]) -> dict[str, str]:
+    """the mapping of the canonical entity name to the link of the entity page"""
+    index = {}
+    for name, link in links:
+        index.setdefault(canonicalize(name), link)
+    return index
+
+
+def prune_components(spec: OpenAPI, roots: set[str]) -> OpenAPI:
+    """keep only the components reachable from the paths and the root components by following the $ref"""
+    if not spec.components:
+        return spec
+
+    schemas = spec.components.schemas or {}
+    responses = spec.components.responses
+
+    reachable = set()
+    queue = ref_names(spec.paths) | roots
+    while queue:
+        name = queue.pop()
+        if name in reachable:
+            continue
+
+        reachable.add(name)
+        queue |= ref_names(schemas.get(name)) | ref_names(responses.get(name))
+
+    logger.info(f"keep {len(reachable & schemas.keys())} of {len(schemas)} schemas reachable from the paths")
+    spec.components.schemas = {name: schema for name, schema in schemas.items() if name in reachable}
+    spec.components.responses = {name: response for name, response in responses.items() if name in reachable}
+    return spec
@@ -0,0 +1,106 @@
+from collections.abc import Iterator
+from typing import TextIO
+
+import yaml
+from loguru import logger
+
+from src.openapi_spec import Component
+from src.openapi_spec import Info
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import PathItem
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import ResponseObject
+
+from .components import default_components
+from .components import default_security_scheme
+from .components import entity_links
+from .fetch import Fetcher
+from .fetch import Page
+from .generator import default_info
+from .generator import page_component
+from .generator import page_path_items
+from .paths import method_links
+from .transform import Transformer
+from .transform import default_passes
+from .transform import log_profile
+
+
+def iter_method_pages(link: str, html: str, fetcher: Fetcher) -> Iterator[tuple[str, str, Page]]:
+    """fetch the API method pages one by one"""
+    for tag, method_link in method_links(link, html):
+        logger.info(f"handle API method {tag=} link={method_link}")
+        yield tag, method_link, fetcher.get(method_link)
+
+
+def iter_paths(link: str, html: str, fetcher: Fetcher) -> Iterator[tuple[str, PathItem]]:
+    """parse the API method pages into the (path, PathItem) fragments"""
+    for tag, method_link, page in iter_method_pages(link, html, fetcher):
+        yield from page_path_items(tag, method_link, page).items()
+
+
+def iter_components(link: str, html: str, fetcher: Fetcher) -> Iterator[tuple[str, ResponseObject | ReferenceObject]]:
+    """parse the entity pages into the (name, ResponseObject) fragments"""
+    for _, entity_link in entity_links(link, html):
+        logger.info(f"handle entity link={entity_link}")
+        yield from page_component(entity_link, fetcher.get(entity_link)).items()
+
+
+class SpecWriter:
+    """
+    Write the OpenAPI spec as the same YAML as to_openapi_spec_text, without holding the whole model.
+
+    each PathItem is dumped into the YAML text once received and the model is dropped, the texts
+    are written in the sorted order of the path at the end.
+    """
+
+    def __init__(self):
+        self.paths: dict[str, str] = {}
+
+    def add_path(self, path: str, path_item: PathItem):
+        spec_dict = {"paths": {path: path_item.model_dump(exclude_none=True, by_alias=True)}}
+        text = yaml.dump(spec_dict, default_flow_style=False, sort_keys=True)
+        # drop the leading `paths:` line, the rest is indented as the part of the whole document
+        self.paths[path] = text.split("\n", 1)[1]
+
+    def write(self, file: TextIO, info: Info, components: Component):
+        spec = OpenAPI(info=info, components=components)
+        spec_dict = spec.model_dump(exclude_none=True, by_alias=True, exclude={"paths"})
+        file.write(yaml.dump(spec_dict, default_flow_style=False, sort_keys=True))
+        del spec_dict
+
+        if not self.paths:
+            file.write("paths: {}\n")
+            return
+
+        file.write("paths:\n")
+        for path in sorted(self.paths):
+            file.write(self.paths.pop(path))
+
+
+def stream_spec(link: str, file: TextIO, fetcher: Fetcher | None = None):
+    """
+    Generate the OpenAPI spec as the pipeline of fetch -> parse -> fragment -> writer, and keep
+    only one page and its parsed tree in memory at a time.
+    """
+    logger.info(f"starting to stream OpenAPI spec from {link=}")
+
+    fetcher = fetcher or Fetcher(cache=False)
+    index = fetcher.get(link).text
+
+    # the components go first, so the passes see the final components while visiting the paths
+    responses = default_components()
+    responses.update(iter_components(link, index, fetcher))
+    components = Component(responses=responses, securitySchemes=default_security_scheme())
+
+    transformer = Transformer(default_passes())
+    transformer.visit_component(components)
+
+    writer = SpecWriter()
+    for path, path_item in iter_paths(link, index, fetcher):
+        transformer.visit_path_item(path, path_item)
+        writer.add_path(path, path_item)
+
+    transformer.end()
+    log_profile(transformer)
+
+    writer.write(file, default_info(), components)
@@ -0,0 +1,76 @@
+import gzip
+import json
+
+import pytest
+
+from src.handler.artifacts import strip_descriptions
+from src.handler.artifacts import write_artifacts
+from src.openapi_spec import Component
+from src.openapi_spec import Info
+from src.openapi_spec import MediaTypeObject
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import ResponseObject
+from src.openapi_spec import SchemaObject
+
+
+def sample_spec() -> OpenAPI:
+    schema = SchemaObject(
+        type="object",
+        description="Represents a file or media attachment.",
+        properties={"description": SchemaObject(type="string", description="Alternate text.")},
+    )
+    response = ResponseObject(
+        description="Represents a file or media attachment.",
+        content={"application/json": MediaTypeObject.model_validate({"schema": schema})},
+    )
+    return OpenAPI(
+        info=Info(title="Mastodon", version="0.1.0", description="The Mastodon spec"),
+        components=Component(responses={"MediaAttachment": response}),
+    )
+
+
+class TestArtifacts:
+    def test_strip_descriptions(self):
+        spec = strip_descriptions(sample_spec().model_dump(exclude_none=True, by_alias=True))
+
+        assert "description" not in spec["info"]
+
+        response = spec["components"]["responses"]["MediaAttachment"]
+        assert response["description"] == ""
+
+        schema = response["content"]["application/json"]["schema"]
+        assert "description" not in schema
+        assert schema["properties"]["description"] == {"type": "string"}
+
+    def test_write_artifacts(self, tmp_path):
+        output = tmp_path / "mastodon-openapi.yaml"
+        manifest = write_artifacts(sample_spec(), str(output))
+
+        minified = tmp_path / "mastodon-openapi.min.json"
+        data = minified.read_bytes()
+        assert b"\n" not in data and b": " not in data
+        assert json.loads(data)["info"]["title"] == "Mastodon"
+        assert gzip.decompress((tmp_path / "mastodon-openapi.min.json.gz").read_bytes()) == data
+
+        assert manifest["file"] == minified.name
+        assert manifest["encodings"]["identity"]["size"] == len(data)
+        assert manifest == json.loads((tmp_path / "mastodon-openapi.manifest.json").read_text())
+
+        # the same spec always produces the same bytes and hash
+        assert write_artifacts(sample_spec(), str(output))["hash"] == manifest["hash"]
+
+    def test_write_artifacts_brotli(self, tmp_path):
+        brotli = pytest.importorskip("brotli")
+        manifest = write_artifacts(sample_spec(), str(tmp_path / "mastodon-openapi.yaml"))
+
+        data = (tmp_path / "mastodon-openapi.min.json").read_bytes()
+        compressed = (tmp_path / "mastodon-openapi.min.json.br").read_bytes()
+        assert brotli.decompress(compressed) == data
+        assert manifest["encodings"]["br"] == {"file": "mastodon-openapi.min.json.br", "size": len(compressed)}
+
+    def test_write_artifacts_without_brotli(self, tmp_path, mocker):
+        mocker.patch("src.handler.artifacts.brotli", None)
+        manifest = write_artifacts(sample_spec(), str(tmp_path / "mastodon-openapi.yaml"))
+
+        assert "br" not in manifest["encodings"]
+        assert not (tmp_path / "mastodon-openapi.min.json.br").exists()
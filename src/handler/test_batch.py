@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from src.handler.batch import Version
+from src.handler.batch import batch
+from src.handler.generator import FragmentCache
+
+
+def make_bundle(root: Path, apps: list[str], components: list[str]) -> Path:
+    """make the snapshot bundle, the local mirror of the documentation site, from the test HTML"""
+    index = [f'<a href="/methods/{app}/">{app}</a>' for app in apps]
+    index += [f'<a href="/entities/{component}/">{component}</a>' for component in components]
+
+    root.mkdir()
+    (root / "index.html").write_text("\n".join(index))
+    for app in apps:
+        (root / "methods" / app).mkdir(parents=True)
+        (root / "methods" / app / "index.html").write_text(Path(f"src/tests/html/api_{app}.html").read_text())
+    for component in components:
+        html = Path(f"src/tests/html/component_{component.lower()}.html").read_text()
+        (root / "entities" / component).mkdir(parents=True)
+        (root / "entities" / component / "index.html").write_text(html)
+
+    return root
+
+
+class TestBatch:
+    def test_version(self):
+        assert Version.parse("v4.3=https://docs.joinmastodon.org") == Version("v4.3", "https://docs.joinmastodon.org")
+        assert Version.parse("https://docs.joinmastodon.org/").label == "docs.joinmastodon.org"
+        assert Version.parse("/tmp/bundles/v4.2").label == "v4.2"
+        assert Version.parse("/tmp/bundles/v4.2").is_bundle
+
+    def test_batch(self, tmp_path):
+        v1 = make_bundle(tmp_path / "v1", ["apps", "bookmarks"], ["Account"])
+        v2 = make_bundle(tmp_path / "v2", ["apps", "bookmarks", "filters"], ["Account"])
+
+        cache = FragmentCache()
+        specs = batch([Version.parse(f"v1={v1}"), Version.parse(f"v2={v2}")], str(tmp_path / "output"), cache=cache)
+
+        # the identical pages of v2 reuse the parsed fragments of v1
+        assert (cache.misses, cache.hits) == (4, 3)
+
+        assert list(specs) == ["v1", "v2"]
+        assert (tmp_path / "output" / "mastodon-openapi-v1.yaml").exists()
+        assert (tmp_path / "output" / "mastodon-openapi-v2.yaml").exists()
+
+        assert "/api/v2/filters" not in specs["v1"].paths.root
+        assert "/api/v2/filters" in specs["v2"].paths.root
+        assert specs["v1"].paths.root["/api/v1/apps"] == specs["v2"].paths.root["/api/v1/apps"]
+
+        changes = (tmp_path / "output" / "CHANGES.md").read_text()
+        assert "## v1 -> v2" in changes
+        assert "- `GET /api/v2/filters`" in changes
+        assert "/api/v1/apps" not in changes
@@ -76,3 +76,35 @@ class TestHandleComponent:
         assert fields.type == "array"
         assert isinstance(fields.items, ReferenceObject)
         assert fields.items.ref == "#/components/schemas/Field"
+
+    @responses.activate
+    def test_handle_parameter_format(self, load_component_html_fn, component="account"):
+        link = f"https://docs.joinmastodon.org/entities/{component}/"
+        load_component_html_fn(component)
+
+        resp = handle_component(link)
+
+        account = resp["Account"].content["application/json"].schema_object
+        assert account.properties["id"].format == "int64"
+        assert account.properties["created_at"].format == "date-time"
+        assert account.properties["last_status_at"].format == "date"
+        assert account.properties["url"].format == "uri"
+        assert account.properties["username"].format is None
+        assert "id" in account.required
+        assert "noindex" not in account.required
+
+        credential = resp["CredentialAccount"].content["application/json"].schema_object
+        assert credential.properties["source[privacy]"].enum == ["public", "unlisted", "private", "direct"]
+        assert credential.properties["source[note]"].enum is None
+
+    @responses.activate
+    def test_handle_parameter_version(self, load_component_html_fn, component="account"):
+        link = f"https://docs.joinmastodon.org/entities/{component}/"
+        load_component_html_fn(component)
+
+        resp = handle_component(link)
+
+        account = resp["Account"].content["application/json"].schema_object
+        assert account.properties["id"].added_in == "0.1.0"
+        assert account.properties["uri"].added_in == "4.2.0"
+        assert account.properties["moved"].added_in == "2.1.0"
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+from src.handler import markdown
+from src.handler.batch import Version
+from src.handler.components import parse_component
+from src.handler.generator import Generator
+from src.handler.markdown import Code
+from src.handler.markdown import Definitions
+from src.handler.markdown import Heading
+from src.handler.markdown import MarkdownFetcher
+from src.handler.markdown import Paragraph
+from src.handler.markdown import parse_blocks
+from src.handler.paths import parse_path_item
+from src.handler.utils import Inline
+
+BASEURL = "https://docs.joinmastodon.org"
+DOCS_REPO = Path("src/tests/markdown")
+
+
+class TestMarkdown:
+    def test_parse_blocks(self):
+        blocks = parse_blocks(
+            "## Create an app {#create}\n\n"
+            "```http\nPOST /api/v1/apps HTTP/1.1\n```\n\n"
+            '**Returns:** [Application]({{< relref "entities/Application" >}})\\\n**OAuth:** Public\n\n'
+            "client_name\n: {{<required>}} String. The `client_name`.\n\n"
+            "##### 200: OK\n"
+        )
+
+        assert blocks == [
+            Heading(2, "create", [Inline("text", "Create an app")]),
+            Code("http", "POST /api/v1/apps HTTP/1.1"),
+            Paragraph(
+                [
+                    Inline("strong", "Returns:"),
+                    Inline("text", " "),
+                    Inline("link", "Application", "/entities/Application/"),
+                    Inline("br", ""),
+                    Inline("strong", "OAuth:"),
+                    Inline("text", " Public"),
+                ]
+            ),
+            Definitions(
+                [
+                    (
+                        [Inline("text", "client_name")],
+                        [
+                            [
+                                Inline("label", "required"),
+                                Inline("text", " String. The "),
+                                Inline("code", "client_name"),
+                                Inline("text", "."),
+                            ]
+                        ],
+                    )
+                ]
+            ),
+            Heading(5, "200-ok", [Inline("text", "200: OK")]),
+        ]
+
+    def test_parity_path_item(self):
+        link = f"{BASEURL}/methods/bookmarks/"
+        html = Path("src/tests/html/api_bookmarks.html").read_text()
+        source = (DOCS_REPO / "content/en/methods/bookmarks.md").read_text()
+
+        assert markdown.parse_path_item("bookmarks", link, source) == parse_path_item("bookmarks", link, html)
+
+    def test_parity_component(self):
+        link = f"{BASEURL}/entities/Account/"
+        html = Path("src/tests/html/component_account.html").read_text()
+        source = (DOCS_REPO / "content/en/entities/Account.md").read_text()
+
+        assert markdown.parse_component(link, source) == parse_component(link, html)
+
+    def test_generate(self, mocker):
+        fetcher = MarkdownFetcher(DOCS_REPO, BASEURL)
+        html_parsers = [
+            mocker.patch("src.handler.generator.parse_path_item"),
+            mocker.patch("src.handler.generator.parse_component"),
+        ]
+
+        spec = Generator(BASEURL, fetcher).generate()
+
+        # the Markdown pages are read from their AST, not rendered into the HTML of the docs site
+        assert not any(parser.called for parser in html_parsers)
+        assert fetcher.requests == 3
+        assert "/api/v1/bookmarks" in spec.paths.root
+        assert spec.paths.root["/api/v1/bookmarks"].root["get"].tags == ["bookmarks"]
+        assert {"Account", "Field", "CredentialAccount"} <= spec.components.schemas.keys()
+
+    def test_version(self):
+        assert Version.parse(f"v4.3={DOCS_REPO}").is_docs_repo
+        assert not Version.parse("v4.3=https://docs.joinmastodon.org").is_docs_repo
@@ -2,10 +2,43 @@ import pytest
 import responses
 
 from src.handler.paths import handle_path_item
+from src.handler.paths import parse_path_item
+from src.handler.transform import DanglingRefs
+from src.handler.transform import Pagination
+from src.handler.transform import StreamingEvents
+from src.handler.transform import Transformer
+from src.handler.utils import VersionEntry
+from src.handler.utils import version_metadata
+from src.openapi_spec import Component
+from src.openapi_spec import Info
+from src.openapi_spec import OneOfObject
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import Paths
 from src.openapi_spec import ReferenceObject
 from src.openapi_spec import ResponseObject
 from src.openapi_spec import SchemaObject
 
+STREAMING = """
+<div class=e-content>
+<h2 class=heading id=user><span class=heading__text>Watch your home timeline and notifications</span></h2>
+<pre><code class=language-http data-lang=http>GET /api/v1/streaming/user HTTP/1.1</code></pre>
+<p>Returns updates about your home timeline and notifications.</p>
+<p><strong>Returns:</strong> Stream of Event<br><strong>OAuth:</strong> User token<br>
+<strong>Version history:</strong><br>1.0.0 - added</p>
+<h2 class=heading id=events><span class=heading__text>Event types</span></h2>
+<table>
+<thead><tr><th>Event</th><th>Description</th><th>What's in the payload</th></tr></thead>
+<tbody>
+<tr><td><code>update</code></td><td>A new Status has appeared.</td><td><a href=/entities/Status/>Status</a></td></tr>
+<tr><td><code>delete</code></td><td>A status has been deleted.</td><td>ID of the deleted Status</td></tr>
+<tr><td><code>status.update</code></td><td>A Status has been edited.</td><td>Status</td></tr>
+<tr><td><code>filters_changed</code></td><td>Keyword filters have been changed.</td><td>undefined</td></tr>
+<tr><td><code>notifications_merged</code></td><td>Notification requests were merged.</td><td>Undefined</td></tr>
+</tbody>
+</table>
+</div>
+"""
+
 
 class TestHandlePaths:
     @responses.activate
@@ -35,6 +68,45 @@ class TestHandlePaths:
         operation = resp["/api/v2/instance"].root["get"]
         assert operation.deprecated is None
 
+    @responses.activate
+    def test_handle_version_history(self, load_api_html_fn):
+        link = "https://docs.joinmastodon.org/methods/accounts/"
+        load_api_html_fn("accounts")
+
+        resp = handle_path_item("accounts", link)
+
+        operation = resp["/api/v1/accounts/{:id}/statuses"].root["get"]
+        assert operation.added_in == "0.0.0"
+        assert operation.changed_in == ["1.4.2", "1.6.0", "2.6.0", "2.7.0", "2.8.0", "3.3.0"]
+
+        parameters = {param.name: param for param in operation.parameters}
+        assert parameters["tagged"].added_in == "2.8.0"
+        assert parameters["min_id"].added_in == "2.6.0"
+        assert parameters["min_id"].changed_in == ["3.3.0"]
+        assert parameters["limit"].added_in is None
+
+    def test_version_metadata(self):
+        entries = [VersionEntry("3.1.0", "now returns date only", []), VersionEntry("3.5.0", "added limit", ["limit"])]
+        # the history of the change notes only does not tell when it is added
+        assert version_metadata(entries) == (None, ["3.1.0", "3.5.0"])
+
+        entries.insert(0, VersionEntry("2.0.0", "added", []))
+        assert version_metadata(entries) == ("2.0.0", ["3.1.0", "3.5.0"])
+
+    @responses.activate
+    def test_handle_security(self, load_api_html_fn):
+        link = "https://docs.joinmastodon.org/methods/accounts/"
+        load_api_html_fn("accounts")
+
+        resp = handle_path_item("accounts", link)
+
+        security = resp["/api/v1/accounts/verify_credentials"].root["get"].security
+        assert [requirement.root for requirement in security] == [{"BearerAuth": []}]
+        # the optional Authorization header, the anonymous request is allowed too
+        security = resp["/api/v1/accounts/{:id}"].root["get"].security
+        assert [requirement.root for requirement in security] == [{}, {"BearerAuth": []}]
+        assert resp["/api/v1/accounts/lookup"].root["get"].security is None
+
     @responses.activate
     def test_handle_response(self, load_api_html_fn):
         link = "https://docs.joinmastodon.org/methods/instance/"
@@ -69,6 +141,35 @@ class TestHandlePaths:
         operation = resp["/api/v1/accounts/{:id}/unmute"].root["post"]
         assert operation.parameters is not None
 
+    @responses.activate
+    def test_handle_parameter_in_method_section(self, load_api_html_fn):
+        load_api_html_fn("accounts")
+        resp = handle_path_item("accounts", "https://docs.joinmastodon.org/methods/accounts/")
+
+        def names(path: str, method: str = "get") -> list[str]:
+            return [param.name for param in resp[path].root[method].parameters]
+
+        # the methods without the query parameters do not take them from the next method
+        assert names("/api/v1/accounts/{:id}/featured_tags") == [":id"]
+        assert names("/api/v1/accounts/{:id}/lists") == [":id"]
+        assert names("/api/v1/accounts/{:id}/follow", "post") == [":id"]
+        assert names("/api/v1/accounts/{:id}/followers") == ["max_id", "since_id", "min_id", "limit", ":id"]
+
+        spec = OpenAPI(info=Info(title="Mastodon", version="0.1.0"), paths=Paths(resp))
+        Transformer([Pagination()]).transform(spec)
+        assert resp["/api/v1/accounts/{:id}/featured_tags"].root["get"].pagination is None
+        assert resp["/api/v1/accounts/{:id}/lists"].root["get"].pagination is None
+        assert resp["/api/v1/accounts/{:id}/followers"].root["get"].pagination is not None
+
+    @responses.activate
+    def test_handle_parameter_nested_heading(self, load_api_html_fn):
+        load_api_html_fn("bookmarks")
+        resp = handle_path_item("bookmarks", "https://docs.joinmastodon.org/methods/bookmarks/")
+
+        # the h3 Request heading is nested in the method section and does not end it
+        operation = resp["/api/v1/bookmarks"].root["get"]
+        assert [param.name for param in operation.parameters] == ["max_id", "since_id", "min_id", "limit"]
+
     @responses.activate
     def test_handle_operation_filter(self, load_api_html_fn, app="filters"):
         link = f"https://docs.joinmastodon.org/methods/{app}/"
@@ -109,3 +210,46 @@ class TestHandlePaths:
         path = resp["/api/v1/admin/ip_blocks"].root
         assert "get" in path
         assert "post" in path
+
+    def test_streaming_events(self):
+        link = "https://docs.joinmastodon.org/methods/streaming/"
+        paths = parse_path_item("streaming", link, STREAMING)
+
+        operation = paths["/api/v1/streaming/user"].root["get"]
+        events = operation.responses.root[200].content["text/event-stream"].schema_object
+        assert isinstance(events, OneOfObject)
+        assert events.discriminator.propertyName == "event"
+        assert events.discriminator.mapping == {
+            "update": "#/components/schemas/UpdateEvent",
+            "delete": "#/components/schemas/DeleteEvent",
+            "status.update": "#/components/schemas/StatusUpdateEvent",
+            "filters_changed": "#/components/schemas/FiltersChangedEvent",
+            "notifications_merged": "#/components/schemas/NotificationsMergedEvent",
+        }
+
+        payloads = [option.properties["payload"] for option in events.oneOf]
+        assert payloads[0].ref == "#/components/schemas/Status"
+        assert payloads[1].type == "string"
+        assert payloads[2].ref == "#/components/schemas/Status"
+        assert payloads[3].type == "null"
+        assert payloads[4].type == "null"
+
+        # the event schemas are hoisted to the components and shared by the streaming responses
+        spec = OpenAPI(info=Info(title="Mastodon", version="0.1.0"), paths=Paths(paths), components=Component())
+        dangling = DanglingRefs()
+        Transformer([StreamingEvents(), dangling]).transform(spec)
+
+        schemas = spec.components.schemas
+        assert {
+            "StreamingEvent",
+            "UpdateEvent",
+            "DeleteEvent",
+            "StatusUpdateEvent",
+            "FiltersChangedEvent",
+            "NotificationsMergedEvent",
+        } == set(schemas)
+        # the hoisted event schemas are visited too, the payload entity is not defined here
+        assert dangling.report()["dangling"] == ["#/components/schemas/Status"]
+        assert all(isinstance(option, ReferenceObject) for option in schemas["StreamingEvent"].oneOf)
+        media = operation.responses.root[200].content["text/event-stream"]
+        assert media.schema_object.ref == "#/components/schemas/StreamingEvent"
@@ -0,0 +1,39 @@
+import responses
+
+from src.handler.generator import Generator
+from src.handler.select import resolve_entity
+
+BASEURL = "https://docs.joinmastodon.org"
+
+
+class TestSelect:
+    def test_resolve_entity(self):
+        entities = {"Account": "/entities/Account/", "AdminAccount": "/entities/Admin_Account/"}
+
+        assert resolve_entity("Account", entities) == "/entities/Account/"
+        assert resolve_entity("AdminAccount", entities) == "/entities/Admin_Account/"
+        assert resolve_entity("CredentialAccount", entities) == "/entities/Account/"
+        assert resolve_entity("Status", entities) is None
+
+    @responses.activate
+    def test_only_tags(self, docs_site_fn):
+        docs_site_fn(["apps", "bookmarks"], ["Account", "Admin_Account"])
+
+        spec = Generator(BASEURL, only_tags={"apps"}).generate()
+
+        assert {call.request.url for call in responses.calls} == {f"{BASEURL}/", f"{BASEURL}/methods/apps/"}
+        assert all(operation.tags == ["apps"] for item in spec.paths.root.values() for operation in item.root.values())
+        assert "/api/v1/apps" in spec.paths.root
+        assert "Account" not in spec.components.schemas
+
+    @responses.activate
+    def test_only_entities(self, docs_site_fn):
+        docs_site_fn(["apps", "bookmarks"], ["Account", "Admin_Account"])
+
+        spec = Generator(BASEURL, only_entities={"Account"}).generate()
+
+        assert {call.request.url for call in responses.calls} == {f"{BASEURL}/", f"{BASEURL}/entities/Account/"}
+        assert spec.paths.root == {}
+        assert {"Account", "Field"} <= spec.components.schemas.keys()
+        assert "MutedAccount" not in spec.components.schemas
+        assert spec.components.schemas.keys() == spec.components.responses.keys()
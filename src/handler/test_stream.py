@@ -0,0 +1,50 @@
+import io
+import tracemalloc
+
+import responses
+
+from src.handler import build_spec
+from src.handler import stream_spec
+from src.handler import to_openapi_spec_text
+
+APPS = ["accounts", "admin", "apps", "async_refreshes", "bookmarks", "filters", "grouped_notifications", "instance"]
+COMPONENTS = ["Account", "Admin_Account"]
+SMALL_APPS = ["admin", "apps", "async_refreshes", "bookmarks", "grouped_notifications", "ip_blocks"]
+
+
+class TestStreamSpec:
+    @responses.activate
+    def test_stream_spec(self, docs_site_fn):
+        docs_site_fn(APPS, COMPONENTS)
+
+        file = io.StringIO()
+        stream_spec("https://docs.joinmastodon.org", file)
+
+        assert file.getvalue() == to_openapi_spec_text(build_spec("https://docs.joinmastodon.org"))
+
+    @responses.activate
+    def test_stream_spec_memory(self, docs_site_fn, mocker):
+        # the small pages served six times, so the whole spec outweighs the largest page and its tree
+        docs_site_fn(SMALL_APPS, ["Account"], copies=5)
+        # the recorded calls keep every fetched page, which is the test harness and not the pipeline
+        mocker.patch("responses.CallList.add")
+        link = "https://docs.joinmastodon.org"
+        # warm up the imports and the caches, so both pipelines are measured in the same state
+        to_openapi_spec_text(build_spec(link))
+
+        stream_peak = traced_peak(lambda: stream_spec(link, io.StringIO()))
+        build_peak = traced_peak(lambda: to_openapi_spec_text(build_spec(link)))
+
+        # the stream holds one parsed page and the written text (~4.7 MB here), the build holds all (~8.3 MB)
+        assert stream_peak < 6 * 1024 * 1024
+        assert stream_peak < 0.7 * build_peak
+
+
+def traced_peak(fn) -> int:
+    """the peak of the traced memory while running the function"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
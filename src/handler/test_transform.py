@@ -0,0 +1,231 @@
+from src.handler.transform import DanglingRefs
+from src.handler.transform import Discriminators
+from src.handler.transform import Pagination
+from src.handler.transform import RateLimits
+from src.handler.transform import Transformer
+from src.handler.transform import default_passes
+from src.handler.transform import parse_limit
+from src.handler.typeexpr import compile_type
+from src.handler.utils import schema_ref
+from src.openapi_spec import Component
+from src.openapi_spec import Info
+from src.openapi_spec import MediaTypeObject
+from src.openapi_spec import OneOfObject
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import Operation
+from src.openapi_spec import ParameterObject
+from src.openapi_spec import PathItem
+from src.openapi_spec import Paths
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import ResponseObject
+from src.openapi_spec import Responses
+from src.openapi_spec import SchemaObject
+from src.openapi_spec import SecurityRequirementObject
+
+
+def json_response(description: str, schema) -> ResponseObject:
+    return ResponseObject(
+        description=description,
+        content={"application/json": MediaTypeObject.model_validate({"schema": schema})},
+    )
+
+
+def sample_spec() -> OpenAPI:
+    tag = SchemaObject(
+        type="object",
+        properties={
+            "name": SchemaObject(type="string"),
+            "history": SchemaObject(
+                type="array",
+                items=ReferenceObject.model_validate({"$ref": "#/components/schemas/Hash", "description": ""}),
+            ),
+        },
+    )
+    operation = Operation(
+        tags=["instance"],
+        responses=Responses(
+            {
+                200: json_response("Array of Hash", SchemaObject(type="array")),
+                404: json_response("Not found", ReferenceObject.model_validate({"$ref": "#/components/schemas/Error"})),
+            }
+        ),
+    )
+    return OpenAPI(
+        info=Info(title="Mastodon", version="0.1.0"),
+        paths=Paths({"/api/v1/instance/activity": PathItem({"get": operation})}),
+        components=Component(responses={"Tag": json_response("Tag", tag)}),
+    )
+
+
+class TestTransformer:
+    def test_transform(self):
+        transformer = Transformer(default_passes())
+        spec = transformer.transform(sample_spec())
+
+        # hoist the schema of the response to the schemas
+        response = spec.components.responses["Tag"]
+        assert response.content["application/json"].schema_object.ref == "#/components/schemas/Tag"
+        assert spec.components.schemas["Tag"].properties["name"].type == "string"
+
+        # override the history and the instance activity
+        assert spec.components.schemas["Tag"].properties["history"].items.ref == "#/components/schemas/History"
+        activity = spec.paths.root["/api/v1/instance/activity"].root["get"].responses.root[200]
+        assert activity.content["application/json"].schema_object.items.properties["week"].type == "string"
+
+        profile = transformer.profile()
+        assert list(profile) == [
+            "hoist-schemas",
+            "overrides",
+            "streaming-events",
+            "discriminators",
+            "pagination",
+            "rate-limits",
+            "dangling-refs",
+            "stats",
+        ]
+        assert all(report["seconds"] >= 0 for report in profile.values())
+        assert profile["overrides"]["applied"] == 2
+        assert profile["dangling-refs"]["dangling"] == ["#/components/schemas/Error", "#/components/schemas/History"]
+        assert profile["stats"]["operations"] == 1
+
+    def test_pagination(self):
+        def query(name: str, description: str | None = None) -> ParameterObject:
+            return ParameterObject.model_validate(
+                {"name": name, "in": "query", "description": description, "schema": SchemaObject(type="string")}
+            )
+
+        parameters = [
+            query("max_id"),
+            query("min_id"),
+            query("limit", "Integer. Maximum number of results to return. Defaults to 20 statuses. Max 40 statuses."),
+        ]
+        statuses = SchemaObject(
+            type="array", items=ReferenceObject.model_validate({"$ref": "#/components/schemas/Status"})
+        )
+        status = ReferenceObject.model_validate({"$ref": "#/components/schemas/Status"})
+        spec = OpenAPI(
+            info=Info(title="Mastodon", version="0.1.0"),
+            paths=Paths(
+                {
+                    "/api/v1/timelines/home": PathItem(
+                        {
+                            "get": Operation(
+                                parameters=parameters, responses=Responses({200: json_response("", statuses)})
+                            )
+                        }
+                    ),
+                    # the leaked cursor parameters of the next method on the non-list operation
+                    "/api/v1/statuses/{:id}": PathItem(
+                        {"get": Operation(parameters=parameters, responses=Responses({200: json_response("", status)}))}
+                    ),
+                }
+            ),
+        )
+
+        transformer = Transformer([Pagination()])
+        transformer.transform(spec)
+
+        pagination = spec.paths.root["/api/v1/timelines/home"].root["get"].pagination
+        assert pagination.model_dump(by_alias=True) == {
+            "cursors": ["max_id", "min_id"],
+            "defaultLimit": 20,
+            "maxLimit": 40,
+            "header": "Link",
+        }
+        assert spec.paths.root["/api/v1/statuses/{:id}"].root["get"].pagination is None
+        assert "x-pagination" in spec.paths.root["/api/v1/timelines/home"].model_dump(by_alias=True)["get"]
+        assert transformer.profile()["pagination"]["paginated"] == 1
+
+        assert parse_limit("Number. How many accounts to load. Defaults to 40 accounts. Max 80 accounts.") == (40, 80)
+        assert parse_limit(None) == (None, None)
+
+    def test_rate_limits(self):
+        account = ReferenceObject.model_validate({"$ref": "#/components/schemas/Account"})
+        authenticated = Operation(
+            responses=Responses({200: json_response("Account", account)}),
+            security=[SecurityRequirementObject({"BearerAuth": []})],
+        )
+        public = Operation(responses=Responses({200: json_response("Account", account)}))
+        spec = OpenAPI(
+            info=Info(title="Mastodon", version="0.1.0"),
+            paths=Paths({"/api/v1/accounts/{:id}": PathItem({"post": authenticated, "get": public})}),
+            components=Component(
+                schemas={"Account": SchemaObject(type="object"), "Error": SchemaObject(type="object")}
+            ),
+        )
+
+        transformer = Transformer([RateLimits(), DanglingRefs()])
+        transformer.transform(spec)
+
+        assert {"X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After"} == set(
+            spec.components.headers
+        )
+
+        responses = authenticated.responses.root
+        assert list(responses[200].headers) == ["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"]
+        assert responses[429].headers["Retry-After"].ref == "#/components/headers/Retry-After"
+        assert responses[429].content["application/json"].schema_object.ref == "#/components/schemas/Error"
+        assert public.responses.root[200].headers is None and 429 not in public.responses.root
+
+        profile = transformer.profile()
+        assert profile["rate-limits"]["limited"] == 1
+        assert profile["dangling-refs"]["dangling"] == []
+
+    def test_dangling_refs_per_generation(self):
+        status = SchemaObject(
+            type="object",
+            properties={
+                "group": schema_ref("NotificationGroup"),
+                "extra": compile_type("a free text type").schema(),
+            },
+        )
+        spec = OpenAPI(
+            info=Info(title="Mastodon", version="0.1.0"),
+            components=Component(schemas={"Status": status, "JSON": SchemaObject(type="object")}),
+        )
+
+        # each generation counts its own references, also from the copies of the cached fragments
+        for _ in range(2):
+            transformer = Transformer([DanglingRefs()])
+            transformer.transform(spec.model_copy(deep=True))
+
+            report = transformer.profile()["dangling-refs"]
+            assert report["collapsed"] == {"NotificationGroup": 1}
+            assert report["unknown"] == {"a free text type": 1}
+            assert report["dangling"] == []
+
+    def test_discriminators(self):
+        status = SchemaObject(
+            type="object",
+            properties={name: SchemaObject(type="string") for name in ("id", "created_at", "content", "account")},
+        )
+        scheduled_status = SchemaObject(
+            type="object",
+            properties={name: SchemaObject(type="string") for name in ("id", "scheduled_at", "params")},
+        )
+        one_of = OneOfObject(
+            oneOf=[
+                ReferenceObject.model_validate({"$ref": "#/components/schemas/Status"}),
+                ReferenceObject.model_validate({"$ref": "#/components/schemas/ScheduledStatus"}),
+            ]
+        )
+        spec = OpenAPI(
+            info=Info(title="Mastodon", version="0.1.0"),
+            paths=Paths(
+                {
+                    "/api/v1/statuses": PathItem(
+                        {"post": Operation(responses=Responses({200: json_response("", one_of)}))}
+                    )
+                }
+            ),
+            components=Component(schemas={"Status": status, "ScheduledStatus": scheduled_status}),
+        )
+
+        transformer = Transformer([Discriminators()])
+        transformer.transform(spec)
+
+        assert one_of.model_dump(by_alias=True, exclude_none=True)["x-discriminator-presence"] == {
+            "mapping": {"scheduled_at": "#/components/schemas/ScheduledStatus"},
+            "default": "#/components/schemas/Status",
+        }
+        assert transformer.profile()["discriminators"]["discriminated"] == 1
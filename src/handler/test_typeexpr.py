@@ -0,0 +1,66 @@
+from src.handler.typeexpr import TypeExpr
+from src.handler.typeexpr import compile_returns
+from src.handler.typeexpr import compile_type
+from src.openapi_spec import OneOfObject
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import SchemaObject
+
+
+class TestTypeExpr:
+    def test_compile_returns(self):
+        schema = compile_returns("Array of V1::Filter").schema()
+        assert schema == SchemaObject(
+            type="array",
+            description="Array of V1::Filter",
+            items=ReferenceObject.model_validate({"$ref": "#/components/schemas/V1Filter"}),
+        )
+
+        assert compile_returns("String").schema() == SchemaObject(type="string")
+        assert compile_returns("Hash with a single key of count").schema() == SchemaObject(
+            type="object",
+            description="Hash with a single key of count",
+            properties={"count": SchemaObject(type="integer")},
+        )
+        assert compile_returns("OEmbed metadata").schema() == ReferenceObject.model_validate(
+            {"$ref": "#/components/schemas/JSON"}
+        )
+        schema = compile_returns("Status. When scheduled_at is present, ScheduledStatus is returned instead.").schema()
+        assert isinstance(schema, OneOfObject)
+        assert [ref.ref for ref in schema.oneOf] == [
+            "#/components/schemas/Status",
+            "#/components/schemas/ScheduledStatus",
+        ]
+
+    def test_compile_type(self):
+        assert compile_type("String (URL) or null").schema("link", fmt="uri") == SchemaObject(
+            type=["string", "null"], description="link", format="uri"
+        )
+        assert compile_type("Array of", "Field").schema("fields") == SchemaObject(
+            type="array",
+            description="fields",
+            items=ReferenceObject.model_validate({"$ref": "#/components/schemas/Field", "description": ""}),
+        )
+        assert compile_type("Array of Strings").schema("names", nullable=True) == SchemaObject(
+            type=["array", "null"], description="names", items=SchemaObject(type="string", description="")
+        )
+        assert compile_type("NotificationGroup").ref == "NotificationGroup"
+        assert compile_type("NotificationGroup").schema().ref == "#/components/schemas/JSON"
+
+    def test_memoized(self):
+        compile_type.cache_clear()
+        expr = compile_type("Boolean")
+
+        assert compile_type("Boolean") is expr
+        assert compile_type.cache_info().hits == 1
+        # the schema is built for each occurrence since the passes mutate it
+        assert expr.schema() is not expr.schema()
+
+    def test_unknown(self):
+        expr = compile_returns("a list of the things")
+
+        assert expr == TypeExpr(ref="JSON", unknown="a list of the things")
+        schema = expr.schema()
+        assert schema.ref == "#/components/schemas/JSON"
+        # the unknown text is kept on the reference and counted by the dangling-refs pass
+        assert schema._unknown == "a list of the things"
+        assert schema.model_dump(by_alias=True, exclude_none=True) == {"$ref": "#/components/schemas/JSON"}
@@ -0,0 +1,98 @@
+import pytest
+import responses
+
+from src.handler.generator import Generator
+from src.handler.watch import Metrics
+from src.handler.watch import check
+from src.handler.watch import write_atomic
+
+
+class TestWatch:
+    @responses.activate
+    def test_check(self, docs_site_fn, tmp_path):
+        pages = docs_site_fn(["apps", "bookmarks"], ["Account"])
+        output = tmp_path / "mastodon-openapi.yaml"
+
+        generator = Generator("https://docs.joinmastodon.org")
+        metrics = Metrics()
+
+        assert check(generator, str(output), metrics) is True
+        assert metrics.pages_changed == 3
+        assert "/api/v1/apps" in output.read_text()
+
+        # nothing changed, all pages answer 304 and the output is kept
+        mtime = output.stat().st_mtime_ns
+        assert check(generator, str(output), metrics) is False
+        assert metrics.checks == 2
+        assert metrics.pages_changed == 0
+        assert metrics.requests == 4
+        assert output.stat().st_mtime_ns == mtime
+
+        # only the changed page is re-parsed
+        link = "https://docs.joinmastodon.org/methods/bookmarks/"
+        pages[link] = pages[link].replace("/api/v1/bookmarks", "/api/v2/bookmarks")
+        assert check(generator, str(output), metrics) is True
+        assert metrics.pages_changed == 1
+        assert "/api/v2/bookmarks" in output.read_text()
+
+    @responses.activate
+    def test_check_sitemap(self, docs_site_fn, tmp_path):
+        baseurl = "https://docs.joinmastodon.org"
+        pages = docs_site_fn(["apps", "bookmarks"], ["Account"])
+        lastmods = {f"{baseurl}/methods/apps/": "2024-01-01", f"{baseurl}/methods/bookmarks/": "2024-01-01"}
+
+        def sitemap(request):
+            urls = "".join(
+                f"<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>" for loc, lastmod in lastmods.items()
+            )
+            return 200, {}, f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+
+        responses.add_callback(responses.GET, f"{baseurl}/sitemap.xml", callback=sitemap)
+        output = tmp_path / "mastodon-openapi.yaml"
+        generator = Generator(baseurl, sitemap=True)
+        metrics = Metrics()
+
+        assert check(generator, str(output), metrics) is True
+        assert metrics.requests == 5
+
+        # the sitemap is not changed, only the index and the entity missing from the sitemap are conditional
+        assert check(generator, str(output), metrics) is False
+        assert metrics.requests == 3
+        assert f"{baseurl}/methods/apps/" not in [call.request.url for call in responses.calls[-3:]]
+
+        # the page missing from the sitemap is still checked while the sitemap is not changed
+        link = f"{baseurl}/entities/Account/"
+        pages[link] = pages[link].replace("The Webfinger account URI", "The WebFinger account URI")
+        assert check(generator, str(output), metrics) is True
+        assert metrics.requests == 3
+        assert metrics.pages_changed == 1
+        assert "The WebFinger account URI" in output.read_text()
+
+        # only the page of the newer lastmod is requested, and the entity without lastmod is conditional
+        link = f"{baseurl}/methods/bookmarks/"
+        lastmods[link] = "2024-02-01"
+        pages[link] = pages[link].replace("/api/v1/bookmarks", "/api/v2/bookmarks")
+        assert check(generator, str(output), metrics) is True
+        assert metrics.requests == 4
+        assert metrics.pages_changed == 1
+        assert "/api/v2/bookmarks" in output.read_text()
+        assert f"{baseurl}/methods/apps/" not in [call.request.url for call in responses.calls[-4:]]
+
+    def test_check_failed(self, mocker, tmp_path):
+        generator = Generator("https://docs.joinmastodon.org")
+        mocker.patch.object(generator, "generate", side_effect=RuntimeError("docs are down"))
+        metrics = Metrics()
+
+        with pytest.raises(RuntimeError):
+            check(generator, str(tmp_path / "mastodon-openapi.yaml"), metrics)
+        assert metrics.checks == 1
+        assert metrics.last_check is not None
+        assert metrics.last_change is None
+
+    def test_write_atomic(self, tmp_path):
+        path = tmp_path / "spec.yaml"
+
+        assert write_atomic(path, b"openapi: 3.1.0\n") is True
+        assert write_atomic(path, b"openapi: 3.1.0\n") is False
+        assert path.read_bytes() == b"openapi: 3.1.0\n"
+        assert [file.name for file in tmp_path.iterdir()] == ["spec.yaml"]
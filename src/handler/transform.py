@@ -0,0 +1,568 @@
+import re
+import time
+from collections import Counter
+from collections import defaultdict
+
+from loguru import logger
+
+from src.openapi_spec import Component
+from src.openapi_spec import HeaderObject
+from src.openapi_spec import MediaTypeObject
+from src.openapi_spec import OneOfObject
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import Operation
+from src.openapi_spec import PaginationObject
+from src.openapi_spec import ParameterObject
+from src.openapi_spec import PathItem
+from src.openapi_spec import PresenceDiscriminatorObject
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import ResponseObject
+from src.openapi_spec import Responses
+from src.openapi_spec import SchemaObject
+
+HOOKS = ("visit_component", "visit_component_response", "visit_operation", "visit_schema", "visit_reference", "end")
+
+
+class Pass:
+    """
+    The transform pass over the OpenAPI spec, override the visit_* hooks of interest.
+
+    all the registered passes run in the single traversal of the spec, the components are visited
+    before the paths so the paths see the final components.
+    """
+
+    name = "pass"
+
+    def visit_component(self, component: Component):
+        """the components, before its responses and schemas are visited"""
+
+    def visit_component_response(self, name: str, response: ResponseObject | ReferenceObject):
+        """the response in the components, before its content is visited"""
+
+    def visit_operation(self, path: str, method: str, operation: Operation):
+        """the operation, before its parameters and responses are visited"""
+
+    def visit_schema(self, location: str, schema: SchemaObject):
+        """the schema, before its items and properties are visited"""
+
+    def visit_reference(self, location: str, ref: ReferenceObject):
+        """the reference object anywhere in the spec"""
+
+    def end(self):
+        """the traversal is finished"""
+
+    def report(self) -> dict:
+        return {}
+
+
+class Transformer:
+    """Run the registered passes in the single traversal and profile the time spent per pass"""
+
+    def __init__(self, passes: list[Pass]):
+        self.passes = passes
+        self.timings: dict[str, float] = defaultdict(float)
+        self.component: Component | None = None
+        # the number of the component schemas visited, the later ones are hoisted by the operation hooks
+        self.visited = 0
+        # only dispatch the hook to the passes which override it
+        self.hooks = {
+            hook: [getattr(p, hook) for p in passes if getattr(type(p), hook) is not getattr(Pass, hook)]
+            for hook in HOOKS
+        }
+
+    def dispatch(self, hook: str, *args):
+        for fn in self.hooks[hook]:
+            started = time.perf_counter()
+            fn(*args)
+            self.timings[fn.__self__.name] += time.perf_counter() - started
+
+    def transform(self, spec: OpenAPI) -> OpenAPI:
+        if spec.components:
+            self.visit_component(spec.components)
+        for path, path_item in spec.paths.root.items():
+            self.visit_path_item(path, path_item)
+        self.end()
+        return spec
+
+    def visit_component(self, component: Component):
+        self.component = component
+        self.dispatch("visit_component", component)
+
+        for name, response in component.responses.items():
+            self.dispatch("visit_component_response", name, response)
+            self.visit_response(f"#/components/responses/{name}", response)
+
+        for name, schema in (component.schemas or {}).items():
+            self.visit_schema(name, schema)
+        self.visited = len(component.schemas or {})
+
+    def visit_hoisted(self):
+        """the schemas hoisted to the components by the operation hooks, e.g. the streaming events"""
+        schemas = (self.component and self.component.schemas) or {}
+        if len(schemas) <= self.visited:
+            return
+
+        for name, schema in list(schemas.items())[self.visited :]:
+            self.visit_schema(name, schema)
+        self.visited = len(schemas)
+
+    def visit_path_item(self, path: str, path_item: PathItem):
+        for method, operation in path_item.root.items():
+            self.dispatch("visit_operation", path, method, operation)
+            self.visit_hoisted()
+
+            location = f"{method.upper()} {path}"
+            for parameter in operation.parameters or []:
+                if isinstance(parameter, ReferenceObject):
+                    self.dispatch("visit_reference", location, parameter)
+                else:
+                    self.visit_schema(f"{location} {parameter.name}", parameter.schema_object)
+
+            for code, response in (operation.responses.root if operation.responses else {}).items():
+                self.visit_response(f"{location} {code}", response)
+
+    def visit_response(self, location: str, response: ResponseObject | ReferenceObject):
+        if isinstance(response, ReferenceObject):
+            self.dispatch("visit_reference", location, response)
+            return
+
+        for name, header in (response.headers or {}).items():
+            if isinstance(header, ReferenceObject):
+                self.dispatch("visit_reference", f"{location} {name}", header)
+            else:
+                self.visit_schema(f"{location} {name}", header.schema_object)
+
+        for media in (response.content or {}).values():
+            self.visit_schema(location, media.schema_object)
+
+    def visit_schema(self, location: str, schema: SchemaObject | OneOfObject | ReferenceObject | None):
+        match schema:
+            case ReferenceObject():
+                self.dispatch("visit_reference", location, schema)
+            case OneOfObject():
+                for option in schema.oneOf:
+                    self.visit_schema(location, option)
+            case SchemaObject():
+                self.dispatch("visit_schema", location, schema)
+                self.visit_schema(f"{location}[]", schema.items)
+                for name, prop in (schema.properties or {}).items():
+                    self.visit_schema(f"{location}.{name}", prop)
+
+    def end(self):
+        self.dispatch("end")
+
+    def profile(self) -> dict:
+        """the time spent and the report per pass"""
+        return {p.name: {"seconds": round(self.timings[p.name], 6), **p.report()} for p in self.passes}
+
+
+class HoistSchemas(Pass):
+    """copy the schema of the component response to the schemas and reference it from the response"""
+
+    name = "hoist-schemas"
+
+    def visit_component(self, component: Component):
+        self.component = component
+        if component.schemas is None:
+            component.schemas = {}
+
+    def visit_component_response(self, name: str, response: ResponseObject | ReferenceObject):
+        for media in (response.content or {}).values():
+            self.component.schemas[name] = media.schema_object
+            media.schema_object = ReferenceObject.model_validate({"$ref": f"#/components/schemas/{name}"})
+
+
+# the common structure of the Array of Hash in the entities
+HISTORY = ReferenceObject.model_validate({"$ref": "#/components/schemas/History", "description": ""})
+DIMENSION_DATA = SchemaObject(
+    type="object",
+    properties={
+        "key": SchemaObject(type="string"),
+        "human_key": SchemaObject(type="string"),
+        "value": SchemaObject(type="string"),
+    },
+)
+MEASURE_DATA = SchemaObject(
+    type="object",
+    properties={
+        "date": SchemaObject(type="string"),
+        "value": SchemaObject(type="string"),
+    },
+)
+INSTANCE_ACTIVITY = ResponseObject(
+    description="Array of Hash",
+    content={
+        "application/json": MediaTypeObject.model_validate(
+            {
+                "schema": SchemaObject(
+                    type="array",
+                    items=SchemaObject(
+                        type="object",
+                        properties={
+                            "week": SchemaObject(type="string"),
+                            "statuses": SchemaObject(type="string"),
+                            "logins": SchemaObject(type="string"),
+                            "registrations": SchemaObject(type="string"),
+                        },
+                    ),
+                )
+            }
+        ),
+    },
+)
+
+
+class Overrides(Pass):
+    """
+    Override the parts of the spec which cannot be parsed from the documentation.
+
+    the items override replaces the items of the (schema, property) array, which the documentation
+    only describes as the Array of Hash, and the response override replaces the 200 response of the
+    (path, method) operation.
+    """
+
+    name = "overrides"
+
+    items_overrides: dict[tuple[str, str], SchemaObject | ReferenceObject] = {
+        ("AdminEmailDomainBlock", "history"): HISTORY,
+        ("Tag", "history"): HISTORY,
+        ("TrendsLink", "history"): HISTORY,
+        ("AdminDimension", "data"): DIMENSION_DATA,
+        ("AdminMeasure", "data"): MEASURE_DATA,
+    }
+    response_overrides: dict[tuple[str, str], ResponseObject] = {
+        ("/api/v1/instance/activity", "get"): INSTANCE_ACTIVITY,
+    }
+
+    def __init__(self):
+        self.applied = 0
+
+    def visit_schema(self, location: str, schema: SchemaObject):
+        for name, prop in (schema.properties or {}).items():
+            if (override := self.items_overrides.get((location, name))) and isinstance(prop, SchemaObject):
+                prop.items = override.model_copy(deep=True)
+                self.applied += 1
+
+    def visit_operation(self, path: str, method: str, operation: Operation):
+        if (override := self.response_overrides.get((path, method))) and operation.responses:
+            if 200 in operation.responses.root:
+                operation.responses.root[200] = override.model_copy(deep=True)
+                self.applied += 1
+
+    def report(self) -> dict:
+        return {"applied": self.applied}
+
+
+class Pagination(Pass):
+    """
+    Detect the paginated list operation and add the x-pagination extension with its cursor
+    parameters, and the default/max limit parsed from the description of the limit parameter,
+    e.g. "Defaults to 20 statuses. Max 40 statuses."
+
+    the parameters of the next method may leak into the operation which has no parameters, so the
+    operation is only paginated when it returns the array.
+    """
+
+    name = "pagination"
+
+    cursors = ("max_id", "since_id", "min_id")
+
+    def __init__(self):
+        self.paginated = 0
+
+    def visit_operation(self, path: str, method: str, operation: Operation):
+        params = {
+            param.name: param
+            for param in operation.parameters or []
+            if isinstance(param, ParameterObject) and param.in_ == "query"
+        }
+        cursors = [cursor for cursor in self.cursors if cursor in params]
+        if not cursors or not self.returns_array(operation):
+            return
+
+        default_limit, max_limit = parse_limit(params["limit"].description if "limit" in params else None)
+        operation.pagination = PaginationObject(cursors=cursors, defaultLimit=default_limit, maxLimit=max_limit)
+        self.paginated += 1
+
+    @staticmethod
+    def returns_array(operation: Operation) -> bool:
+        response = operation.responses.root.get(200) if operation.responses else None
+        if not isinstance(response, ResponseObject):
+            return False
+
+        media = (response.content or {}).get("application/json")
+        return bool(media and isinstance(media.schema_object, SchemaObject) and media.schema_object.type == "array")
+
+    def report(self) -> dict:
+        return {"paginated": self.paginated}
+
+
+class StreamingEvents(Pass):
+    """
+    Hoist the inline event schemas of the streaming responses to the components, by the mapping of
+    the discriminator, and reference the shared StreamingEvent from the streaming responses.
+    """
+
+    name = "streaming-events"
+
+    def __init__(self):
+        self.component: Component | None = None
+        self.hoisted = 0
+
+    def visit_component(self, component: Component):
+        self.component = component
+
+    def visit_operation(self, path: str, method: str, operation: Operation):
+        if not self.component or not operation.responses:
+            return
+
+        for response in operation.responses.root.values():
+            if not isinstance(response, ResponseObject):
+                continue
+
+            for media in (response.content or {}).values():
+                events = media.schema_object
+                if not isinstance(events, OneOfObject) or not events.discriminator or not events.discriminator.mapping:
+                    continue
+
+                schemas = self.component.schemas = self.component.schemas or {}
+                refs = list(events.discriminator.mapping.values())
+                for idx, (ref, option) in enumerate(zip(refs, events.oneOf, strict=True)):
+                    if isinstance(option, SchemaObject):
+                        schemas.setdefault(ref.rsplit("/", 1)[-1], option)
+                        events.oneOf[idx] = ReferenceObject.model_validate({"$ref": ref})
+
+                if "StreamingEvent" not in schemas:
+                    schemas["StreamingEvent"] = events
+                    self.hoisted += len(refs)
+                media.schema_object = ReferenceObject.model_validate({"$ref": "#/components/schemas/StreamingEvent"})
+
+    def report(self) -> dict:
+        return {"hoisted": self.hoisted}
+
+
+class Discriminators(Pass):
+    """
+    Add the x-discriminator-presence hint to the oneOf of the response, which has no discriminator
+    (e.g. Status | ScheduledStatus), so the decoder picks the schema in constant time.
+
+    each option is mapped by its first property which no other option has, and the option with
+    the most properties is the default, the hint is skipped when some option cannot be told apart.
+    """
+
+    name = "discriminators"
+
+    def __init__(self):
+        self.schemas: dict = {}
+        self.discriminated = 0
+
+    def visit_component(self, component: Component):
+        self.schemas = component.schemas if component.schemas is not None else {}
+
+    def visit_operation(self, path: str, method: str, operation: Operation):
+        for response in (operation.responses.root if operation.responses else {}).values():
+            for media in (response.content or {}).values() if isinstance(response, ResponseObject) else []:
+                one_of = media.schema_object
+                if isinstance(one_of, OneOfObject) and not one_of.discriminator and not one_of.presence:
+                    one_of.presence = self.presence(one_of)
+                    self.discriminated += one_of.presence is not None
+
+    def presence(self, one_of: OneOfObject) -> PresenceDiscriminatorObject | None:
+        options = {}
+        for option in one_of.oneOf:
+            schema = self.schemas.get(option.ref.rsplit("/", 1)[-1]) if isinstance(option, ReferenceObject) else None
+            if not isinstance(schema, SchemaObject) or not schema.properties:
+                return None
+            options[option.ref] = list(schema.properties)
+
+        default = max(options, key=lambda ref: len(options[ref]))
+        mapping = {}
+        for ref, properties in options.items():
+            if ref == default:
+                continue
+
+            others = {prop for other, props in options.items() if other != ref for prop in props}
+            if not (unique := [prop for prop in properties if prop not in others]):
+                logger.warning(f"cannot discriminate {ref=} from {list(options)}")
+                return None
+            mapping[unique[0]] = ref
+
+        return PresenceDiscriminatorObject(mapping=mapping, default=default)
+
+    def report(self) -> dict:
+        return {"discriminated": self.discriminated}
+
+
+# the rate limit headers, ref: https://docs.joinmastodon.org/api/rate-limits/
+RATE_LIMIT_HEADERS = {
+    "X-RateLimit-Limit": HeaderObject.model_validate(
+        {"description": "Number of requests permitted per time period.", "schema": {"type": "integer"}, "example": 300}
+    ),
+    "X-RateLimit-Remaining": HeaderObject.model_validate(
+        {"description": "Number of requests you can still make.", "schema": {"type": "integer"}, "example": 299}
+    ),
+    "X-RateLimit-Reset": HeaderObject.model_validate(
+        {
+            "description": "Timestamp when your rate limit will reset.",
+            "schema": {"type": "string"},
+            "example": "2024-01-01T00:00:00.000Z",
+        }
+    ),
+    "Retry-After": HeaderObject.model_validate(
+        {
+            "description": "The seconds to wait before retrying the request.",
+            "schema": {"type": "integer"},
+            "example": 300,
+        }
+    ),
+}
+
+
+class RateLimits(Pass):
+    """
+    Document the rate limit of the authenticated operation, the X-RateLimit-* headers of its
+    success responses and the 429 response with the Retry-After header.
+
+    the headers are defined once in the components and referenced from the responses.
+    """
+
+    name = "rate-limits"
+
+    def __init__(self):
+        self.limited = 0
+
+    def visit_component(self, component: Component):
+        headers = {name: header.model_copy(deep=True) for name, header in RATE_LIMIT_HEADERS.items()}
+        component.headers = {**headers, **(component.headers or {})}
+
+    def visit_operation(self, path: str, method: str, operation: Operation):
+        if not operation.security:
+            return
+
+        operation.responses = operation.responses or Responses({})
+        responses = operation.responses.root
+        responses.setdefault(
+            429,
+            ResponseObject(
+                description="Too many requests",
+                content={
+                    "application/json": MediaTypeObject.model_validate(
+                        {"schema": ReferenceObject.model_validate({"$ref": "#/components/schemas/Error"})}
+                    )
+                },
+            ),
+        )
+
+        for code, response in responses.items():
+            if not isinstance(response, ResponseObject) or not (200 <= code < 300 or code == 429):
+                continue
+
+            names = [name for name in RATE_LIMIT_HEADERS if code == 429 or name != "Retry-After"]
+            headers = {name: ReferenceObject.model_validate({"$ref": f"#/components/headers/{name}"}) for name in names}
+            response.headers = {**headers, **(response.headers or {})}
+
+        self.limited += 1
+
+    def report(self) -> dict:
+        return {"limited": self.limited}
+
+
+def parse_limit(description: str | None) -> tuple[int | None, int | None]:
+    """the (default, max) of the limit parameter from its description"""
+    default_limit = re.search(r"Defaults to (\d+)", description or "")
+    max_limit = re.search(r"Max(?:imum)? (\d+)", description or "")
+    return (
+        int(default_limit.group(1)) if default_limit else None,
+        int(max_limit.group(1)) if max_limit else None,
+    )
+
+
+class DanglingRefs(Pass):
+    """
+    Detect the reference to the component which is not defined, the type which canonicalize
+    collapses to the JSON since it is not supported now, and the type text which is not compiled.
+    """
+
+    name = "dangling-refs"
+
+    def __init__(self):
+        self.refs: dict[str, list[str]] = defaultdict(list)
+        self.component: Component | None = None
+        self.dangling: dict[str, list[str]] = {}
+        self.collapsed: Counter[str] = Counter()
+        self.unknown: Counter[str] = Counter()
+
+    def visit_component(self, component: Component):
+        # the traversal starts, only the references of this spec are counted
+        self.component = component
+        self.refs.clear()
+        self.collapsed.clear()
+        self.unknown.clear()
+
+    def visit_reference(self, location: str, ref: ReferenceObject):
+        self.refs[ref.ref].append(location)
+        if ref._collapsed:
+            self.collapsed[ref._collapsed] += 1
+        if ref._unknown:
+            self.unknown[ref._unknown] += 1
+
+    def end(self):
+        defined = {
+            **{f"#/components/schemas/{name}": True for name in (self.component and self.component.schemas) or {}},
+            **{f"#/components/responses/{name}": True for name in (self.component and self.component.responses) or {}},
+            **{f"#/components/headers/{name}": True for name in (self.component and self.component.headers) or {}},
+        }
+        self.dangling = {ref: locations for ref, locations in self.refs.items() if ref not in defined}
+        for ref, locations in self.dangling.items():
+            logger.warning(f"dangling {ref=} referenced by {locations[:3]} ({len(locations)} total)")
+        for name, count in self.collapsed.items():
+            logger.warning(f"{name=} collapsed to JSON ({count} times)")
+        for text, count in self.unknown.items():
+            logger.warning(f"unknown type {text=} ({count} times)")
+
+    def report(self) -> dict:
+        return {"dangling": sorted(self.dangling), "collapsed": dict(self.collapsed), "unknown": dict(self.unknown)}
+
+
+class Stats(Pass):
+    """Count the objects in the spec"""
+
+    name = "stats"
+
+    def __init__(self):
+        self.counter = Counter()
+
+    def visit_component_response(self, name: str, response: ResponseObject | ReferenceObject):
+        self.counter["components"] += 1
+
+    def visit_operation(self, path: str, method: str, operation: Operation):
+        self.counter["operations"] += 1
+        self.counter["parameters"] += len(operation.parameters or [])
+        self.counter["deprecated"] += 1 if operation.deprecated else 0
+
+    def visit_schema(self, location: str, schema: SchemaObject):
+        self.counter["schemas"] += 1
+
+    def visit_reference(self, location: str, ref: ReferenceObject):
+        self.counter["references"] += 1
+
+    def report(self) -> dict:
+        return dict(self.counter)
+
+
+def default_passes() -> list[Pass]:
+    return [
+        HoistSchemas(),
+        Overrides(),
+        StreamingEvents(),
+        Discriminators(),
+        Pagination(),
+        RateLimits(),
+        DanglingRefs(),
+        Stats(),
+    ]
+
+
+def log_profile(transformer: Transformer):
+    for name, profile in transformer.profile().items():
+        logger.info(f"pass {name}: {profile}")
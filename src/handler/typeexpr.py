@@ -0,0 +1,130 @@
+"""
+The compiler of the type text of the docs, e.g. `Array of Status`, `String (URL)` and `Boolean or null`.
+
+The text is compiled once into the immutable TypeExpr by the grammar rules and the override tables,
+and the schema of each occurrence is built from the cached expression, since the passes mutate it.
+"""
+
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import replace
+from functools import cache
+
+from loguru import logger
+
+from src.handler.utils import schema_ref
+from src.openapi_spec import OneOfObject
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import SchemaObject
+
+
+@dataclass(frozen=True, slots=True)
+class TypeExpr:
+    """The compiled type, the built-in type or the reference to the component"""
+
+    type: str | None = None
+    ref: str | None = None
+    items: "TypeExpr | None" = None
+    one_of: tuple["TypeExpr", ...] = ()
+    properties: tuple[tuple[str, "TypeExpr"], ...] = ()
+    nullable: bool = False
+    description: str | None = None
+    # the text which matches none of the grammar rules
+    unknown: str | None = None
+
+    def schema(
+        self,
+        description: str | None = None,
+        nullable: bool = False,
+        fmt: str | None = None,
+        enum: list[str] | None = None,
+    ) -> SchemaObject | ReferenceObject | OneOfObject:
+        """the new schema of the expression, the description overrides the compiled one"""
+        description = self.description if description is None else description
+        if self.one_of:
+            return OneOfObject(oneOf=[expr.schema() for expr in self.one_of])
+        if self.ref:
+            return schema_ref(self.ref, description, self.unknown)
+
+        nullable = nullable or self.nullable
+        return SchemaObject(
+            type=[self.type, "null"] if nullable and self.type != "null" else self.type,
+            description=description,
+            format=fmt,
+            enum=enum,
+            items=self.items and self.items.schema(),
+            properties={name: expr.schema() for name, expr in self.properties} or None,
+        )
+
+
+def ref(name: str) -> TypeExpr:
+    return TypeExpr(ref=name)
+
+
+# the Returns text of the methods which is the prose instead of the type, matched exactly
+RETURNS_OVERRIDES: dict[str, TypeExpr] = {
+    "String (URL) or HTML response": TypeExpr(type="string"),
+    "Preferences by key and value": ref("JSON"),
+    "the user’s own Account with source attribute": ref("Account"),
+    "MediaAttachment, but without a URL": ref("MediaAttachment"),
+    "Hash of timeline key and associated Marker": TypeExpr(type="object"),
+    "Hash with a single key of count": TypeExpr(type="object", properties=(("count", TypeExpr(type="integer")),)),
+    "JSON as per the above description": ref("JSON"),
+    "OEmbed metadata": ref("JSON"),
+    "Object with source language codes as keys and arrays of target language codes as values.": ref("JSON"),
+    "Search, but hashtags is an array of strings instead of an array of Tag.": ref("Search"),
+    "Status. When scheduled_at is present, ScheduledStatus is returned instead.": TypeExpr(
+        one_of=(ref("Status"), ref("ScheduledStatus"))
+    ),
+    "Status with source text and poll or media_attachments": ref("Status"),
+    "Health status": ref("Hash"),
+}
+
+
+def nullable(matched: re.Match) -> TypeExpr:
+    return replace(compile_expr(matched.group(1)), nullable=True)
+
+
+# the grammar of the type text, the rule is (pattern, builder) and the first match wins
+GRAMMAR: tuple[tuple[re.Pattern, Callable[[re.Match], TypeExpr]], ...] = (
+    (re.compile(r"^(?:Array|List) of ([\w:]+)"), lambda matched: TypeExpr("array", items=compile_expr(matched[1]))),
+    (re.compile(r"^(.+?),? or null$", re.IGNORECASE), nullable),
+    (re.compile(r"^null$", re.IGNORECASE), lambda _: TypeExpr("null")),
+    # the detail of the scalar is the format, e.g. String (URL), which is handled by the caller
+    (re.compile(r"^(String|Integer|Number)\b"), lambda matched: TypeExpr(matched[1].lower())),
+    (
+        re.compile(r"^(boolean|integer|float|number|string|array)s?$", re.IGNORECASE),
+        lambda matched: TypeExpr(matched[1].lower()),
+    ),
+    (re.compile(r"^[A-Z][\w:]*$"), lambda matched: ref(matched[0])),
+)
+
+
+@cache
+def compile_expr(text: str) -> TypeExpr:
+    """compile the type text by the grammar, the unknown text is reported and collapsed to the JSON"""
+    text = text.strip()
+    for pattern, build in GRAMMAR:
+        if matched := pattern.match(text):
+            return build(matched)
+
+    logger.warning(f"unknown type {text=}, collapsed to JSON")
+    return TypeExpr(ref="JSON", unknown=text)
+
+
+@cache
+def compile_returns(text: str) -> TypeExpr:
+    """compile the Returns text of the method, the array and the object are described by the text"""
+    text = text.strip()
+    expr = RETURNS_OVERRIDES.get(text) or compile_expr(text)
+    described = expr.type == "array" or (expr.type is not None and text in RETURNS_OVERRIDES)
+    return replace(expr, description=text) if described else expr
+
+
+@cache
+def compile_type(text: str, items: str | None = None) -> TypeExpr:
+    """compile the Type text of the attribute, the items is the linked type after the bare `Array of`"""
+    text = text.strip()
+    expr = TypeExpr("array", items=compile_expr(items or "")) if text == "Array of" else compile_expr(text)
+    return replace(expr, items=replace(expr.items, description="")) if expr.items else expr
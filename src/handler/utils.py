@@ -1,12 +1,161 @@
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup
+from bs4 import NavigableString
+from bs4 import PageElement
 from loguru import logger
 
+from src.openapi_spec import ReferenceObject
+
+# the types which are not supported now and collapsed to the JSON, reported by the dangling-refs pass
+NAME_OVERRIDES = {
+    "GroupedNotificationsResults": "JSON",
+    "PartialAccountWithAvatar": "JSON",
+    "NotificationGroup": "JSON",
+}
+
+
+def release_soup(soup: BeautifulSoup):
+    """
+    release the parsed tree, the decompose() of the BeautifulSoup object itself leaves its children
+    in the reference cycles, which stay in memory until the full GC runs.
+    """
+    for child in list(soup.contents):
+        child.decompose()
+    soup.decompose()
 
-def canonicalize(text: str) -> str:
-    text = text.strip()
-    text = text.replace(":", "").replace(" ", "_").replace(".", "")
 
-    if text in ("GroupedNotificationsResults", "PartialAccountWithAvatar", "NotificationGroup"):
+def canonical_name(text: str) -> str:
+    """the component name of the type name, e.g. Admin::Account is AdminAccount"""
+    return text.strip().replace(":", "").replace(" ", "_").replace(".", "")
+
+
+def canonicalize(text: str) -> str:
+    text = canonical_name(text)
+    if text in NAME_OVERRIDES:
         logger.warning(f"{text=} not support now")
-        text = "JSON"
+        text = NAME_OVERRIDES[text]
 
     return text
+
+
+def schema_ref(name: str, description: str | None = None, unknown: str | None = None) -> ReferenceObject:
+    """
+    the reference to the component schema of the type name, the collapsed name and the unknown type
+    text are kept on the reference, so the dangling-refs pass counts them in each generation.
+    """
+    ref = ReferenceObject.model_validate(
+        {"$ref": f"#/components/schemas/{canonicalize(name)}", "description": description}
+    )
+    ref._collapsed = name if (name := canonical_name(name)) in NAME_OVERRIDES else None
+    ref._unknown = unknown
+    return ref
+
+
+@dataclass
+class VersionEntry:
+    """The line of the version history, e.g. 2.3.0 - added <code>locked</code> parameter"""
+
+    version: str
+    note: str
+    # the code names mentioned by the note, e.g. the added parameter
+    codes: list[str]
+
+    @property
+    def added(self) -> bool:
+        return self.note.lower().startswith("add")
+
+
+@dataclass(frozen=True, slots=True)
+class Inline:
+    """
+    The inline node of the paragraph, shared by the HTML page and the Markdown AST, the kind is
+    text, code, link, strong, em, label (the parameter label, e.g. required) or br.
+    """
+
+    kind: str
+    text: str
+    href: str | None = None
+
+
+# the label spans of the docs theme, the optional and the nullable labels share the class of the required one
+LABEL_CLASSES = ("api-method-parameter-required", "api-method-parameter-deprecated", "api-method-parameter-removed")
+REQUIRED_LABELS = ("required", "optional", "nullable")
+
+
+def inline_of(node: PageElement) -> Inline:
+    if isinstance(node, NavigableString):
+        return Inline("text", str(node))
+
+    match node.name:
+        case "br":
+            return Inline("br", "")
+        case "code" | "strong" | "em":
+            return Inline(node.name, node.text)
+        case "a":
+            return Inline("link", node.text, node.get("href"))
+        case "span" if any(name in LABEL_CLASSES for name in node.get("class") or ()):
+            return Inline("label", node.text)
+    return Inline("text", node.text)
+
+
+def inlines_of(nodes: Iterable[PageElement]) -> list[Inline]:
+    """the inline nodes of the HTML siblings, e.g. the children of the paragraph"""
+    return merge_text(inline_of(node) for node in nodes)
+
+
+def merge_text(inlines: Iterable[Inline]) -> list[Inline]:
+    """merge the consecutive text nodes, as the text of the HTML is one string between the tags"""
+    merged: list[Inline] = []
+    for node in inlines:
+        if node.kind == "text" and merged and merged[-1].kind == "text":
+            merged[-1] = Inline("text", merged[-1].text + node.text)
+        elif node.kind != "text" or node.text:
+            merged.append(node)
+    return merged
+
+
+def inline_text(inlines: Iterable[Inline]) -> str:
+    return "".join(node.text for node in inlines)
+
+
+def parse_version_history(inlines: list[Inline]) -> list[VersionEntry]:
+    """the entries of the version history after the `Version history:` label, one entry per line"""
+    lines, line = [], []
+    for node in inlines:
+        if node.kind == "br":
+            lines.append(line)
+            line = []
+        elif node.kind == "strong":
+            break
+        else:
+            line.append(node)
+    lines.append(line)
+
+    entries = []
+    for nodes in lines:
+        text = inline_text(nodes).strip()
+        # the version may be followed by the API version, e.g. 4.4.0 (`mastodon` API version 5) - added
+        if not (matched := re.match(r"^(\d+\.\d+\.\d+)(?:\s*\([^)]*\))?\s*-\s*([\s\S]*)$", text)):
+            continue
+
+        version, note = matched.groups()
+        codes = [node.text for node in nodes if node.kind == "code" and node.text in note]
+        entries.append(VersionEntry(version, note.strip(), codes))
+
+    return entries
+
+
+def version_metadata(entries: list[VersionEntry]) -> tuple[str | None, list[str] | None]:
+    """
+    the (added in, changed in) versions, the entity is added by the first `added` entry of no code
+    names, and the added in is unknown when the history only has the change notes.
+    """
+    if not entries:
+        return None, None
+
+    added = next((entry for entry in entries if entry.added and not entry.codes), None)
+    changed = list(dict.fromkeys(entry.version for entry in entries if entry is not added))
+    return added and added.version, changed or None
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+
+from .generator import Generator
+from .generator import to_openapi_spec_text
+
+
+@dataclass
+class Metrics:
+    """The simple metrics of the watch mode"""
+
+    checks: int = 0
+    last_check: str | None = None
+    last_change: str | None = None
+    pages_changed: int = 0
+    requests: int = 0
+    generation_time: float = 0.0
+    profile: dict = field(default_factory=dict)
+
+
+def write_atomic(path: str | Path, data: bytes) -> bool:
+    """
+    Write the data to the path via the temporary file and rename, and skip the write when the
+    file already holds the same bytes. Return True when the file is rewritten.
+    """
+    path = Path(path)
+    if path.exists() and path.read_bytes() == data:
+        return False
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    return True
+
+
+def check(generator: Generator, output: str, metrics: Metrics) -> bool:
+    """run one round of the watch mode, return True when the output is rewritten"""
+    started = time.perf_counter()
+    requests = generator.fetcher.requests
+
+    try:
+        spec = generator.generate()
+        written = False
+        if generator.changed or not Path(output).exists():
+            written = write_atomic(output, to_openapi_spec_text(spec).encode("utf-8"))
+    finally:
+        # the failed round is a check as well, so the metrics tell when the docs were last polled
+        metrics.checks += 1
+        metrics.last_check = datetime.now(UTC).isoformat(timespec="seconds")
+
+    metrics.last_change = metrics.last_check if written else metrics.last_change
+    metrics.pages_changed = generator.changed
+    metrics.requests = generator.fetcher.requests - requests
+    metrics.generation_time = round(time.perf_counter() - started, 3)
+    metrics.profile = generator.profile
+    return written
+
+
+def watch(link: str, output: str, interval: float = 3600, metrics_path: str | None = None, rounds: int | None = None):
+    """
+    Poll the documentation on the interval and regenerate the OpenAPI spec when the docs change.
+
+    the lastmod in the sitemap skips the unchanged pages, the others are fetched by the conditional
+    request and only the changed pages are re-parsed, the output is rewritten only when the final
+    spec changes.
+    """
+    generator = Generator(link, sitemap=True)
+    metrics = Metrics()
+
+    while rounds is None or metrics.checks < rounds:
+        try:
+            written = check(generator, output, metrics)
+            logger.info(f"checked the docs {written=} {metrics}")
+        except Exception as err:
+            logger.error(f"failed to check the docs: {err}")
+
+        if metrics_path:
+            write_atomic(metrics_path, json.dumps(asdict(metrics), indent=2).encode("utf-8"))
+
+        if rounds is None or metrics.checks < rounds:
+            time.sleep(interval)
+
+    return metrics
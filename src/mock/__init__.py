@@ -0,0 +1,10 @@
+"""
+The mock of the Mastodon API driven by the generated OpenAPI spec.
+"""
+
+from .examples import ExampleBuilder
+from .payloads import PayloadGenerator
+from .server import MockApp
+from .server import serve
+
+__all__ = ["ExampleBuilder", "MockApp", "PayloadGenerator", "serve"]
@@ -0,0 +1,96 @@
+from typing import Any
+
+from src.openapi_spec import OneOfObject
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import SchemaObject
+
+SCHEMA_REF = "#/components/schemas/"
+
+# the kind of the string by the format of the schema, see TYPE_FORMATS of the components
+STRING_FORMATS = {
+    "int64": "id",
+    "date-time": "timestamp",
+    "date": "date",
+    "uri": "url",
+    "email": "email",
+    "html": "html",
+    "iso-639-1": "language",
+}
+
+# the example of the string by its kind
+STRING_EXAMPLES = {
+    "id": "1",
+    "timestamp": "2024-01-01T00:00:00.000Z",
+    "date": "2024-01-01",
+    "url": "https://mastodon.example/",
+    "email": "user@mastodon.example",
+    "html": "<p>mastodon</p>",
+    "language": "en",
+}
+
+
+def string_kind(name: str, fmt: str | None = None) -> str | None:
+    """the kind of the string by its format, the name of the property is the guess when no format is known"""
+    if fmt in STRING_FORMATS:
+        return STRING_FORMATS[fmt]
+    if name == "id" or name.endswith("_id"):
+        return "id"
+    if name.endswith("_at"):
+        return "timestamp"
+    if name in ("url", "uri") or name.endswith("_url") or name.startswith(("avatar", "header")):
+        return "url"
+    if name in ("content", "note"):
+        return "html"
+    return None
+
+
+class ExampleBuilder:
+    """
+    Build the schema-conformant example value of the schema, the referenced schema is resolved from
+    the components and the recursive reference (e.g. Account.moved) is broken by null.
+    """
+
+    def __init__(self, schemas: dict[str, SchemaObject | OneOfObject | ReferenceObject] | None):
+        self.schemas = schemas or {}
+
+    def build(self, schema: SchemaObject | OneOfObject | ReferenceObject | None, name: str = "") -> Any:
+        return self._build(schema, name, ())
+
+    def _build(self, schema, name: str, stack: tuple[str, ...]) -> Any:
+        match schema:
+            case ReferenceObject():
+                ref = schema.ref.removeprefix(SCHEMA_REF)
+                if ref in stack or ref not in self.schemas:
+                    return None
+                return self._build(self.schemas[ref], name, (*stack, ref))
+            case OneOfObject():
+                return self._build(schema.oneOf[0], name, stack) if schema.oneOf else None
+            case SchemaObject():
+                return self.build_schema(schema, name, stack)
+            case _:
+                return None
+
+    def build_schema(self, schema: SchemaObject, name: str, stack: tuple[str, ...]) -> Any:
+        types = schema.type if isinstance(schema.type, list) else [schema.type]
+        typ = next((typ for typ in types if typ != "null"), "null")
+
+        match typ:
+            case "object":
+                return {key: self._build(prop, key, stack) for key, prop in (schema.properties or {}).items()}
+            case "array":
+                item = self._build(schema.items, name, stack) if schema.items else None
+                return [] if item is None else [item]
+            case "string":
+                return schema.enum[0] if schema.enum else self.build_string(name, schema.format)
+            case "integer":
+                return 0
+            case "number" | "float":
+                return 0.0
+            case "boolean":
+                return False
+            case _:
+                return None
+
+    def build_string(self, name: str, fmt: str | None = None) -> str:
+        """the plausible string by the format of the schema, or else by the name of the property"""
+        return STRING_EXAMPLES.get(string_kind(name, fmt)) or name or "string"
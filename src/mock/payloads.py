@@ -0,0 +1,245 @@
+import json
+import random
+from collections.abc import Callable
+from datetime import UTC
+from datetime import datetime
+from functools import cache
+from itertools import accumulate
+from typing import Any
+from typing import TextIO
+
+from src.openapi_spec import OneOfObject
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import SchemaObject
+
+from .examples import SCHEMA_REF
+from .examples import string_kind
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is the optional payloads extra
+    np = None
+
+# the producer of the column with the n values of the schema
+Producer = Callable[[int], list[Any]]
+
+WORDS = ["mastodon", "fediverse", "toot", "boost", "instance", "timeline", "hashtag", "federation"]
+
+LANGUAGES = ["en", "de", "fr", "ja", "es"]
+
+# the ratio of the null in the nullable field, and the max length of the array
+NULL_RATE = 0.1
+MAX_ITEMS = 4
+
+# the created_at of the generated payloads is within 2020-01-01 ~ 2025-01-01
+EPOCH = (1577836800, 1735689600)
+
+
+class Columns:
+    """The random columns by the standard library"""
+
+    def __init__(self, seed: int | None = None):
+        self.random = random.Random(seed)
+
+    def integers(self, n: int, low: int, high: int) -> list[int]:
+        # NOTE - scale the random float instead of randrange, which is several times slower per value
+        uniform, span = self.random.random, high - low
+        return [low + int(uniform() * span) for _ in range(n)]
+
+    def floats(self, n: int) -> list[float]:
+        return [self.random.random() for _ in range(n)]
+
+    def booleans(self, n: int, p: float = 0.5) -> list[bool]:
+        uniform = self.random.random
+        return [uniform() < p for _ in range(n)]
+
+    def choice(self, n: int, options: list[Any]) -> list[Any]:
+        return self.random.choices(options, k=n)
+
+    def timestamps(self, n: int) -> list[str]:
+        days = [self.date(day) for day in self.integers(n, EPOCH[0] // 86400, EPOCH[1] // 86400)]
+        seconds = self.integers(n, 0, 86400)
+        return [
+            f"{day}T{s // 3600:02}:{s // 60 % 60:02}:{s % 60:02}.000Z" for day, s in zip(days, seconds, strict=True)
+        ]
+
+    @staticmethod
+    @cache
+    def date(day: int) -> str:
+        return datetime.fromtimestamp(day * 86400, UTC).strftime("%Y-%m-%d")
+
+
+class NumpyColumns(Columns):
+    """The random columns generated in bulk by NumPy"""
+
+    def __init__(self, seed: int | None = None):
+        self.rng = np.random.default_rng(seed)
+
+    def integers(self, n: int, low: int, high: int) -> list[int]:
+        return self.rng.integers(low, high, n).tolist()
+
+    def floats(self, n: int) -> list[float]:
+        return self.rng.random(n).tolist()
+
+    def booleans(self, n: int, p: float = 0.5) -> list[bool]:
+        return (self.rng.random(n) < p).tolist()
+
+    def choice(self, n: int, options: list[Any]) -> list[Any]:
+        return [options[index] for index in self.rng.integers(0, len(options), n).tolist()]
+
+    def timestamps(self, n: int) -> list[str]:
+        seconds = self.rng.integers(*EPOCH, n).astype("datetime64[s]")
+        return np.char.add(np.datetime_as_string(seconds, unit="ms"), "Z").tolist()
+
+
+class PayloadGenerator:
+    """
+    Generate the synthetic payloads of the component schemas, e.g. millions of Status for the
+    benchmark of the consumers.
+
+    each schema is compiled once into the producer which generates the whole batch column by column,
+    the object is zipped from the columns of its properties and the array items are generated as
+    one flattened column. The generation is reproducible by the seed, and NumPy is used for the
+    columns when installed.
+    """
+
+    def __init__(
+        self,
+        schemas: dict[str, SchemaObject | OneOfObject | ReferenceObject] | None,
+        seed: int | None = None,
+        use_numpy: bool = True,
+    ):
+        self.schemas = schemas or {}
+        self.columns = NumpyColumns(seed) if use_numpy and np is not None else Columns(seed)
+        self.producers: dict[tuple[str, tuple[str, ...]], Producer] = {}
+
+    def producer(self, name: str) -> Producer:
+        """the producer of the component schema"""
+        if name not in self.schemas:
+            raise KeyError(f"unknown schema {name}")
+        return self.compile(ReferenceObject.model_validate({"$ref": f"{SCHEMA_REF}{name}"}), "", ())
+
+    def generate(self, name: str, count: int) -> list[Any]:
+        return self.producer(name)(count)
+
+    def write_jsonl(self, file: TextIO, name: str, count: int, batch_size: int = 10000) -> int:
+        """write the count payloads of the schema as JSON lines, return the number of lines written"""
+        produce = self.producer(name)
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+
+        for start in range(0, count, batch_size):
+            rows = produce(min(batch_size, count - start))
+            file.write("\n".join(map(encode, rows)))
+            file.write("\n")
+        return count
+
+    def compile(self, schema, name: str, stack: tuple[str, ...]) -> Producer:
+        match schema:
+            case ReferenceObject():
+                ref = schema.ref.removeprefix(SCHEMA_REF)
+                if ref in stack or ref not in self.schemas:
+                    # break the recursive reference (e.g. Account.moved) by null
+                    return self.constant(None)
+
+                key = (ref, stack)
+                if key not in self.producers:
+                    self.producers[key] = self.compile(self.schemas[ref], name, (*stack, ref))
+                return self.producers[key]
+            case OneOfObject():
+                return self.compile_one_of([self.compile(option, name, stack) for option in schema.oneOf])
+            case SchemaObject():
+                return self.compile_schema(schema, name, stack)
+            case _:
+                return self.constant(None)
+
+    def compile_schema(self, schema: SchemaObject, name: str, stack: tuple[str, ...]) -> Producer:
+        types = schema.type if isinstance(schema.type, list) else [schema.type]
+        typ = next((typ for typ in types if typ != "null"), "null")
+
+        match typ:
+            case "object":
+                properties = [(key, self.compile(prop, key, stack)) for key, prop in (schema.properties or {}).items()]
+                produce = self.compile_object(properties)
+            case "array":
+                produce = self.compile_array(self.compile(schema.items, name, stack) if schema.items else None)
+            case "string" if schema.enum:
+                produce = lambda n: self.columns.choice(n, schema.enum)  # noqa: E731
+            case "string":
+                produce = self.compile_string(name, schema.format)
+            case "integer":
+                produce = lambda n: self.columns.integers(n, 0, 1000)  # noqa: E731
+            case "number" | "float":
+                produce = self.columns.floats
+            case "boolean":
+                produce = self.columns.booleans
+            case _:
+                return self.constant(None)
+
+        return self.compile_nullable(produce) if "null" in types else produce
+
+    def compile_object(self, properties: list[tuple[str, Producer]]) -> Producer:
+        keys = [key for key, _ in properties]
+
+        def produce(n: int) -> list[dict[str, Any]]:
+            if not keys:
+                return [{} for _ in range(n)]
+
+            columns = [produce_column(n) for _, produce_column in properties]
+            return [dict(zip(keys, values, strict=True)) for values in zip(*columns, strict=True)]
+
+        return produce
+
+    def compile_array(self, item: Producer | None) -> Producer:
+        if item is None:
+            return lambda n: [[] for _ in range(n)]
+
+        def produce(n: int) -> list[list[Any]]:
+            lengths = self.columns.integers(n, 0, MAX_ITEMS + 1)
+            items = item(sum(lengths))
+            return [items[end - length : end] for length, end in zip(lengths, accumulate(lengths), strict=True)]
+
+        return produce
+
+    def compile_one_of(self, options: list[Producer]) -> Producer:
+        if not options:
+            return self.constant(None)
+
+        def produce(n: int) -> list[Any]:
+            picks = self.columns.integers(n, 0, len(options))
+            values = [iter(option(picks.count(index))) for index, option in enumerate(options)]
+            return [next(values[pick]) for pick in picks]
+
+        return produce
+
+    def compile_nullable(self, produce_value: Producer) -> Producer:
+        def produce(n: int) -> list[Any]:
+            nulls = self.columns.booleans(n, NULL_RATE)
+            values = iter(produce_value(n - sum(nulls)))
+            return [None if null else next(values) for null in nulls]
+
+        return produce
+
+    def compile_string(self, name: str, fmt: str | None = None) -> Producer:
+        """the plausible string column by the format of the schema, or else by the name of the property"""
+        columns = self.columns
+        match string_kind(name, fmt):
+            case "id":
+                return lambda n: list(map(str, columns.integers(n, 10**17, 10**18)))
+            case "timestamp":
+                return columns.timestamps
+            case "date":
+                return lambda n: [timestamp[:10] for timestamp in columns.timestamps(n)]
+            case "url":
+                return lambda n: [f"https://mastodon.example/@{word}" for word in columns.choice(n, WORDS)]
+            case "email":
+                return lambda n: [f"{word}@mastodon.example" for word in columns.choice(n, WORDS)]
+            case "html":
+                return lambda n: [f"<p>{word}</p>" for word in columns.choice(n, WORDS)]
+            case "language":
+                return lambda n: columns.choice(n, LANGUAGES)
+            case _:
+                return lambda n: columns.choice(n, WORDS)
+
+    @staticmethod
+    def constant(value: Any) -> Producer:
+        return lambda n: [value] * n
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import os
+import random
+import socket
+from dataclasses import dataclass
+from dataclasses import field
+from http import HTTPStatus
+
+from loguru import logger
+
+from src.openapi_spec import HeaderObject
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import Operation
+from src.openapi_spec import PaginationObject
+from src.openapi_spec import ReferenceObject
+from src.openapi_spec import ResponseObject
+from src.openapi_spec.routing import PathIndex
+
+from .examples import ExampleBuilder
+
+
+def render(status: int, body: bytes, content_type: str = "application/json", headers: bytes = b"") -> bytes:
+    """the full HTTP/1.1 response"""
+    return b"".join(
+        [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n".encode(),
+            f"Content-Type: {content_type}; charset=utf-8\r\nContent-Length: {len(body)}\r\n".encode(),
+            headers,
+            b"\r\n",
+            body,
+        ]
+    )
+
+
+@dataclass
+class Route:
+    """The pre-rendered responses of the operation"""
+
+    template: str
+    method: str
+    status: int
+    body: bytes
+    content_type: str
+    headers: bytes = b""
+    pagination: PaginationObject | None = None
+    errors: list[bytes] = field(default_factory=list)
+    rendered: bytes = b""
+
+    def __post_init__(self):
+        self.rendered = render(self.status, self.body, self.content_type, self.headers)
+
+    def respond(self, target: str, host: str) -> bytes:
+        if not self.pagination:
+            return self.rendered
+
+        # the next page is older than the max_id, and the previous page is newer than the min_id/since_id
+        url, cursors = f"http://{host}{target.split('?', 1)[0]}", self.pagination.cursors
+        links = [f'<{url}?max_id=1>; rel="next"'] if "max_id" in cursors else []
+        links += [f'<{url}?{cursor}=1>; rel="prev"' for cursor in ("min_id", "since_id") if cursor in cursors][:1]
+        header = f"{self.pagination.header}: {', '.join(links)}\r\n"
+        return render(self.status, self.body, self.content_type, self.headers + header.encode())
+
+
+class MockApp:
+    """
+    The mock Mastodon API, the routes are built from the paths of the spec and the body of each
+    operation is pre-rendered from its success response.
+
+    the latency delays every response, and the error rate injects one of the documented error
+    responses of the operation.
+    """
+
+    def __init__(self, spec: OpenAPI, latency: float = 0.0, error_rate: float = 0.0, seed: int | None = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        schemas = spec.components.schemas if spec.components else {}
+        self.headers = (spec.components.headers if spec.components else None) or {}
+        self.examples = ExampleBuilder(schemas)
+        self.index: PathIndex[dict[str, Route]] = PathIndex()
+        for path, path_item in spec.paths.root.items():
+            routes = {method.upper(): self.route(path, method, op) for method, op in path_item.root.items()}
+            self.index.add(path, routes)
+
+        self.not_found = render(404, b'{"error":"Record not found"}')
+        self.method_not_allowed = render(405, b'{"error":"Method not allowed"}')
+        self.cache: dict[str, tuple[str, dict[str, Route], dict] | None] = {}
+
+        logger.info(f"mock {len(self.index)} paths with {latency=} {error_rate=}")
+
+    def route(self, path: str, method: str, operation: Operation) -> Route:
+        responses = operation.responses.root if operation.responses else {}
+        success = sorted(code for code in responses if 200 <= code < 300)
+        status = success[0] if success else 200
+
+        body, content_type, headers = b"", "application/json", b""
+        if (response := responses.get(status)) and not isinstance(response, ReferenceObject):
+            headers = self.render_headers(response)
+            for content_type, media in (response.content or {}).items():
+                if content_type == "application/json":
+                    example = self.examples.build(media.schema_object)
+                    body = json.dumps(example, separators=(",", ":")).encode()
+                break
+
+        errors = []
+        for code, response in sorted(responses.items()):
+            if code < 400 or isinstance(response, ReferenceObject):
+                continue
+            message = json.dumps({"error": response.description or HTTPStatus(code).phrase}, separators=(",", ":"))
+            errors.append(render(code, message.encode(), headers=self.render_headers(response)))
+
+        return Route(
+            template=path,
+            method=method.upper(),
+            status=status,
+            body=body,
+            content_type=content_type,
+            headers=headers,
+            pagination=operation.pagination,
+            errors=errors,
+        )
+
+    def render_headers(self, response: ResponseObject) -> bytes:
+        """the documented headers of the response, by the example value of the header"""
+        lines = []
+        for name, header in (response.headers or {}).items():
+            if isinstance(header, ReferenceObject):
+                header = self.headers.get(header.ref.removeprefix("#/components/headers/"))
+            if not isinstance(header, HeaderObject):
+                continue
+
+            value = header.example if header.example is not None else self.examples.build(header.schema_object, name)
+            lines.append(f"{name}: {value}\r\n")
+        return "".join(lines).encode()
+
+    def match(self, path: str):
+        if path not in self.cache:
+            if len(self.cache) > 65536:
+                self.cache.clear()
+            self.cache[path] = self.index.match(path)
+        return self.cache[path]
+
+    def respond(self, method: str, target: str, host: str = "localhost") -> bytes:
+        if not (matched := self.match(target.split("?", 1)[0])):
+            return self.not_found
+
+        _, routes, _ = matched
+        if not (route := routes.get(method)):
+            return self.method_not_allowed
+
+        if self.error_rate and route.errors and self.random.random() < self.error_rate:
+            return self.random.choice(route.errors)
+        return route.respond(target, host)
+
+
+class MockProtocol(asyncio.Protocol):
+    """The minimal HTTP/1.1 server with keep-alive and pipelining, the request body is skipped"""
+
+    def __init__(self, app: MockApp):
+        self.app = app
+        self.buffer = b""
+        self.skip = 0
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        if self.skip:
+            skipped = min(self.skip, len(data))
+            self.skip -= skipped
+            data = data[skipped:]
+
+        self.buffer += data
+        while (end := self.buffer.find(b"\r\n\r\n")) >= 0:
+            head, self.buffer = self.buffer[:end].decode("latin-1"), self.buffer[end + 4 :]
+            request_line, *lines = head.split("\r\n")
+            try:
+                method, target, _ = request_line.split(" ", 2)
+            except ValueError:
+                self.transport.write(render(400, b'{"error":"Bad request"}'))
+                self.transport.close()
+                return
+
+            headers = {}
+            for line in lines:
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length") or 0)
+            skipped = min(length, len(self.buffer))
+            self.buffer, self.skip = self.buffer[skipped:], length - skipped
+
+            response = self.app.respond(method, target, headers.get("host", "localhost"))
+            close = headers.get("connection", "").lower() == "close"
+            self.write(response, close)
+
+    def write(self, response: bytes, close: bool):
+        if self.app.latency:
+            loop = asyncio.get_running_loop()
+            loop.call_later(self.app.latency, self.send, response, close)
+        else:
+            self.send(response, close)
+
+    def send(self, response: bytes, close: bool):
+        if self.transport.is_closing():
+            return
+
+        self.transport.write(response)
+        if close:
+            self.transport.close()
+
+
+async def start(app: MockApp, host: str, port: int, reuse_port: bool = False):
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: MockProtocol(app), host, port, reuse_port=reuse_port, backlog=4096)
+    logger.info(f"mock server listening on {host}:{port} (pid={os.getpid()})")
+    async with server:
+        await server.serve_forever()
+
+
+def run(app: MockApp, host: str, port: int, reuse_port: bool = False):
+    try:
+        import uvloop
+
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(start(app, host, port, reuse_port))
+
+
+def serve(app: MockApp, host: str = "127.0.0.1", port: int = 8080, workers: int = 1):
+    """serve the mock, the workers share the port by SO_REUSEPORT"""
+    if workers <= 1 or not hasattr(socket, "SO_REUSEPORT"):
+        run(app, host, port)
+        return
+
+    children = []
+    for _ in range(workers):
+        if (pid := os.fork()) == 0:
+            run(app, host, port, reuse_port=True)
+            os._exit(0)
+        children.append(pid)
+
+    for pid in children:
+        os.waitpid(pid, 0)
@@ -0,0 +1,122 @@
+import io
+import json
+import re
+
+import pytest
+import yaml
+
+from src.mock import PayloadGenerator
+from src.mock.examples import ExampleBuilder
+from src.mock.payloads import NumpyColumns
+from src.openapi_spec import Component
+
+COMPONENTS = """
+schemas:
+  Account:
+    properties:
+      id:
+        type: string
+      created_at:
+        type: string
+      note:
+        type:
+        - string
+        - 'null'
+      fields:
+        items:
+          $ref: '#/components/schemas/Field'
+        type: array
+      moved:
+        $ref: '#/components/schemas/Account'
+    type: object
+  Field:
+    properties:
+      name:
+        type: string
+      verified_at:
+        type:
+        - string
+        - 'null'
+    type: object
+  Profile:
+    properties:
+      website:
+        format: uri
+        type: string
+      contact:
+        format: email
+        type: string
+      birthday:
+        format: date
+        type: string
+      edited:
+        format: date-time
+        type: string
+      language:
+        format: iso-639-1
+        type: string
+      visibility:
+        enum:
+        - public
+        - private
+        type: string
+    type: object
+"""
+
+
+class TestPayloadGenerator:
+    def setup_method(self):
+        self.schemas = Component.model_validate(yaml.safe_load(COMPONENTS)).schemas
+
+    def test_generate(self):
+        accounts = PayloadGenerator(self.schemas, seed=42).generate("Account", 500)
+
+        assert len(accounts) == 500
+        assert all(account.keys() == {"id", "created_at", "note", "fields", "moved"} for account in accounts)
+        assert all(account["id"].isdigit() and account["created_at"].endswith(".000Z") for account in accounts)
+        # the recursive reference is broken by null, and the nullable field is sometimes null
+        assert all(account["moved"] is None for account in accounts)
+        assert None in {account["note"] for account in accounts}
+        assert all(isinstance(account["note"], str) for account in accounts if account["note"] is not None)
+
+        fields = [field for account in accounts for field in account["fields"]]
+        assert fields and all(field.keys() == {"name", "verified_at"} for field in fields)
+
+    def test_generate_format(self):
+        profiles = PayloadGenerator(self.schemas, seed=3).generate("Profile", 50)
+
+        # the format of the schema decides the string, whatever the property is named
+        assert all(profile["website"].startswith("https://") for profile in profiles)
+        assert all(profile["contact"].endswith("@mastodon.example") for profile in profiles)
+        assert all(re.fullmatch(r"\d{4}-\d{2}-\d{2}", profile["birthday"]) for profile in profiles)
+        assert all(profile["edited"].endswith(".000Z") for profile in profiles)
+        assert all(len(profile["language"]) == 2 for profile in profiles)
+        assert {profile["visibility"] for profile in profiles} == {"public", "private"}
+
+        assert ExampleBuilder(self.schemas).build(self.schemas["Profile"]) == {
+            "website": "https://mastodon.example/",
+            "contact": "user@mastodon.example",
+            "birthday": "2024-01-01",
+            "edited": "2024-01-01T00:00:00.000Z",
+            "language": "en",
+            "visibility": "public",
+        }
+
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_reproducible(self, use_numpy):
+        if use_numpy:
+            pytest.importorskip("numpy")
+        generator = PayloadGenerator(self.schemas, seed=7, use_numpy=use_numpy)
+        assert isinstance(generator.columns, NumpyColumns) is use_numpy
+
+        assert generator.generate("Account", 100) == PayloadGenerator(
+            self.schemas, seed=7, use_numpy=use_numpy
+        ).generate("Account", 100)
+
+    def test_write_jsonl(self):
+        file = io.StringIO()
+        assert PayloadGenerator(self.schemas, seed=1).write_jsonl(file, "Field", 25, batch_size=10) == 25
+
+        lines = file.getvalue().splitlines()
+        assert len(lines) == 25
+        assert all(json.loads(line).keys() == {"name", "verified_at"} for line in lines)
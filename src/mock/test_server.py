@@ -0,0 +1,116 @@
+import json
+
+import yaml
+
+from src.mock import MockApp
+from src.openapi_spec import OpenAPI
+
+SPEC = """
+info:
+  title: Mastodon OpenAPI API
+  version: 0.1.0
+openapi: 3.1.0
+paths:
+  /api/v1/accounts/{:id}:
+    get:
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                $ref: '#/components/schemas/Account'
+          description: Account
+          headers:
+            X-RateLimit-Limit:
+              $ref: '#/components/headers/X-RateLimit-Limit'
+        404:
+          description: Account is suspended
+        429:
+          description: Too many requests
+          headers:
+            Retry-After:
+              $ref: '#/components/headers/Retry-After'
+  /api/v1/timelines/home:
+    get:
+      parameters:
+      - in: query
+        name: max_id
+        schema:
+          type: string
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                items:
+                  $ref: '#/components/schemas/Account'
+                type: array
+          description: Home timeline
+      x-pagination:
+        cursors:
+        - max_id
+        defaultLimit: 20
+        maxLimit: 40
+components:
+  headers:
+    Retry-After:
+      example: 300
+      schema:
+        type: integer
+    X-RateLimit-Limit:
+      example: 300
+      schema:
+        type: integer
+  schemas:
+    Account:
+      properties:
+        id:
+          type: string
+        created_at:
+          type: string
+        moved:
+          $ref: '#/components/schemas/Account'
+      type: object
+"""
+
+
+def split(response: bytes) -> tuple[str, dict[str, str], bytes]:
+    head, body = response.split(b"\r\n\r\n", 1)
+    status, *lines = head.decode().split("\r\n")
+    return status, dict(line.split(": ", 1) for line in lines), body
+
+
+class TestMockApp:
+    def setup_method(self):
+        self.spec = OpenAPI.model_validate(yaml.safe_load(SPEC))
+
+    def test_respond(self):
+        app = MockApp(self.spec)
+
+        status, headers, body = split(app.respond("GET", "/api/v1/accounts/123"))
+        assert status == "HTTP/1.1 200 OK"
+        assert int(headers["Content-Length"]) == len(body)
+        assert headers["X-RateLimit-Limit"] == "300"
+        assert json.loads(body) == {"id": "1", "created_at": "2024-01-01T00:00:00.000Z", "moved": None}
+
+        status, headers, body = split(app.respond("GET", "/api/v1/timelines/home?limit=1", "mock:8080"))
+        assert status == "HTTP/1.1 200 OK"
+        assert 'rel="next"' in headers["Link"] and "http://mock:8080/api/v1/timelines/home" in headers["Link"]
+        assert len(json.loads(body)) == 1
+
+        assert split(app.respond("GET", "/api/v1/statuses/1"))[0] == "HTTP/1.1 404 Not Found"
+        assert split(app.respond("DELETE", "/api/v1/accounts/123"))[0] == "HTTP/1.1 405 Method Not Allowed"
+
+    def test_error_rate(self):
+        app = MockApp(self.spec, error_rate=1.0, seed=42)
+
+        errors = [split(app.respond("GET", "/api/v1/accounts/123")) for _ in range(20)]
+        assert {status for status, _, _ in errors} == {"HTTP/1.1 404 Not Found", "HTTP/1.1 429 Too Many Requests"}
+        for status, headers, body in errors:
+            if status == "HTTP/1.1 429 Too Many Requests":
+                assert headers["Retry-After"] == "300"
+            else:
+                assert json.loads(body) == {"error": "Account is suspended"}
+
+        # the operation without the documented error is never failed
+        assert split(app.respond("GET", "/api/v1/timelines/home"))[0] == "HTTP/1.1 200 OK"
@@ -6,15 +6,21 @@ from .basic import Contact
 from .basic import Info
 from .basic import License
 from .component import Component
+from .loader import load_spec
+from .loader import save_snapshot
 from .path import Operation
 from .path import PathItem
 from .path import Paths
 from .path import Responses
 from .types import BuildInType
+from .types import DiscriminatorObject
+from .types import HeaderObject
 from .types import MediaTypeObject
 from .types import OneOfObject
+from .types import PaginationObject
 from .types import ParameterIn
 from .types import ParameterObject
+from .types import PresenceDiscriminatorObject
 from .types import ReferenceObject
 from .types import ResponseObject
 from .types import SchemaObject
@@ -46,6 +52,7 @@ __all__ = list(
         "Operation",
         "Responses",
         "MediaTypeObject",
+        "HeaderObject",
         "ResponseObject",
         "ReferenceObject",
         "SchemaObject",
@@ -56,5 +63,10 @@ __all__ = list(
         "SecuritySchemeObject",
         "SecurityRequirementObject",
         "OneOfObject",
+        "DiscriminatorObject",
+        "PresenceDiscriminatorObject",
+        "PaginationObject",
+        "load_spec",
+        "save_snapshot",
     }
 )
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from .types import HeaderObject
+from .types import OneOfObject
 from .types import ReferenceObject
 from .types import ResponseObject
 from .types import SchemaObject
@@ -14,5 +16,6 @@ class Component(BaseModel):
     """
 
     responses: dict[str, ResponseObject | ReferenceObject] = {}
-    schemas: dict[str, SchemaObject] | None = None
+    schemas: dict[str, SchemaObject | OneOfObject | ReferenceObject] | None = None
     securitySchemes: dict[str, SecuritySchemeObject] | None = None
+    headers: dict[str, HeaderObject | ReferenceObject] | None = None
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from collections.abc import Iterator
+
+from pydantic import BaseModel
+from pydantic import RootModel
+
+from .component import Component
+from .path import PathItem
+from .path import Paths
+from .types import ReferenceObject
+
+COMPONENTS_REF = "#/components/"
+
+# the sections of the components which are referenced by $ref
+SECTIONS = ("schemas", "responses", "headers")
+
+
+def iter_refs(obj) -> Iterator[str]:
+    """iterate the $ref of all the reference objects in the model"""
+    match obj:
+        case ReferenceObject():
+            yield obj.ref
+        case RootModel():
+            yield from iter_refs(obj.root)
+        case BaseModel():
+            for name in type(obj).model_fields:
+                yield from iter_refs(getattr(obj, name))
+        case dict():
+            for value in obj.values():
+                yield from iter_refs(value)
+        case list():
+            for value in obj:
+                yield from iter_refs(value)
+
+
+class RefGraph:
+    """
+    The dependency graph of the components by their $ref, e.g. #/components/schemas/Status depends
+    on #/components/schemas/Account.
+
+    the graph is walked once when built, the reachable components of every component are
+    precomputed by the strongly connected components (the recursive Account.moved is one of them),
+    so the reachability of any set of operations is the union of the precomputed sets.
+    """
+
+    def __init__(self, paths: Paths, components: Component | None):
+        self.edges: dict[str, set[str]] = {}
+        for section in SECTIONS:
+            for name, obj in (getattr(components, section, None) or {}).items():
+                self.edges[f"{COMPONENTS_REF}{section}/{name}"] = set(iter_refs(obj))
+
+        # the direct $ref and the tags of each operation, by the (METHOD, path)
+        self.operations: dict[tuple[str, str], set[str]] = {}
+        self.tags: dict[tuple[str, str], set[str]] = {}
+        for path, path_item in paths.root.items():
+            for method, operation in path_item.root.items():
+                self.operations[method.upper(), path] = set(iter_refs(operation))
+                self.tags[method.upper(), path] = set(operation.tags or ())
+
+        self.reachable = self.closure()
+
+    def closure(self) -> dict[str, frozenset[str]]:
+        """the reachable components of each component (itself included) by Tarjan's algorithm"""
+        index: dict[str, int] = {}
+        lowlink: dict[str, int] = {}
+        stack: list[str] = []
+        on_stack: set[str] = set()
+        reachable: dict[str, frozenset[str]] = {}
+
+        def visit(node: str):
+            index[node] = lowlink[node] = len(index)
+            stack.append(node)
+            on_stack.add(node)
+            for ref in self.edges.get(node, ()):
+                if ref not in self.edges:
+                    continue
+                if ref not in index:
+                    visit(ref)
+                    lowlink[node] = min(lowlink[node], lowlink[ref])
+                elif ref in on_stack:
+                    lowlink[node] = min(lowlink[node], index[ref])
+
+            if lowlink[node] != index[node]:
+                return
+
+            # the root of the strongly connected component, whose successors are all resolved
+            members = set()
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                members.add(member)
+                if member == node:
+                    break
+
+            closed = set(members)
+            for member in members:
+                for ref in self.edges[member]:
+                    if ref in reachable:
+                        closed |= reachable[ref]
+            closed = frozenset(closed)
+            for member in members:
+                reachable[member] = closed
+
+        for node in self.edges:
+            if node not in index:
+                visit(node)
+        return reachable
+
+    def reach(self, refs: Iterable[str]) -> set[str]:
+        """the components reachable from the $ref"""
+        found = set()
+        for ref in refs:
+            found |= self.reachable.get(ref, ())
+        return found
+
+    def select(self, operations: Iterable[str] = (), tags: Iterable[str] = ()) -> set[tuple[str, str]]:
+        """
+        the (METHOD, path) of the operations by the `METHOD path` or `path` (all the methods of the
+        path), and of all the operations of the tags
+        """
+        wanted, tags = set(operations), set(tags)
+        return {
+            (method, path)
+            for method, path in self.operations
+            if f"{method} {path}" in wanted or path in wanted or tags & self.tags[method, path]
+        }
+
+    def subset(self, operations: set[tuple[str, str]]) -> set[str]:
+        """the components reachable from the operations"""
+        return self.reach(ref for key in operations for ref in self.operations.get(key, ()))
+
+
+def subset_spec(spec, operations: Iterable[str] = (), tags: Iterable[str] = (), graph: RefGraph | None = None):
+    """the minimal spec with only the selected operations and the components they reach transitively"""
+    graph = graph or RefGraph(spec.paths, spec.components)
+    selected = graph.select(operations, tags)
+    reachable = graph.subset(selected)
+
+    paths = {}
+    for path, path_item in spec.paths.root.items():
+        kept = {method: op for method, op in path_item.root.items() if (method.upper(), path) in selected}
+        if kept:
+            paths[path] = PathItem(kept)
+
+    components = None
+    if spec.components:
+        sections = {
+            section: {
+                name: obj
+                for name, obj in (getattr(spec.components, section) or {}).items()
+                if f"{COMPONENTS_REF}{section}/{name}" in reachable
+            }
+            for section in SECTIONS
+        }
+        components = spec.components.model_copy(
+            update={
+                "schemas": sections["schemas"] or None,
+                "responses": sections["responses"],
+                "headers": sections["headers"] or None,
+            }
+        )
+
+    return spec.model_copy(update={"paths": Paths(paths), "components": components})
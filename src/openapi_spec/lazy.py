@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from . import OpenAPI
+from .basic import Info
+from .component import Component
+from .path import PathItem
+from .types import HeaderObject
+from .types import OneOfObject
+from .types import ReferenceObject
+from .types import ResponseObject
+from .types import SchemaObject
+from .types import SecuritySchemeObject
+
+
+class LazyMapping[T](Mapping[str, T]):
+    """
+    The read-only mapping over the raw document, which validates the value into the model only
+    when it is first accessed and caches the validated model.
+    """
+
+    def __init__(self, raw: dict[str, Any] | None, validate: Callable[[Any], T]):
+        self.raw = raw or {}
+        self.validate = validate
+        self.cache: dict[str, T] = {}
+
+    def __getitem__(self, key: str) -> T:
+        if key not in self.cache:
+            self.cache[key] = self.validate(self.raw[key])
+        return self.cache[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.raw)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.raw
+
+    def materialize(self) -> dict[str, T]:
+        return {key: self[key] for key in self}
+
+
+class LazyComponent:
+    """The lazy Component, the schemas and responses are validated on access"""
+
+    def __init__(self, raw: dict[str, Any]):
+        self.raw = raw
+        self.schemas: LazyMapping[SchemaObject | OneOfObject | ReferenceObject] = LazyMapping(
+            raw.get("schemas"), TypeAdapter(SchemaObject | OneOfObject | ReferenceObject).validate_python
+        )
+        self.responses: LazyMapping[ResponseObject | ReferenceObject] = LazyMapping(
+            raw.get("responses"), TypeAdapter(ResponseObject | ReferenceObject).validate_python
+        )
+        self.securitySchemes: LazyMapping[SecuritySchemeObject] = LazyMapping(
+            raw.get("securitySchemes"), SecuritySchemeObject.model_validate
+        )
+        self.headers: LazyMapping[HeaderObject | ReferenceObject] = LazyMapping(
+            raw.get("headers"), TypeAdapter(HeaderObject | ReferenceObject).validate_python
+        )
+
+    def materialize(self) -> Component:
+        return Component(
+            responses=self.responses.materialize(),
+            schemas=self.schemas.materialize() if "schemas" in self.raw else None,
+            securitySchemes=self.securitySchemes.materialize() if "securitySchemes" in self.raw else None,
+            headers=self.headers.materialize() if "headers" in self.raw else None,
+        )
+
+
+class LazyOpenAPI:
+    """
+    The OpenAPI document which only indexes the top-level paths and components, each PathItem and
+    SchemaObject is validated when it is first accessed.
+    """
+
+    def __init__(self, raw: dict[str, Any]):
+        self.raw = raw
+        self.openapi: str = raw.get("openapi", "3.1.0")
+        self.info = Info.model_validate(raw["info"])
+        self.paths: LazyMapping[PathItem] = LazyMapping(raw.get("paths"), PathItem.model_validate)
+        self.components = LazyComponent(raw["components"]) if raw.get("components") is not None else None
+
+    def operations(self, tag: str) -> Iterator[tuple[str, str, Any]]:
+        """list the (path, method, Operation) of the tag, only the matched PathItem is validated"""
+        for path, raw in self.paths.raw.items():
+            if any(tag in (operation.get("tags") or []) for operation in raw.values()):
+                for method, operation in self.paths[path].root.items():
+                    if tag in (operation.tags or []):
+                        yield path, method, operation
+
+    def materialize(self) -> OpenAPI:
+        return OpenAPI(
+            openapi=self.openapi,
+            info=self.info,
+            paths=self.paths.materialize(),
+            components=self.components.materialize() if self.components else None,
+        )
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pydantic
+
+if TYPE_CHECKING:
+    from . import OpenAPI
+    from .lazy import LazyOpenAPI
+
+# bump the version when the model changes and the old snapshot cannot be unpickled
+SNAPSHOT_VERSION = 8
+
+
+def snapshot_path(path: str | Path, raw: bool = False) -> Path:
+    """the default location of the snapshot (or the raw document snapshot), next to the YAML spec"""
+    path = Path(path)
+    return path.with_name(f"{path.name}.raw.snapshot" if raw else f"{path.name}.snapshot")
+
+
+def raw_snapshot_path(snapshot: str | Path) -> Path:
+    """the raw document snapshot of the given snapshot path, e.g. spec.snapshot -> spec.raw.snapshot"""
+    snapshot = Path(snapshot)
+    return snapshot.with_name(f"{snapshot.stem}.raw{snapshot.suffix}")
+
+
+def snapshot_header(digest: str) -> dict:
+    return {"version": SNAPSHOT_VERSION, "pydantic": pydantic.VERSION, "digest": digest}
+
+
+def save_snapshot(spec: OpenAPI | dict, path: str | Path, digest: str):
+    """
+    Save the validated OpenAPI model (or the raw document) as the binary snapshot, the digest is
+    the SHA-256 of the YAML spec the model built from and invalidates the snapshot when the YAML
+    changes.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as file:
+        pickle.dump(snapshot_header(digest), file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(spec, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_snapshot[T](path: str | Path, digest: str, kind: type[T]) -> T | None:
+    """
+    Load the snapshot when it matches the version and the YAML digest, otherwise return None.
+
+    the snapshot is the pickle and must only be loaded from the trusted location.
+    """
+    try:
+        with open(path, "rb") as file:
+            if pickle.load(file) != snapshot_header(digest):
+                return None
+            spec = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+    return spec if isinstance(spec, kind) else None
+
+
+def load_spec(
+    path: str | Path,
+    snapshot: str | Path | None = None,
+    use_snapshot: bool = True,
+    lazy: bool = False,
+) -> OpenAPI | LazyOpenAPI:
+    """
+    Load the OpenAPI spec from the YAML file.
+
+    the binary snapshot is preferred when it is built from the same YAML, otherwise the YAML is
+    parsed by the libyaml CSafeLoader (when available) and the snapshot is refreshed.
+
+    the lazy mode returns the LazyOpenAPI from the raw document snapshot, which validates each
+    PathItem and SchemaObject only when it is first accessed.
+    """
+    import yaml
+
+    from . import OpenAPI
+    from .lazy import LazyOpenAPI
+
+    data = Path(path).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if snapshot is None:
+        snapshot = snapshot_path(path, raw=lazy)
+    elif lazy:
+        # the lazy and the eager mode pickle the different objects, keep them apart
+        snapshot = raw_snapshot_path(snapshot)
+    kind = dict if lazy else OpenAPI
+
+    if use_snapshot and (spec := load_snapshot(snapshot, digest, kind)) is not None:
+        return LazyOpenAPI(spec) if lazy else spec
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    document = yaml.load(data, Loader=loader)
+    spec = document if lazy else OpenAPI.model_validate(document)
+
+    if use_snapshot:
+        try:
+            save_snapshot(spec, snapshot, digest)
+        except OSError:
+            # the read-only location, the snapshot is only the cache
+            pass
+
+    return LazyOpenAPI(spec) if lazy else spec
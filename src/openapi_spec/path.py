@@ -1,6 +1,8 @@
 from pydantic import BaseModel
+from pydantic import Field
 from pydantic import RootModel
 
+from .types import PaginationObject
 from .types import ParameterObject
 from .types import ReferenceObject
 from .types import ResponseObject
@@ -29,6 +31,9 @@ class Operation(BaseModel):
     parameters: list[ParameterObject | ReferenceObject] | None = None
     responses: Responses | None = None
     security: list[SecurityRequirementObject] | None = None
+    pagination: PaginationObject | None = Field(None, alias="x-pagination")
+    added_in: str | None = Field(None, alias="x-added-in")
+    changed_in: list[str] | None = Field(None, alias="x-changed-in")
 
 
 class PathItem(RootModel[dict[str, Operation]]):
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from dataclasses import field
+
+# the path parameter in the template, e.g. /api/v1/accounts/{:id}
+PARAMETER = re.compile(r"^\{(:?\w+)\}$")
+
+
+@dataclass
+class Node[T]:
+    """The node of the segment trie, the static segments are tried before the parameter"""
+
+    static: dict[str, Node[T]] = field(default_factory=dict)
+    param: Node[T] | None = None
+
+    # the template ends at the node, and the names of its path parameters
+    template: str | None = None
+    names: list[str] = field(default_factory=list)
+    value: T | None = None
+
+
+class PathIndex[T]:
+    """
+    The index of the path templates, which matches the request path segment by segment instead of
+    scanning the regular expression of each template.
+
+    the static segment wins over the parameter, e.g. /api/v1/accounts/verify_credentials is not
+    matched as /api/v1/accounts/{:id}.
+    """
+
+    def __init__(self):
+        self.root: Node[T] = Node()
+        self.size = 0
+
+    def add(self, template: str, value: T):
+        node, names = self.root, []
+        for segment in template.strip("/").split("/"):
+            if matched := PARAMETER.match(segment):
+                names.append(matched.group(1))
+                node.param = node.param or Node()
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, Node())
+
+        self.size += node.template is None
+        node.template, node.names, node.value = template, names, value
+
+    def match(self, path: str) -> tuple[str, T, dict[str, str]] | None:
+        """return the (template, value, path parameters) of the request path, or None"""
+        segments = path.split("?", 1)[0].strip("/").split("/")
+        values: list[str] = []
+        if node := self._match(self.root, segments, 0, values):
+            return node.template, node.value, dict(zip(node.names, values, strict=True))
+        return None
+
+    def _match(self, node: Node[T], segments: list[str], index: int, values: list[str]) -> Node[T] | None:
+        if index == len(segments):
+            return node if node.template is not None else None
+
+        segment = segments[index]
+        if (child := node.static.get(segment)) and (found := self._match(child, segments, index + 1, values)):
+            return found
+
+        if node.param and segment:
+            values.append(segment)
+            if found := self._match(node.param, segments, index + 1, values):
+                return found
+            values.pop()
+
+        return None
+
+    def __len__(self) -> int:
+        return self.size
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from .graph import COMPONENTS_REF
+from .graph import SECTIONS
+from .graph import iter_refs
+from .types import OneOfObject
+from .types import ParameterObject
+from .types import ResponseObject
+from .types import SchemaObject
+
+# bump the version when the tables change and the old index must be rebuilt
+INDEX_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS units (unit TEXT PRIMARY KEY, digest TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    unit TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    method TEXT,
+    path TEXT,
+    tags TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS entries_unit ON entries (unit);
+CREATE INDEX IF NOT EXISTS entries_location ON entries (location);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    name, location, description, tags, content='entries', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, name, location, description, tags)
+    VALUES (new.id, new.name, new.location, new.description, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, name, location, description, tags)
+    VALUES ('delete', old.id, old.name, old.location, old.description, old.tags);
+END;
+-- the direct $ref of the unit: the operation returns or takes it, the component has it
+CREATE TABLE IF NOT EXISTS refs (unit TEXT NOT NULL, target TEXT NOT NULL, relation TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS refs_unit ON refs (unit);
+CREATE INDEX IF NOT EXISTS refs_target ON refs (target, relation);
+"""
+
+# the units which (transitively) have the target, walked up from the target by the 'has' relation
+REACHED_BY = """
+WITH RECURSIVE up(unit) AS (
+    SELECT value FROM json_each(?)
+    UNION SELECT refs.unit FROM refs JOIN up ON refs.target = up.unit WHERE refs.relation = 'has'
+)
+SELECT DISTINCT refs.unit FROM refs JOIN up ON refs.target = up.unit WHERE refs.relation = ?
+"""
+
+# the filters of the query, e.g. `returns:Account.moved takes:limit tag:accounts kind:operation`
+FILTER = re.compile(r"\b(kind|tag|returns|takes):(\S+)")
+
+# the rank of the match by the column, the name outweighs the description
+WEIGHTS = "10.0, 5.0, 1.0, 2.0"
+
+
+@dataclass(frozen=True)
+class Entry:
+    """The searchable item of the spec, the operation, the parameter, the schema or the property"""
+
+    kind: str
+    name: str
+    location: str
+    method: str | None = None
+    path: str | None = None
+    tags: str = ""
+    description: str = ""
+
+
+@dataclass(frozen=True)
+class Hit:
+    kind: str
+    location: str
+    name: str
+    description: str
+
+    def __str__(self) -> str:
+        summary = self.description.splitlines()[0] if self.description else ""
+        return f"{self.kind:<9} {self.location}" + (f"  # {summary}" if summary else "")
+
+
+@dataclass
+class IndexStats:
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.added} added, {self.changed} changed, {self.removed} removed, {self.unchanged} unchanged"
+
+
+def unit_digest(obj: BaseModel) -> str:
+    return hashlib.sha256(obj.model_dump_json(by_alias=True, exclude_none=True).encode()).hexdigest()
+
+
+def iter_properties(schema, location: str) -> Iterator[Entry]:
+    """the properties of the schema and of its nested objects, located by the dotted path"""
+    match schema:
+        case OneOfObject():
+            for choice in schema.oneOf:
+                yield from iter_properties(choice, location)
+        case SchemaObject():
+            for name, prop in (schema.properties or {}).items():
+                yield Entry("property", name, f"{location}.{name}", description=prop.description or "")
+                yield from iter_properties(prop, f"{location}.{name}")
+            if schema.items:
+                yield from iter_properties(schema.items, location)
+
+
+def iter_units(spec) -> Iterator[tuple[str, BaseModel, list[Entry], list[tuple[str, str]]]]:
+    """the (unit, model, entries, refs) of each operation and each component of the spec"""
+    for path, path_item in spec.paths.root.items():
+        for method, operation in path_item.root.items():
+            location = f"{method.upper()} {path}"
+            tags = " ".join(operation.tags or ())
+            returns = [
+                response.description
+                for response in (operation.responses.root if operation.responses else {}).values()
+                if isinstance(response, ResponseObject) and response.description
+            ]
+            description = "\n".join(filter(None, [operation.description, *returns]))
+            entries = [
+                Entry("operation", operation.summary or location, location, method.upper(), path, tags, description)
+            ]
+            for param in operation.parameters or ():
+                if isinstance(param, ParameterObject):
+                    entries.append(
+                        Entry("parameter", param.name, location, method.upper(), path, tags, param.description or "")
+                    )
+
+            refs = [(ref, "returns") for ref in iter_refs(operation.responses)]
+            refs += [(ref, "takes") for ref in iter_refs(operation.parameters)]
+            yield location, operation, entries, refs
+
+    for section in SECTIONS:
+        for name, obj in (getattr(spec.components, section, None) or {}).items():
+            entries = []
+            if section == "schemas":
+                description = getattr(obj, "description", None) or ""
+                entries = [Entry("schema", name, name, description=description), *iter_properties(obj, name)]
+            yield f"{COMPONENTS_REF}{section}/{name}", obj, entries, [(ref, "has") for ref in iter_refs(obj)]
+
+
+def match_expression(text: str) -> str:
+    """the FTS5 query of the free text, each term is the quoted phrase, e.g. Account.moved"""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class SearchIndex:
+    """
+    The SQLite full-text index of the operations, the parameters, the schemas and their properties,
+    with the $ref between them, so the query like `returns:Account.moved` answers which operations
+    return the property, directly or nested in another entity.
+
+    each operation and each component is one unit of the index keyed by its digest, so the update
+    only replaces the units which changed since the last update.
+    """
+
+    def __init__(self, path: str | Path):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        if self.meta("version") != str(INDEX_VERSION):
+            self.clear()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> SearchIndex:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def meta(self, key: str) -> str | None:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row and row[0]
+
+    def set_meta(self, key: str, value: str):
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def clear(self):
+        with self.connection:
+            for table in ("units", "entries", "refs", "meta"):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.set_meta("version", str(INDEX_VERSION))
+
+    def update(self, spec, digest: str | None = None) -> IndexStats:
+        """replace the changed units of the spec, the digest is the one of the spec file if known"""
+        stats = IndexStats()
+        indexed = dict(self.connection.execute("SELECT unit, digest FROM units"))
+        seen = set()
+
+        with self.connection:
+            for unit, obj, entries, refs in iter_units(spec):
+                seen.add(unit)
+                if (unit_hash := unit_digest(obj)) == indexed.get(unit):
+                    stats.unchanged += 1
+                    continue
+
+                if unit in indexed:
+                    stats.changed += 1
+                    self.delete(unit)
+                else:
+                    stats.added += 1
+                self.connection.execute("INSERT INTO units (unit, digest) VALUES (?, ?)", (unit, unit_hash))
+                self.connection.executemany(
+                    "INSERT INTO entries (unit, kind, name, location, method, path, tags, description) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(unit, e.kind, e.name, e.location, e.method, e.path, e.tags, e.description) for e in entries],
+                )
+                self.connection.executemany(
+                    "INSERT INTO refs (unit, target, relation) VALUES (?, ?, ?)",
+                    [(unit, target, relation) for target, relation in refs],
+                )
+
+            for unit in indexed.keys() - seen:
+                stats.removed += 1
+                self.delete(unit)
+            self.set_meta("digest", digest or "")
+
+        return stats
+
+    def delete(self, unit: str):
+        for table in ("units", "entries", "refs"):
+            self.connection.execute(f"DELETE FROM {table} WHERE unit = ?", (unit,))
+
+    def reached_by(self, location: str, relation: str) -> set[str]:
+        """the operations which return (or take) the schema or the property at the location, e.g. Account.moved"""
+        rows = self.connection.execute(
+            "SELECT DISTINCT unit FROM entries WHERE location = ? AND kind IN ('schema', 'property')", (location,)
+        )
+        units = [unit for (unit,) in rows]
+        if not units:
+            return set()
+
+        rows = self.connection.execute(REACHED_BY, (json.dumps(units), relation))
+        return {unit for (unit,) in rows}
+
+    def search(self, query: str, limit: int = 20) -> list[Hit]:
+        """
+        Search the index by the free text and the filters, e.g. `returns:Account.moved`,
+        `takes:max_id tag:timelines` or `kind:property moved`.
+        """
+        filters: dict[str, list[str]] = {}
+        for key, value in FILTER.findall(query):
+            filters.setdefault(key, []).append(value)
+        text = FILTER.sub("", query).strip()
+
+        conditions, params = [], []
+        for relation in ("returns", "takes"):
+            for value in filters.get(relation, ()):
+                if relation == "takes":
+                    rows = self.connection.execute(
+                        "SELECT DISTINCT unit FROM entries WHERE kind = 'parameter' AND name = ?", (value,)
+                    )
+                    operations = [unit for (unit,) in rows]
+                else:
+                    operations = sorted(self.reached_by(value, relation))
+                conditions.append("entries.unit IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps(operations))
+                # the operations are the answer of the relation, unless the kind is given
+                filters.setdefault("kind", ["operation"])
+
+        if kinds := filters.get("kind"):
+            conditions.append(f"entries.kind IN ({', '.join('?' * len(kinds))})")
+            params += kinds
+        for tag in filters.get("tag", ()):
+            conditions.append("(' ' || entries.tags || ' ') LIKE ?")
+            params.append(f"% {tag} %")
+
+        if text:
+            sql = (
+                "SELECT entries.kind, entries.location, entries.name, entries.description FROM entries_fts "
+                "JOIN entries ON entries.id = entries_fts.rowid WHERE entries_fts MATCH ?"
+                + "".join(f" AND {condition}" for condition in conditions)
+                + f" ORDER BY bm25(entries_fts, {WEIGHTS}) LIMIT ?"
+            )
+            params = [match_expression(text), *params]
+        else:
+            sql = (
+                "SELECT kind, location, name, description FROM entries"
+                + (" WHERE " + " AND ".join(conditions) if conditions else "")
+                + " ORDER BY location, name LIMIT ?"
+            )
+
+        return [Hit(*row) for row in self.connection.execute(sql, (*params, limit))]
+
+
+def build_index(spec_path: str | Path, index_path: str | Path) -> IndexStats | None:
+    """update the index of the spec file, None when the spec is not changed since the last update"""
+    from .loader import load_spec
+
+    digest = hashlib.sha256(Path(spec_path).read_bytes()).hexdigest()
+    with SearchIndex(index_path) as index:
+        if index.meta("digest") == digest:
+            return None
+        return index.update(load_spec(spec_path), digest)
@@ -0,0 +1,82 @@
+from src.openapi_spec import OpenAPI
+from src.openapi_spec.graph import RefGraph
+from src.openapi_spec.graph import subset_spec
+
+
+def schema_ref(name: str) -> dict:
+    return {"$ref": f"#/components/schemas/{name}"}
+
+
+SPEC = OpenAPI.model_validate(
+    {
+        "info": {"title": "test", "version": "1.0"},
+        "paths": {
+            "/api/v1/statuses/{:id}": {
+                "get": {"tags": ["statuses"], "responses": {200: {"$ref": "#/components/responses/Status"}}},
+                "delete": {"tags": ["statuses"], "responses": {200: {"description": "ok"}}},
+            },
+            "/api/v1/instance": {
+                "get": {"tags": ["instance"], "responses": {200: {"$ref": "#/components/responses/Instance"}}},
+            },
+        },
+        "components": {
+            "responses": {
+                "Status": {"description": "Status", "content": {"application/json": {"schema": schema_ref("Status")}}},
+                "Instance": {
+                    "description": "Instance",
+                    "content": {"application/json": {"schema": schema_ref("Rule")}},
+                },
+            },
+            "schemas": {
+                "Status": {
+                    "type": "object",
+                    "properties": {"account": schema_ref("Account"), "reblog": schema_ref("Status")},
+                },
+                "Account": {
+                    "type": "object",
+                    "properties": {
+                        "moved": schema_ref("Account"),
+                        "fields": {"type": "array", "items": schema_ref("Field")},
+                    },
+                },
+                "Field": {"type": "object", "properties": {}},
+                "Rule": {"type": "object", "properties": {}},
+            },
+        },
+    }
+)
+
+
+class TestRefGraph:
+    def test_reachable(self):
+        graph = RefGraph(SPEC.paths, SPEC.components)
+
+        assert graph.reachable["#/components/schemas/Account"] == {
+            "#/components/schemas/Account",
+            "#/components/schemas/Field",
+        }
+        assert graph.reachable["#/components/responses/Status"] == {
+            "#/components/responses/Status",
+            "#/components/schemas/Status",
+            "#/components/schemas/Account",
+            "#/components/schemas/Field",
+        }
+        assert graph.reachable["#/components/schemas/Rule"] == {"#/components/schemas/Rule"}
+
+    def test_select(self):
+        graph = RefGraph(SPEC.paths, SPEC.components)
+
+        assert graph.select(["GET /api/v1/statuses/{:id}"]) == {("GET", "/api/v1/statuses/{:id}")}
+        assert graph.select(["/api/v1/statuses/{:id}"]) == {
+            ("GET", "/api/v1/statuses/{:id}"),
+            ("DELETE", "/api/v1/statuses/{:id}"),
+        }
+        assert graph.select(tags=["instance"]) == {("GET", "/api/v1/instance")}
+
+    def test_subset_spec(self):
+        spec = subset_spec(SPEC, tags=["statuses"])
+
+        assert list(spec.paths.root) == ["/api/v1/statuses/{:id}"]
+        assert set(spec.components.responses) == {"Status"}
+        assert set(spec.components.schemas) == {"Status", "Account", "Field"}
+        assert SPEC.components.schemas.keys() == {"Status", "Account", "Field", "Rule"}
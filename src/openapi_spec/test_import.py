@@ -0,0 +1,53 @@
+import re
+import subprocess
+import sys
+
+import pytest
+
+# the crawler stack, which the spec consumers never need
+GENERATOR_MODULES = {"requests", "bs4", "yaml", "loguru"}
+
+# the cumulative import time budget in microseconds, measured by -X importtime, the models take
+# ~0.15-0.2s and the eager crawler stack would add ~0.2s more, the lazy package itself ~1ms
+IMPORT_TIME_BUDGET = {
+    "src.openapi_spec": 300_000,
+    "src.handler": 50_000,
+}
+
+
+def import_time(module: str) -> dict[str, int]:
+    """import the module in the fresh interpreter and return the cumulative import time per module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if matched := re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line):
+            cumulative, _, name = matched.groups()
+            times[name] = int(cumulative)
+    return times
+
+
+class TestImportTime:
+    @pytest.mark.parametrize("module", IMPORT_TIME_BUDGET)
+    def test_import_without_generator(self, module):
+        times = import_time(module)
+
+        assert module in times
+        assert not GENERATOR_MODULES & times.keys()
+        assert times[module] < IMPORT_TIME_BUDGET[module]
+
+    @pytest.mark.parametrize("module", IMPORT_TIME_BUDGET)
+    def test_generator_modules_not_loaded(self, module):
+        result = subprocess.run(
+            [sys.executable, "-c", f"import sys, {module}; print(' '.join(sorted(sys.modules)))"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert not GENERATOR_MODULES & set(result.stdout.split())
@@ -0,0 +1,83 @@
+import yaml
+
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import PathItem
+from src.openapi_spec import load_spec
+from src.openapi_spec.lazy import LazyOpenAPI
+from src.openapi_spec.loader import snapshot_path
+
+SPEC = """
+info:
+  title: Mastodon OpenAPI API
+  version: 0.1.0
+openapi: 3.1.0
+paths:
+  /api/v1/accounts/{:id}:
+    get:
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                $ref: '#/components/schemas/Account'
+          description: Account
+"""
+
+
+class TestLoadSpec:
+    def test_load_spec(self, tmp_path, mocker):
+        path = tmp_path / "mastodon-openapi.yaml"
+        path.write_text(SPEC)
+
+        spec = load_spec(path)
+        assert isinstance(spec, OpenAPI)
+        assert "/api/v1/accounts/{:id}" in spec.paths.root
+        assert snapshot_path(path).exists()
+
+        # the snapshot is preferred and the YAML is not parsed again
+        parser = mocker.spy(yaml, "load")
+        assert load_spec(path) == spec
+        assert parser.call_count == 0
+
+    def test_invalidate_snapshot(self, tmp_path):
+        path = tmp_path / "mastodon-openapi.yaml"
+        path.write_text(SPEC)
+        load_spec(path)
+
+        path.write_text(SPEC.replace("/api/v1/accounts/{:id}", "/api/v2/accounts/{:id}"))
+        spec = load_spec(path)
+
+        assert "/api/v2/accounts/{:id}" in spec.paths.root
+        assert "/api/v1/accounts/{:id}" not in spec.paths.root
+
+    def test_load_spec_lazy(self, tmp_path):
+        path = tmp_path / "mastodon-openapi.yaml"
+        path.write_text(SPEC)
+
+        spec = load_spec(path, lazy=True)
+        assert isinstance(spec, LazyOpenAPI)
+        assert list(spec.paths) == ["/api/v1/accounts/{:id}"]
+        assert spec.paths.cache == {}
+
+        # only the accessed PathItem is validated, and the validated model is cached
+        path_item = spec.paths["/api/v1/accounts/{:id}"]
+        assert isinstance(path_item, PathItem)
+        assert spec.paths["/api/v1/accounts/{:id}"] is path_item
+
+        assert load_spec(path, lazy=True).materialize() == load_spec(path)
+
+    def test_explicit_snapshot(self, tmp_path, mocker):
+        path = tmp_path / "mastodon-openapi.yaml"
+        path.write_text(SPEC)
+        snapshot = tmp_path / "cache" / "spec.snapshot"
+        snapshot.parent.mkdir()
+
+        # the lazy and the eager mode keep their own snapshot of the explicit path
+        spec = load_spec(path, snapshot=snapshot)
+        assert isinstance(load_spec(path, snapshot=snapshot, lazy=True), LazyOpenAPI)
+        assert sorted(file.name for file in snapshot.parent.iterdir()) == ["spec.raw.snapshot", "spec.snapshot"]
+
+        parser = mocker.spy(yaml, "load")
+        assert load_spec(path, snapshot=snapshot) == spec
+        assert load_spec(path, snapshot=snapshot, lazy=True).materialize() == spec
+        assert parser.call_count == 0
@@ -0,0 +1,24 @@
+from src.openapi_spec.routing import PathIndex
+
+
+class TestPathIndex:
+    def test_match(self):
+        index = PathIndex()
+        index.add("/api/v1/accounts/{:id}", "account")
+        index.add("/api/v1/accounts/verify_credentials", "verify")
+        index.add("/api/v1/accounts/{:id}/statuses", "statuses")
+
+        assert len(index) == 3
+        assert index.match("/api/v1/accounts/verify_credentials") == (
+            "/api/v1/accounts/verify_credentials",
+            "verify",
+            {},
+        )
+        assert index.match("/api/v1/accounts/123/statuses?limit=2") == (
+            "/api/v1/accounts/{:id}/statuses",
+            "statuses",
+            {":id": "123"},
+        )
+        assert index.match("/api/v1/accounts/123")[2] == {":id": "123"}
+        assert index.match("/api/v1/accounts") is None
+        assert index.match("/api/v1/accounts/123/followers") is None
@@ -0,0 +1,91 @@
+from src.openapi_spec import OpenAPI
+from src.openapi_spec.search import SearchIndex
+from src.openapi_spec.search import build_index
+
+SPEC = {
+    "info": {"title": "test", "version": "1.0"},
+    "paths": {
+        "/api/v1/bookmarks": {
+            "get": {
+                "tags": ["bookmarks"],
+                "summary": "View bookmarked statuses",
+                "parameters": [{"name": "max_id", "in": "query", "schema": {"type": "string"}}],
+                "responses": {
+                    "200": {
+                        "description": "Array of Status",
+                        "content": {
+                            "application/json": {
+                                "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Status"}}
+                            }
+                        },
+                    }
+                },
+            },
+        },
+        "/api/v1/apps": {
+            "post": {
+                "tags": ["apps"],
+                "summary": "Create an application",
+                "responses": {"200": {"$ref": "#/components/responses/Application"}},
+            },
+        },
+    },
+    "components": {
+        "responses": {
+            "Application": {
+                "description": "Represents an application",
+                "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Application"}}},
+            },
+        },
+        "schemas": {
+            "Account": {
+                "type": "object",
+                "description": "Represents a user of Mastodon",
+                "properties": {
+                    "moved": {"$ref": "#/components/schemas/Account", "description": "The new account"},
+                    "source": {"type": "object", "properties": {"privacy": {"type": "string"}}},
+                },
+            },
+            "Status": {
+                "type": "object",
+                "properties": {"account": {"$ref": "#/components/schemas/Account"}},
+            },
+            "Application": {"type": "object", "properties": {"name": {"type": "string"}}},
+        },
+    },
+}
+
+
+class TestSearch:
+    def test_search(self, tmp_path):
+        with SearchIndex(tmp_path / "spec.db") as index:
+            index.update(OpenAPI.model_validate(SPEC))
+
+            assert [hit.location for hit in index.search("returns:Account.moved")] == ["GET /api/v1/bookmarks"]
+            assert [hit.location for hit in index.search("returns:Application")] == ["POST /api/v1/apps"]
+            assert index.search("returns:Account.missing") == []
+            assert [hit.location for hit in index.search("takes:max_id")] == ["GET /api/v1/bookmarks"]
+            assert [hit.location for hit in index.search("Account.source.privacy")] == ["Account.source.privacy"]
+            assert [hit.kind for hit in index.search("kind:parameter tag:bookmarks")] == ["parameter"]
+            assert index.search("tag:apps application")[0].location == "POST /api/v1/apps"
+
+    def test_incremental(self, tmp_path):
+        with SearchIndex(tmp_path / "spec.db") as index:
+            stats = index.update(OpenAPI.model_validate(SPEC))
+            assert (stats.added, stats.changed, stats.removed) == (6, 0, 0)
+
+            spec = OpenAPI.model_validate(SPEC)
+            spec.components.schemas["Account"].properties.pop("moved")
+            del spec.paths.root["/api/v1/apps"]
+            stats = index.update(spec)
+
+            assert (stats.added, stats.changed, stats.removed, stats.unchanged) == (0, 1, 1, 4)
+            assert index.search("returns:Account.moved") == []
+            assert index.search("kind:operation application") == []
+
+    def test_build_index(self, tmp_path):
+        spec = tmp_path / "spec.yaml"
+        spec.write_text(OpenAPI.model_validate(SPEC).model_dump_json(by_alias=True, exclude_none=True))
+
+        assert build_index(spec, tmp_path / "spec.db").added == 6
+        assert build_index(spec, tmp_path / "spec.db") is None
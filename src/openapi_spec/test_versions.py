@@ -0,0 +1,70 @@
+import pytest
+
+from src.openapi_spec import OpenAPI
+from src.openapi_spec.versions import parse_version
+from src.openapi_spec.versions import spec_for_version
+
+SPEC = OpenAPI.model_validate(
+    {
+        "info": {"title": "test", "version": "1.0"},
+        "paths": {
+            "/api/v1/accounts/{:id}/statuses": {
+                "get": {
+                    "x-added-in": "0.0.0",
+                    "x-changed-in": ["2.8.0"],
+                    "parameters": [
+                        {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+                        {"name": "tagged", "in": "query", "schema": {"type": "string"}, "x-added-in": "2.8.0"},
+                    ],
+                },
+            },
+            "/api/v1/accounts": {"get": {"x-added-in": "4.3.0"}},
+        },
+        "components": {
+            "schemas": {
+                "Account": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string", "x-added-in": "0.1.0"},
+                        "uri": {"type": "string", "x-added-in": "4.2.0"},
+                        "moved": {"$ref": "#/components/schemas/Account", "x-added-in": "2.1.0"},
+                    },
+                    "required": ["id", "uri"],
+                },
+            },
+        },
+    }
+)
+
+
+class TestVersions:
+    def test_parse_version(self):
+        assert parse_version("4.3.0") == (4, 3, 0)
+        assert parse_version("v4.3.0-beta1") == (4, 3, 0)
+        assert parse_version("4.10.0") > parse_version("4.9.1")
+        # the short form of the batch label is the same as the full version
+        assert parse_version("4.2") == parse_version("v4.2") == (4, 2, 0)
+        assert parse_version("4.2") >= parse_version("4.2.0")
+        with pytest.raises(ValueError):
+            parse_version("latest")
+
+    def test_spec_for_version(self):
+        spec = spec_for_version(SPEC, "2.0.0")
+
+        assert list(spec.paths.root) == ["/api/v1/accounts/{:id}/statuses"]
+        operation = spec.paths.root["/api/v1/accounts/{:id}/statuses"].root["get"]
+        assert [param.name for param in operation.parameters] == ["limit"]
+
+        account = spec.components.schemas["Account"]
+        assert list(account.properties) == ["id"]
+        assert account.required == ["id"]
+
+        # the spec is not changed, and everything is available on the newer version
+        assert len(SPEC.components.schemas["Account"].properties) == 3
+        assert spec_for_version(SPEC, "4.3.0") == SPEC
+
+    def test_spec_for_short_version(self):
+        spec = spec_for_version(SPEC, "v4.2")
+
+        assert list(spec.components.schemas["Account"].properties) == ["id", "uri", "moved"]
+        assert "/api/v1/accounts" not in spec.paths.root
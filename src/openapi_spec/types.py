@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from enum import StrEnum
 from enum import auto
+from typing import Any
 
 from pydantic import BaseModel
 from pydantic import Field
@@ -33,9 +34,14 @@ class SchemaObject(BaseModel):
 
     type: str | list[str]
     description: str | None = None
+    format: str | None = None
+    enum: list[str] | None = None
     items: SchemaObject | ReferenceObject | None = None
     properties: dict[str, SchemaObject | ReferenceObject] | None = None
+    required: list[str] | None = None
     additionalProperties: bool | None = None
+    added_in: str | None = Field(None, alias="x-added-in")
+    changed_in: list[str] | None = Field(None, alias="x-changed-in")
 
 
 class MediaTypeObject(BaseModel):
@@ -59,6 +65,14 @@ class ReferenceObject(BaseModel):
 
     ref: str = Field(..., alias="$ref")
     description: str | None = None
+    # the version metadata of the property, the sibling of the $ref is allowed in the schema of 3.1
+    added_in: str | None = Field(None, alias="x-added-in")
+    changed_in: list[str] | None = Field(None, alias="x-changed-in")
+
+    # the type the reference is collapsed from, and the type text which is not compiled, reported by the
+    # dangling-refs pass and not serialized
+    _collapsed: str | None = None
+    _unknown: str | None = None
 
 
 class ResponseObject(BaseModel):
@@ -70,13 +84,51 @@ class ResponseObject(BaseModel):
     """
 
     description: str
+    headers: dict[str, HeaderObject | ReferenceObject] | None = None
     content: dict[str, MediaTypeObject] | None = None
 
 
+class HeaderObject(BaseModel):
+    """
+    Describes a single header of the response.
+
+    ref: https://swagger.io/specification/#header-object
+    """
+
+    description: str | None = None
+    required: bool | None = None
+    schema_object: SchemaObject = Field(..., alias="schema")
+    example: Any | None = None
+
+
+class DiscriminatorObject(BaseModel):
+    """
+    The property which tells the choice of the oneOf, and the mapping of its value to the schema.
+
+    ref: https://swagger.io/specification/#discriminator-object
+    """
+
+    propertyName: str
+    mapping: dict[str, str] | None = None
+
+
+class PresenceDiscriminatorObject(BaseModel):
+    """
+    The x-discriminator-presence extension of the oneOf which has no common property to
+    discriminate by, the choice is the schema of the first mapped property present in the payload
+    (e.g. scheduled_at -> ScheduledStatus), or the default schema when none is present.
+    """
+
+    mapping: dict[str, str]
+    default: str | None = None
+
+
 class OneOfObject(BaseModel):
     """The choice of the object type"""
 
-    oneOf: list[ReferenceObject]
+    oneOf: list[SchemaObject | ReferenceObject]
+    discriminator: DiscriminatorObject | None = None
+    presence: PresenceDiscriminatorObject | None = Field(None, alias="x-discriminator-presence")
 
 
 class ParameterObject(BaseModel):
@@ -92,6 +144,20 @@ class ParameterObject(BaseModel):
     required: bool | None = None
     deprecated: bool | None = None
     schema_object: SchemaObject = Field(..., alias="schema")
+    added_in: str | None = Field(None, alias="x-added-in")
+    changed_in: list[str] | None = Field(None, alias="x-changed-in")
+
+
+class PaginationObject(BaseModel):
+    """
+    The x-pagination extension of the paginated list operation, the page is navigated by the
+    cursor parameters and the next/prev page links are returned in the response header.
+    """
+
+    cursors: list[str]
+    defaultLimit: int | None = None
+    maxLimit: int | None = None
+    header: str = "Link"
 
 
 class SecuritySchemeObject(BaseModel):
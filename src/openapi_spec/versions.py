@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import re
+
+from pydantic import BaseModel
+from pydantic import RootModel
+
+from .path import PathItem
+from .path import Paths
+from .types import ParameterObject
+from .types import ReferenceObject
+from .types import SchemaObject
+
+
+def parse_version(text: str) -> tuple[int, ...]:
+    """the comparable version, e.g. 4.3.0-beta1 is (4, 3, 0) and the short v4.2 is (4, 2, 0)"""
+    if not (matched := re.match(r"^v?(\d+(?:\.\d+)*)", text.strip())):
+        raise ValueError(f"invalid version {text=}")
+    parts = tuple(int(part) for part in matched.group(1).split("."))
+    # pad to major.minor.patch, so 4.2 is not older than 4.2.0
+    return parts + (0,) * (3 - len(parts))
+
+
+def available(obj, version: tuple[int, ...]) -> bool:
+    """the object is available on the server version, when it is not added after the version"""
+    added_in = getattr(obj, "added_in", None)
+    return added_in is None or parse_version(added_in) <= version
+
+
+def prune(obj, version: tuple[int, ...]):
+    """drop the parameters and the schema properties added after the version, in place"""
+    match obj:
+        case SchemaObject() if obj.properties:
+            dropped = {name for name, prop in obj.properties.items() if not available(prop, version)}
+            obj.properties = {name: prop for name, prop in obj.properties.items() if name not in dropped}
+            if obj.required:
+                obj.required = [name for name in obj.required if name not in dropped] or None
+            for name in type(obj).model_fields:
+                prune(getattr(obj, name), version)
+        case ReferenceObject():
+            return
+        case RootModel():
+            prune(obj.root, version)
+        case BaseModel():
+            if isinstance(getattr(obj, "parameters", None), list):
+                obj.parameters = [
+                    param
+                    for param in obj.parameters
+                    if not isinstance(param, ParameterObject) or available(param, version)
+                ]
+            for name in type(obj).model_fields:
+                prune(getattr(obj, name), version)
+        case dict():
+            for value in obj.values():
+                prune(value, version)
+        case list():
+            for value in obj:
+                prune(value, version)
+
+
+def spec_for_version(spec, version: str):
+    """
+    the subset of the spec available on the Mastodon server of the version, by the x-added-in of the
+    operations, the parameters and the schema properties, so the client can gate its calls locally.
+    """
+    target = parse_version(version)
+
+    paths = {}
+    for path, path_item in spec.paths.root.items():
+        kept = {method: op for method, op in path_item.root.items() if available(op, target)}
+        if kept:
+            paths[path] = PathItem(kept)
+
+    spec = spec.model_copy(update={"paths": Paths(paths)}, deep=True)
+    prune(spec, target)
+    return spec
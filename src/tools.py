@@ -1,19 +1,43 @@
 #! /usr/bin/env python
 import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
 
-from src.handler import run
+BASEURL = "https://docs.joinmastodon.org"
+SPEC = "mastodon-openapi.yaml"
 
+# NOTE - the generator is imported in the command, so the --help does not pay for the crawler stack
 
-def main():
-    baseurl = "https://docs.joinmastodon.org"
 
-    parser = argparse.ArgumentParser(description="Mastodon OpenAPI Spec Generator")
-    parser.add_argument("baseurl", default=baseurl, nargs="?", help="The base url of the Mastodon API documentation")
-    parser.add_argument("-o", "--output", help="The output file to write the OpenAPI spec to")
+def build_command(args: argparse.Namespace):
+    from src.handler import build_spec
+    from src.handler import stream_spec
+    from src.handler import to_openapi_spec_text
+    from src.handler import write_artifacts
+    from src.openapi_spec.loader import save_snapshot
+    from src.openapi_spec.loader import snapshot_path
+
+    if (args.minify or args.snapshot) and not args.output:
+        raise SystemExit("--minify and --snapshot require the -o/--output")
+
+    only_tags = set(args.only_tags.split(",")) if args.only_tags else None
+    only_entities = set(args.only_entities.split(",")) if args.only_entities else None
+    selective = only_tags is not None or only_entities is not None
 
-    args = parser.parse_args()
-    text = run(args.baseurl)
+    if not (args.minify or args.snapshot or selective or args.docs_repo):
+        # stream the spec into the output without holding the whole spec in memory
+        match args.output:
+            case None:
+                stream_spec(args.baseurl, sys.stdout)
+            case _:
+                with open(args.output, "w") as file:
+                    stream_spec(args.baseurl, file)
+        return
 
+    spec = build_spec(args.baseurl, only_tags, only_entities, args.docs_repo)
+    text = to_openapi_spec_text(spec)
     match args.output:
         case None:
             print(text)
@@ -21,6 +45,227 @@ def main():
             with open(args.output, "w") as file:
                 file.write(text)
 
+    if args.minify:
+        write_artifacts(spec, args.output, args.strip_descriptions)
+    if args.snapshot:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        save_snapshot(spec, snapshot_path(args.output), digest)
+
+
+def watch_command(args: argparse.Namespace):
+    from src.handler import watch
+
+    watch(args.baseurl, args.output, args.interval, args.metrics, args.rounds)
+
+
+def batch_command(args: argparse.Namespace):
+    from src.handler import Version
+    from src.handler import batch
+
+    batch([Version.parse(source) for source in args.sources], args.output)
+
+
+def mock_server_command(args: argparse.Namespace):
+    from src.mock import MockApp
+    from src.mock import serve
+    from src.openapi_spec import load_spec
+
+    app = MockApp(load_spec(args.spec), args.latency / 1000, args.error_rate, args.seed)
+    serve(app, args.host, args.port, args.workers)
+
+
+def payloads_command(args: argparse.Namespace):
+    from src.mock import PayloadGenerator
+    from src.openapi_spec import load_spec
+
+    spec = load_spec(args.spec)
+    generator = PayloadGenerator(spec.components.schemas if spec.components else None, args.seed)
+    match args.output:
+        case None:
+            generator.write_jsonl(sys.stdout, args.entity, args.count)
+        case _:
+            with open(args.output, "w") as file:
+                generator.write_jsonl(file, args.entity, args.count)
+
+
+def subset_command(args: argparse.Namespace):
+    from src.handler import to_openapi_spec_text
+    from src.openapi_spec import load_spec
+    from src.openapi_spec.graph import subset_spec
+    from src.openapi_spec.versions import spec_for_version
+
+    operations = args.operations.split(",") if args.operations else []
+    tags = args.tags.split(",") if args.tags else []
+    if not (operations or tags or args.server_version):
+        raise SystemExit("subset requires the --operations, the --tags or the --server-version")
+
+    spec = load_spec(args.spec)
+    if args.server_version:
+        spec = spec_for_version(spec, args.server_version)
+    if operations or tags:
+        spec = subset_spec(spec, operations, tags)
+
+    text = to_openapi_spec_text(spec)
+    match args.output:
+        case None:
+            print(text)
+        case _:
+            with open(args.output, "w") as file:
+                file.write(text)
+
+
+def validator_bench_command(args: argparse.Namespace):
+    from src.openapi_spec import load_spec
+    from src.validator.bench import benchmark
+
+    print(benchmark(load_spec(args.spec), args.rounds))
+
+
+def index_command(args: argparse.Namespace):
+    from src.openapi_spec.search import build_index
+
+    stats = build_index(args.spec, args.output or index_path(args.spec))
+    print(f"{args.spec} is not changed since the last index" if stats is None else f"index {args.spec}: {stats}")
+
+
+def search_command(args: argparse.Namespace):
+    from src.openapi_spec.search import SearchIndex
+
+    started = time.perf_counter()
+    with SearchIndex(args.index or index_path(SPEC)) as index:
+        hits = index.search(" ".join(args.query), args.limit)
+
+    for hit in hits:
+        print(hit)
+    print(f"{len(hits)} hits in {(time.perf_counter() - started) * 1000:.1f}ms", file=sys.stderr)
+
+
+def index_path(spec: str) -> str:
+    """the default location of the search index, next to the YAML spec"""
+    return str(Path(spec).with_suffix(".db"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mastodon OpenAPI Spec Generator")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Generate the OpenAPI spec (default)")
+    build_parser.set_defaults(func=build_command)
+    build_parser.add_argument(
+        "baseurl", default=BASEURL, nargs="?", help="The base url of the Mastodon API documentation"
+    )
+    build_parser.add_argument("-o", "--output", help="The output file to write the OpenAPI spec to")
+    build_parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="Also write the minified JSON spec with the .gz/.br siblings and the manifest next to the output",
+    )
+    build_parser.add_argument(
+        "--strip-descriptions",
+        action="store_true",
+        help="Strip the descriptions from the minified JSON spec",
+    )
+    build_parser.add_argument(
+        "--only-tags",
+        help="Only generate the operations of the comma-separated tags, e.g. accounts,statuses",
+    )
+    build_parser.add_argument(
+        "--only-entities",
+        help="Only generate the comma-separated entities, e.g. Account,Status, and the components they reference",
+    )
+    build_parser.add_argument(
+        "--docs-repo",
+        help="Read the Markdown of the local checkout of the mastodon/documentation repository instead of the site",
+    )
+    build_parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Also write the binary snapshot of the OpenAPI model for load_spec next to the output",
+    )
+
+    watch_parser = subparsers.add_parser("watch", help="Regenerate the OpenAPI spec when the docs change")
+    watch_parser.set_defaults(func=watch_command)
+    watch_parser.add_argument(
+        "baseurl", default=BASEURL, nargs="?", help="The base url of the Mastodon API documentation"
+    )
+    watch_parser.add_argument("-o", "--output", required=True, help="The output file to write the OpenAPI spec to")
+    watch_parser.add_argument("-i", "--interval", type=float, default=3600, help="The seconds between two checks")
+    watch_parser.add_argument("--metrics", help="The JSON file to write the metrics of the last check to")
+    watch_parser.add_argument("--rounds", type=int, help="Stop after the number of checks")
+
+    batch_parser = subparsers.add_parser("batch", help="Generate the OpenAPI spec per Mastodon docs version")
+    batch_parser.set_defaults(func=batch_command)
+    batch_parser.add_argument(
+        "sources",
+        nargs="+",
+        help="The [label=]source of each version, the base url, the snapshot bundle or the docs repository, "
+        "oldest first",
+    )
+    batch_parser.add_argument("-o", "--output", required=True, help="The directory to write the specs to")
+
+    mock_parser = subparsers.add_parser("mock-server", help="Serve the mock Mastodon API from the OpenAPI spec")
+    mock_parser.set_defaults(func=mock_server_command)
+    mock_parser.add_argument("spec", default=SPEC, nargs="?", help="The OpenAPI spec to serve")
+    mock_parser.add_argument("--host", default="127.0.0.1", help="The host to listen on")
+    mock_parser.add_argument("-p", "--port", type=int, default=8080, help="The port to listen on")
+    mock_parser.add_argument("--latency", type=float, default=0, help="The milliseconds to delay each response")
+    mock_parser.add_argument(
+        "--error-rate", type=float, default=0, help="The ratio of the requests answered by a documented error"
+    )
+    mock_parser.add_argument("--seed", type=int, help="The seed of the error injection")
+    mock_parser.add_argument("-w", "--workers", type=int, default=1, help="The processes sharing the port")
+
+    payloads_parser = subparsers.add_parser("payloads", help="Generate the synthetic JSONL payloads of the entity")
+    payloads_parser.set_defaults(func=payloads_command)
+    payloads_parser.add_argument("entity", help="The component schema to generate, e.g. Status")
+    payloads_parser.add_argument("spec", default=SPEC, nargs="?", help="The OpenAPI spec of the schemas")
+    payloads_parser.add_argument("-n", "--count", type=int, default=1000, help="The number of payloads")
+    payloads_parser.add_argument("-o", "--output", help="The JSONL file to write the payloads to")
+    payloads_parser.add_argument("--seed", type=int, help="The seed of the generation")
+
+    subset_parser = subparsers.add_parser("subset", help="Emit the minimal spec of the selected operations")
+    subset_parser.set_defaults(func=subset_command)
+    subset_parser.add_argument("spec", default=SPEC, nargs="?", help="The OpenAPI spec to subset")
+    subset_parser.add_argument(
+        "--operations",
+        help="The comma-separated operations, e.g. 'GET /api/v1/accounts/{:id}' or a path for all its methods",
+    )
+    subset_parser.add_argument("--tags", help="The comma-separated tags of the operations, e.g. accounts,statuses")
+    subset_parser.add_argument(
+        "--server-version", help="Only the operations, parameters and properties available on the version, e.g. 4.2.0"
+    )
+    subset_parser.add_argument("-o", "--output", help="The file to write the subset spec to")
+
+    bench_parser = subparsers.add_parser(
+        "validator-bench", help="Measure the per-request overhead of the request validation middleware"
+    )
+    bench_parser.set_defaults(func=validator_bench_command)
+    bench_parser.add_argument("spec", default=SPEC, nargs="?", help="The OpenAPI spec to validate by")
+    bench_parser.add_argument("-r", "--rounds", type=int, default=100, help="The rounds over all the operations")
+
+    index_parser = subparsers.add_parser("index", help="Build or update the full-text search index of the spec")
+    index_parser.set_defaults(func=index_command)
+    index_parser.add_argument("spec", default=SPEC, nargs="?", help="The OpenAPI spec to index")
+    index_parser.add_argument("-o", "--output", help="The SQLite index, defaults to the spec with the .db suffix")
+
+    search_parser = subparsers.add_parser("search", help="Search the operations, parameters and schema properties")
+    search_parser.set_defaults(func=search_command)
+    search_parser.add_argument(
+        "query",
+        nargs="+",
+        help="The free text and the filters, e.g. 'returns:Account.moved', 'takes:max_id tag:timelines'",
+    )
+    search_parser.add_argument("-i", "--index", help="The SQLite index, defaults to the one of the default spec")
+    search_parser.add_argument("-n", "--limit", type=int, default=20, help="The maximum number of hits")
+
+    # the build is the default command, keep the `tools.py [baseurl] -o SPEC` usage
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in {*subparsers.choices, "-h", "--help"}:
+        argv = ["build", *argv]
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,10 @@
+"""
+The request validation compiled from the parameters and the security of the generated OpenAPI spec.
+"""
+
+from .checker import Rejection
+from .checker import RequestValidator
+from .middleware import ValidationMiddleware
+from .middleware import WSGIValidationMiddleware
+
+__all__ = ["Rejection", "RequestValidator", "ValidationMiddleware", "WSGIValidationMiddleware"]
@@ -0,0 +1,67 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+from src.openapi_spec import OpenAPI
+
+from .checker import RequestValidator
+from .middleware import ValidationMiddleware
+
+
+@dataclass
+class BenchResult:
+    requests: int
+    bare: float
+    validated: float
+
+    @property
+    def overhead(self) -> float:
+        """the microseconds added to each request by the middleware"""
+        return (self.validated - self.bare) / self.requests * 1e6
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests: bare {self.bare:.3f}s, validated {self.validated:.3f}s, "
+            f"overhead {self.overhead:.2f}us/request"
+        )
+
+
+def sample_scopes(spec: OpenAPI) -> list[dict]:
+    """one valid request of each operation, the path parameter is filled by 1"""
+    scopes = []
+    for path, path_item in spec.paths.root.items():
+        target = "/".join("1" if segment.startswith("{") else segment for segment in path.split("/"))
+        for method in path_item.root:
+            scopes.append(
+                {
+                    "type": "http",
+                    "method": method.upper(),
+                    "path": target,
+                    "query_string": b"limit=20",
+                    "headers": [(b"host", b"mastodon.example"), (b"authorization", b"Bearer token")],
+                }
+            )
+    return scopes
+
+
+def benchmark(spec: OpenAPI, rounds: int = 100) -> BenchResult:
+    """compare the ASGI app with and without the validation middleware over the sample requests"""
+
+    async def app(scope, receive, send):
+        pass
+
+    async def noop(*_):
+        pass
+
+    async def run(handler, scopes) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for scope in scopes:
+                await handler(scope, noop, noop)
+        return time.perf_counter() - started
+
+    scopes = sample_scopes(spec)
+    middleware = ValidationMiddleware(app, RequestValidator(spec))
+    bare = asyncio.run(run(app, scopes))
+    validated = asyncio.run(run(middleware, scopes))
+    return BenchResult(len(scopes) * rounds, bare, validated)
@@ -0,0 +1,182 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+from urllib.parse import parse_qsl
+
+from loguru import logger
+
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import Operation
+from src.openapi_spec import ParameterIn
+from src.openapi_spec import ParameterObject
+from src.openapi_spec import SchemaObject
+from src.openapi_spec.routing import PathIndex
+
+# the value check of the parameter, True when the raw string is valid
+Check = Callable[[str], bool]
+
+# the lookup of the request header by the lower-case name
+HeaderLookup = Callable[[str], str | None]
+
+# the values Rails casts to the boolean (ActiveModel::Type::Boolean), compared in the lower case
+BOOLEANS = frozenset({"true", "false", "t", "f", "1", "0", "on", "off"})
+
+# the content types which may carry the access_token in the body, which the validator does not read
+FORM_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+
+@dataclass(frozen=True)
+class Rejection:
+    """The rejected request, answered by the status and the Mastodon-style error body"""
+
+    status: int
+    error: str
+
+
+def is_integer(value: str) -> bool:
+    return value.removeprefix("-").isdigit()
+
+
+def is_boolean(value: str) -> bool:
+    return value.lower() in BOOLEANS
+
+
+def is_bearer(authorization: str | None) -> bool:
+    """the Authorization header of the bearer token, the scheme is case-insensitive"""
+    scheme, _, token = (authorization or "").partition(" ")
+    return scheme.lower() == "bearer" and bool(token.strip())
+
+
+def is_number(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def compile_check(schema: SchemaObject) -> Check | None:
+    """the check of the raw string by the schema, None when any string is valid"""
+    if schema.enum:
+        return frozenset(schema.enum).__contains__
+
+    types = schema.type if isinstance(schema.type, list) else [schema.type]
+    match next((typ for typ in types if typ != "null"), "string"):
+        case "integer":
+            return is_integer
+        case "number" | "float":
+            return is_number
+        case "boolean":
+            return is_boolean
+        case "array" if isinstance(schema.items, SchemaObject):
+            # the name[] parameter, each repeated value is checked by the items
+            return compile_check(schema.items)
+        case _:
+            return None
+
+
+@dataclass
+class RouteChecker:
+    """
+    The precompiled checks of the operation, only the parameters which can reject a request are
+    kept, so the route without any of them is skipped without parsing the query.
+    """
+
+    path: list[tuple[str, Check]] = field(default_factory=list)
+    query: list[tuple[str, bool, Check | None]] = field(default_factory=list)
+    headers: list[str] = field(default_factory=list)
+    bearer: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.path or self.query or self.headers or self.bearer)
+
+    @classmethod
+    def compile(cls, operation: Operation, names: set[str]) -> "RouteChecker":
+        # the empty requirement is the optional auth, the anonymous request is allowed
+        requirements = [requirement.root for requirement in operation.security or []]
+        checker = cls(bearer=any("BearerAuth" in root for root in requirements) and {} not in requirements)
+        for parameter in operation.parameters or []:
+            if not isinstance(parameter, ParameterObject):
+                continue
+
+            check = compile_check(parameter.schema_object)
+            match parameter.in_:
+                case ParameterIn.path if parameter.name in names and check:
+                    # NOTE - the parameter of the other template is ignored, the docs may leak it
+                    checker.path.append((parameter.name, check))
+                case ParameterIn.query if parameter.required or check:
+                    checker.query.append((parameter.name, bool(parameter.required), check))
+                case ParameterIn.header if parameter.required:
+                    checker.headers.append(parameter.name.lower())
+        return checker
+
+    def check(self, params: dict[str, str], query: str, header: HeaderLookup) -> Rejection | None:
+        values = None
+        if self.bearer and not is_bearer(header("authorization")):
+            # the token may also be the access_token parameter, in the query or in the form body
+            values = parse_query(query)
+            if "access_token" not in values and not (header("content-type") or "").startswith(FORM_TYPES):
+                return Rejection(401, "The access token is invalid")
+
+        for name in self.headers:
+            if header(name) is None:
+                return Rejection(400, f"Missing header {name}")
+
+        for name, check in self.path:
+            if not check(params[name]):
+                return Rejection(400, f"Invalid path parameter {name.lstrip(':')}")
+
+        if self.query:
+            values = parse_query(query) if values is None else values
+            for name, required, check in self.query:
+                if name not in values:
+                    if required:
+                        return Rejection(400, f"Missing query parameter {name}")
+                elif check and not all(map(check, values[name])):
+                    return Rejection(400, f"Invalid query parameter {name}")
+
+        return None
+
+
+def parse_query(query: str) -> dict[str, list[str]]:
+    """the values of the query by the name, the repeated name (like ids[]) keeps all its values"""
+    values: dict[str, list[str]] = {}
+    for name, value in parse_qsl(query, keep_blank_values=True):
+        values.setdefault(name, []).append(value)
+    return values
+
+
+class RequestValidator:
+    """
+    Validate the request by the parameters and the security of the operation, the checker of each
+    route is compiled once from the spec and the route is matched by the path index.
+
+    the request of the unknown path or method is passed through, the upstream decides.
+    """
+
+    def __init__(self, spec: OpenAPI):
+        self.index: PathIndex[dict[str, RouteChecker]] = PathIndex()
+        compiled = 0
+        for path, path_item in spec.paths.root.items():
+            names = {segment[1:-1] for segment in path.split("/") if segment.startswith("{")}
+            checkers = {}
+            for method, operation in path_item.root.items():
+                if checker := RouteChecker.compile(operation, names):
+                    checkers[method.upper()] = checker
+            compiled += len(checkers)
+            self.index.add(path, checkers)
+
+        self.cache: dict[str, tuple[str, dict[str, RouteChecker], dict] | None] = {}
+        logger.info(f"validate {compiled} operations of {len(self.index)} paths")
+
+    def match(self, path: str):
+        if path not in self.cache:
+            if len(self.cache) > 65536:
+                self.cache.clear()
+            self.cache[path] = self.index.match(path)
+        return self.cache[path]
+
+    def validate(self, method: str, path: str, query: str, header: HeaderLookup) -> Rejection | None:
+        if not (matched := self.match(path)) or not (checker := matched[1].get(method)):
+            return None
+        return checker.check(matched[2], query, header)
@@ -0,0 +1,67 @@
+import json
+from http import HTTPStatus
+
+from .checker import Rejection
+from .checker import RequestValidator
+
+
+def error_body(rejection: Rejection) -> bytes:
+    return json.dumps({"error": rejection.error}, separators=(",", ":")).encode()
+
+
+class ValidationMiddleware:
+    """The ASGI middleware which rejects the malformed request before it reaches the app"""
+
+    def __init__(self, app, validator: RequestValidator):
+        self.app = app
+        self.validator = validator
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = None
+
+        def header(name: str) -> str | None:
+            nonlocal headers
+            if headers is None:
+                headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+            return headers.get(name)
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        if not (rejection := self.validator.validate(scope["method"], scope["path"], query, header)):
+            return await self.app(scope, receive, send)
+
+        body = error_body(rejection)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": rejection.status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+class WSGIValidationMiddleware:
+    """The WSGI middleware which rejects the malformed request before it reaches the app"""
+
+    def __init__(self, app, validator: RequestValidator):
+        self.app = app
+        self.validator = validator
+
+    def __call__(self, environ, start_response):
+        def header(name: str) -> str | None:
+            key = name.upper().replace("-", "_")
+            return environ.get(key if key in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{key}")
+
+        method, path = environ["REQUEST_METHOD"], environ.get("PATH_INFO") or "/"
+        if not (rejection := self.validator.validate(method, path, environ.get("QUERY_STRING", ""), header)):
+            return self.app(environ, start_response)
+
+        body = error_body(rejection)
+        start_response(
+            f"{rejection.status} {HTTPStatus(rejection.status).phrase}",
+            [("Content-Type", "application/json"), ("Content-Length", str(len(body)))],
+        )
+        return [body]
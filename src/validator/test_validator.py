@@ -0,0 +1,201 @@
+import asyncio
+
+import responses
+import yaml
+
+from src.handler import build_spec
+from src.openapi_spec import OpenAPI
+from src.openapi_spec import load_spec
+from src.validator import RequestValidator
+from src.validator import ValidationMiddleware
+from src.validator import WSGIValidationMiddleware
+
+SPEC = """
+info:
+  title: Mastodon OpenAPI API
+  version: 0.1.0
+openapi: 3.1.0
+paths:
+  /api/v1/accounts/{:id}/statuses:
+    get:
+      parameters:
+      - in: path
+        name: :id
+        required: true
+        schema:
+          type: integer
+      - in: path
+        name: :name
+        required: true
+        schema:
+          type: integer
+      - in: query
+        name: limit
+        schema:
+          type: integer
+      - in: query
+        name: only_media
+        schema:
+          type: boolean
+      - in: query
+        name: ids[]
+        schema:
+          items:
+            type: integer
+          type: array
+      - in: query
+        name: visibility
+        schema:
+          enum: [public, unlisted]
+          type: string
+  /api/v1/statuses:
+    post:
+      parameters:
+      - in: header
+        name: Idempotency-Key
+        required: true
+        schema:
+          type: string
+      - in: query
+        name: status
+        required: true
+        schema:
+          type: string
+      security:
+      - BearerAuth: []
+  /api/v1/statuses/{:id}:
+    get:
+      security:
+      - {}
+      - BearerAuth: []
+  /api/v1/instance:
+    get: {}
+"""
+
+
+def spec() -> OpenAPI:
+    return OpenAPI.model_validate(yaml.safe_load(SPEC))
+
+
+class TestRequestValidator:
+    def test_validate(self):
+        validator = RequestValidator(spec())
+        headers = {"authorization": "Bearer token", "idempotency-key": "abc"}.get
+
+        assert validator.validate("GET", "/api/v1/accounts/1/statuses", "limit=20&only_media=true", headers) is None
+        assert validator.validate("GET", "/api/v1/accounts/x/statuses", "", headers).error == (
+            "Invalid path parameter id"
+        )
+        assert validator.validate("GET", "/api/v1/accounts/1/statuses", "limit=many", headers).status == 400
+        assert validator.validate("GET", "/api/v1/accounts/1/statuses", "only_media=yes", headers).status == 400
+        assert validator.validate("GET", "/api/v1/accounts/1/statuses", "visibility=direct", headers).status == 400
+
+        assert validator.validate("POST", "/api/v1/statuses", "status=hi", headers) is None
+        assert validator.validate("POST", "/api/v1/statuses", "", headers).error == "Missing query parameter status"
+        assert validator.validate("POST", "/api/v1/statuses", "status=hi", {}.get).status == 401
+        assert validator.validate("POST", "/api/v1/statuses", "status=hi", {"authorization": "Bearer t"}.get).error == (
+            "Missing header idempotency-key"
+        )
+
+        # the optional auth, the public endpoint is reached without the token
+        assert validator.validate("GET", "/api/v1/statuses/123", "", {}.get) is None
+        assert validator.validate("GET", "/api/v1/statuses/123", "", {"authorization": "Bearer t"}.get) is None
+
+        # the bearer scheme is case-insensitive, and the token may be the access_token parameter
+        lower = {"authorization": "bearer t", "idempotency-key": "abc"}.get
+        assert validator.validate("POST", "/api/v1/statuses", "status=hi", lower) is None
+        token = {"idempotency-key": "abc"}.get
+        assert validator.validate("POST", "/api/v1/statuses", "status=hi&access_token=t", token) is None
+        assert validator.validate("POST", "/api/v1/statuses", "status=hi", {"authorization": "Bearer "}.get).status == (
+            401
+        )
+        # the access_token in the form body is not read, the app decides
+        form = {"content-type": "application/x-www-form-urlencoded", "idempotency-key": "abc"}.get
+        assert validator.validate("POST", "/api/v1/statuses", "status=hi", form) is None
+
+        # the booleans as Rails casts them, and each value of the repeated parameter
+        for value in ("true", "TRUE", "t", "F", "on", "off", "0"):
+            assert validator.validate("GET", "/api/v1/accounts/1/statuses", f"only_media={value}", headers) is None
+        assert validator.validate("GET", "/api/v1/accounts/1/statuses", "ids[]=1&ids[]=2", headers) is None
+        assert validator.validate("GET", "/api/v1/accounts/1/statuses", "ids[]=1&ids[]=x", headers).error == (
+            "Invalid query parameter ids[]"
+        )
+
+        # the unknown path, method and the operation without any check are passed through
+        assert validator.validate("GET", "/api/v1/unknown", "", {}.get) is None
+        assert validator.validate("DELETE", "/api/v1/statuses", "", {}.get) is None
+        assert validator.validate("GET", "/api/v1/instance", "", {}.get) is None
+
+
+class TestMiddleware:
+    def test_asgi(self):
+        called, sent = [], []
+
+        async def app(scope, receive, send):
+            called.append(scope["path"])
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = ValidationMiddleware(app, RequestValidator(spec()))
+        scope = {"type": "http", "method": "POST", "path": "/api/v1/statuses", "query_string": b"", "headers": []}
+        asyncio.run(middleware(scope, None, send))
+        asyncio.run(middleware({**scope, "method": "GET", "path": "/api/v1/instance"}, None, send))
+        asyncio.run(middleware({**scope, "method": "GET", "path": "/api/v1/statuses/123"}, None, send))
+
+        assert called == ["/api/v1/instance", "/api/v1/statuses/123"]
+        assert sent[0]["status"] == 401
+        assert sent[1]["body"] == b'{"error":"The access token is invalid"}'
+
+    def test_wsgi(self):
+        statuses = []
+
+        def app(environ, start_response):
+            start_response("200 OK", [])
+            return [b"ok"]
+
+        middleware = WSGIValidationMiddleware(app, RequestValidator(spec()))
+        environ = {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": "/api/v1/statuses",
+            "QUERY_STRING": "status=hi",
+            "HTTP_AUTHORIZATION": "Bearer token",
+        }
+
+        assert middleware(environ, lambda status, headers: statuses.append(status)) == [
+            b'{"error":"Missing header idempotency-key"}'
+        ]
+        assert middleware(
+            {**environ, "HTTP_IDEMPOTENCY_KEY": "abc"}, lambda status, headers: statuses.append(status)
+        ) == [b"ok"]
+        assert statuses == ["400 Bad Request", "200 OK"]
+
+
+class TestGeneratedSpec:
+    @responses.activate
+    def test_generated_spec(self, docs_site_fn):
+        docs_site_fn(["accounts"], [])
+        validator = RequestValidator(build_spec("https://docs.joinmastodon.org"))
+        headers = {"authorization": "Bearer token"}.get
+
+        # the parameters are typed by the docs, e.g. limit is Integer and only_media is Boolean
+        statuses = "/api/v1/accounts/1/statuses"
+        assert validator.validate("GET", statuses, "limit=20&only_media=true&max_id=abc", headers) is None
+        assert validator.validate("GET", statuses, "limit=many", headers).error == "Invalid query parameter limit"
+        assert validator.validate("GET", statuses, "only_media=yes", headers).error == (
+            "Invalid query parameter only_media"
+        )
+        # the public account is reached anonymously, the own account needs the token
+        assert validator.validate("GET", statuses, "", {}.get) is None
+        assert validator.validate("GET", "/api/v1/accounts/verify_credentials", "", {}.get).status == 401
+        assert validator.validate("GET", "/api/v1/accounts/relationships", "id[]=1&id[]=2", headers) is None
+
+    def test_committed_spec(self):
+        validator = RequestValidator(load_spec("mastodon-openapi.yaml", use_snapshot=False))
+
+        assert validator.validate("GET", "/api/v1/accounts/verify_credentials", "", {}.get).status == 401
+        assert (
+            validator.validate("GET", "/api/v1/accounts/verify_credentials", "", {"authorization": "Bearer t"}.get)
+            is None
+        )
+        assert validator.validate("GET", "/api/v1/unknown", "", {}.get) is None